@@ -1,21 +1,201 @@
 import streamlit as st
-from groq import Groq
 import pandas as pd
-import random
+import os
+import re
+import llm_cache
+import ai_broker
+import ai_prefetch
+import ai_context
+
+# Stream tokens as they arrive; set DASHBOARD_AI_STREAM=0 to wait for whole replies
+STREAMING = os.environ.get("DASHBOARD_AI_STREAM", "1") != "0"
+
+# === LLM Backend Setup ===
+# Groq unless DASHBOARD_LLM_BACKEND (or [llm] backend in secrets) picks the
+# synthetic, replay or record backend from llm_backends. Created on first
+# use, so the groq package is not imported at startup.
+def _secrets_section(name):
+    # Without a secrets.toml (an offline box on the synthetic or replay
+    # backend) reading st.secrets raises; treat that as no section
+    try:
+        return st.secrets[name] if name in st.secrets else None
+    except FileNotFoundError:
+        return None
+
+
+@st.cache_resource
+def get_backend():
+    import llm_backends
+
+    spec = os.environ.get("DASHBOARD_LLM_BACKEND")
+    if not spec:
+        spec = (_secrets_section("llm") or {}).get("backend")
+    api_key = None
+    # Only the backends that talk to Groq need its key
+    if (spec or "groq").strip().lower() in ("groq", "record"):
+        groq_secrets = _secrets_section("groq")
+        api_key = groq_secrets["groq_api_key"] if groq_secrets else None
+    return llm_backends.backend_from_spec(spec, groq_api_key=api_key)
+
+
+def cache_model(model):
+    # Replies from different backends (or endpoints) never share cache entries
+    return f"{model}@{get_backend().key}"
+
+
+def complete(prompt, model, temperature, max_tokens, scope=None, summary_hash=None, on_token=None,
+             on_attempt=None):
+    """Reply text for ``prompt``, served from the shared response cache when possible.
+
+    With ``on_token`` the reply is streamed and each text delta is passed to
+    it as it arrives; cached replies and backends that cannot stream
+    arrive in one piece. ``on_attempt`` is called before every send, retries
+    included, so a streamed preview can start over instead of repeating
+    the deltas of a failed attempt.
+    """
+    def send():
+        if on_attempt is not None:
+            on_attempt()
+        return get_backend().complete(prompt, model, temperature, max_tokens,
+                                      on_token=on_token if STREAMING else None)
+
+    def call():
+        # Sessions asking the same thing at once share one outbound request
+        key = llm_cache.prompt_key(cache_model(model), temperature, max_tokens, prompt)
+        return ai_broker.get_broker().call(key, send)
+
+    return llm_cache.cached_completion(call, prompt, cache_model(model), temperature, max_tokens,
+                                       scope=scope, summary_hash=summary_hash)
+
+
+# === Incremental Action Plan Parsing ===
+PLAN_FIELDS = [("Action", "Immediate Action"), ("Reason", "Reason"), ("Urgency", "Urgency")]
+PLAN_LABEL = re.compile(r"(?i)(Action|Reason|Urgency):\s*(.*)")
+
+
+class ActionPlanParser:
+    """Picks the labelled Action/Reason/Urgency fields out of a streamed reply.
+
+    Same rule as the full-text regexes: a field's value is the rest of the
+    line its label is on. Only the unfinished last line is re-scanned per
+    delta.
+    """
+
+    def __init__(self):
+        self.text = ""
+        self.fields = {}
+        self._line_start = 0
+
+    def feed(self, delta):
+        self.text += delta
+        end = self.text.rfind("\n")
+        if end >= self._line_start:
+            for line in self.text[self._line_start:end].split("\n"):
+                self._scan(line, self.fields)
+            self._line_start = end + 1
+        return self.current()
+
+    @staticmethod
+    def _scan(line, fields):
+        match = PLAN_LABEL.search(line)
+        if match:
+            label = match.group(1).capitalize()
+            fields.setdefault(label, match.group(2).replace('**', '').strip())
+
+    def current(self):
+        """Fields parsed so far, including a partial value on the last line."""
+        fields = dict(self.fields)
+        self._scan(self.text[self._line_start:], fields)
+        return fields
+
+
+def plan_markdown(fields):
+    return "\n\n".join(f"**{title}:** {fields[label]}" for label, title in PLAN_FIELDS if label in fields)
+
+# === Action Plan Request ===
+ACTION_PLAN_SETTINGS = {"temperature": 0.5, "max_tokens": 300}
+
+
+def panel_context(x_col, insights_list, summary_df):
+    """Prompt inputs and cache scope shared by the panel and its prefetch."""
+    summary_text = format_summary(summary_df)
+    full_insight_text = "\n".join(insights_list)
+    # Tags this panel's cached replies; the summary hash is stored alongside them
+    cache_scope = f"{x_col}:{llm_cache.text_hash(full_insight_text)[:12]}"
+    summary_hash = llm_cache.text_hash(summary_text)
+    return full_insight_text, summary_text, cache_scope, summary_hash
 
-# === Groq API Setup ===
-groq_api_key = st.secrets["groq"]
-client = Groq(api_key=groq_api_key)
 
-# === Main Insight Panel Function ===
-import streamlit as st
-from groq import Groq
-import pandas as pd
-import re
+def action_plan_prompt(full_insight_text, summary_text):
+    return f"""
+        You are a senior business analyst AI.
+
+        Given these insights and summary:
+
+        INSIGHTS:
+        \"\"\"{full_insight_text}\"\"\"
+
+        SUMMARY:
+        \"\"\"{summary_text}\"\"\"
+
+        Respond with:
+        Action: <Clear action in 1–2 lines>
+        Reason: <Why it matters>
+        Urgency: <Low / Medium / High>
+        Only include those 3 labeled fields.
+        """
+
+
+def action_plan_context(full_insight_text, summary_df, model):
+    return ai_context.build_prompt(lambda summary_text: action_plan_prompt(full_insight_text, summary_text),
+                                   summary_df, model)
+
+
+def followup_prompt(followup, full_insight_text, summary_text, facts):
+    return f"""
+        You are a senior business consultant.
+
+        User asked: "{followup}"
+
+        Context Insights:
+        \"\"\"{full_insight_text}\"\"\"
+
+        Summary Table:
+        \"\"\"{summary_text}\"\"\"
+
+        Dataset Facts (computed from the data; use these for any totals):
+        \"\"\"{facts or "Not available."}\"\"\"
+
+        Give a concise, precise, very short, helpful and practical answer in simple business terms.
+        Structure your response as bullet points for clarity. Amounts are in rupees; don't mix up lakhs and crores.
+        Please give a careful and precise answer!
+        """
 
-# === Groq API Setup ===
-groq_api_key = st.secrets["groq"]["groq_api_key"]
-client = Groq(api_key=groq_api_key)
+
+def prefetch_recommendation(x_col, insights_list, summary_df, model="llama-3.3-70b-versatile"):
+    """Start this panel's action-plan request in the background (DASHBOARD_AI_PREFETCH=1).
+
+    The reply lands in llm_cache, where the reveal click picks it up. Moving
+    to another plot cancels a prefetch that has not finished.
+    """
+    session = ai_prefetch.session_id()
+    if not ai_prefetch.ENABLED or session is None or summary_df is None:
+        return
+    full_insight_text, summary_text, cache_scope, summary_hash = panel_context(x_col, insights_list, summary_df)
+    prompt = action_plan_context(full_insight_text, summary_df, model).prompt
+    # cache_model() also creates the backend here, on the script thread, with its secrets
+    key = llm_cache.prompt_key(cache_model(model), prompt=prompt, **ACTION_PLAN_SETTINGS)
+    if llm_cache.get_cache().contains(key):
+        return
+
+    def fetch(check):
+        return complete(prompt, model, scope=cache_scope, summary_hash=summary_hash,
+                        on_token=check, **ACTION_PLAN_SETTINGS)
+
+    ai_prefetch.get_prefetcher().submit(session, key, fetch)
+
+
+# === Main Insight Panel Function ===
 
 def display_insight_panel(x_col, predefined_insights, summary_df, model="llama-3.3-70b-versatile"):
     if not predefined_insights:
@@ -23,8 +203,10 @@ def display_insight_panel(x_col, predefined_insights, summary_df, model="llama-3
 
     x_col = next(iter(predefined_insights))
     insights_list = predefined_insights[x_col]
-    summary_text = format_summary(summary_df)
-    full_insight_text = "\n".join(insights_list)
+    full_insight_text, summary_text, cache_scope, summary_hash = panel_context(x_col, insights_list, summary_df)
+
+    # Usually already started by the analysis module; a no-op when it was
+    prefetch_recommendation(x_col, insights_list, summary_df, model)
 
     # === First Toggle: Business Insights ===
     toggle_key_1 = f"toggle_insights_{x_col}"
@@ -68,51 +250,44 @@ def display_insight_panel(x_col, predefined_insights, summary_df, model="llama-3
     if rec_key not in st.session_state:
         st.session_state[rec_key] = None
 
-    if st.session_state[rec_key] is None:
-        prompt = f"""
-        You are a senior business analyst AI.
+    st.markdown("###  AI Suggested Action Plan")
+    plan_area = st.empty()
 
-        Given these insights and summary:
+    if st.session_state[rec_key] is None:
+        prompt = action_plan_context(full_insight_text, summary_df, model).prompt
+        parser = ActionPlanParser()
 
-        INSIGHTS:
-        \"\"\"{full_insight_text}\"\"\"
+        def restart_plan():
+            nonlocal parser
+            parser = ActionPlanParser()
 
-        SUMMARY:
-        \"\"\"{summary_text}\"\"\"
+        def show_tokens(delta):
+            fields = parser.feed(delta)
+            plan_area.markdown((plan_markdown(fields) or parser.text) + " ▌")
 
-        Respond with:
-        Action: <Clear action in 1–2 lines>
-        Reason: <Why it matters>
-        Urgency: <Low / Medium / High>
-        Only include those 3 labeled fields.
-        """
         try:
             with st.spinner(" Thinking about recommended action..."):
-                response = client.chat.completions.create(
-                    messages=[{"role": "user", "content": prompt}],
-                    model=model,
-                    temperature=0.5,
-                    max_tokens=300,
-                )
-                st.session_state[rec_key] = response.choices[0].message.content.strip()
+                st.session_state[rec_key] = complete(prompt, model, scope=cache_scope, summary_hash=summary_hash,
+                                                     on_token=show_tokens, on_attempt=restart_plan,
+                                                     **ACTION_PLAN_SETTINGS)
         except Exception as e:
             st.session_state[rec_key] = f"⚠️ AI failed: {e}"
 
-    st.markdown("###  AI Suggested Action Plan")
-
+    # Final render replaces the streamed preview
+    plan_box = plan_area.container()
     response_text = st.session_state[rec_key]
     action = re.search(r"(?i)Action:\s*(.+?)(?:\n|$)", response_text, re.DOTALL)
     reason = re.search(r"(?i)Reason:\s*(.+?)(?:\n|$)", response_text, re.DOTALL)
     urgency = re.search(r"(?i)Urgency:\s*(.+?)(?:\n|$)", response_text, re.DOTALL)
 
     if action:
-        st.markdown(f"**Immediate Action:** {action.group(1).replace('**', '').strip()}")
+        plan_box.markdown(f"**Immediate Action:** {action.group(1).replace('**', '').strip()}")
     if reason:
-        st.markdown(f"**Reason:** {reason.group(1).replace('**', '').strip()}")
+        plan_box.markdown(f"**Reason:** {reason.group(1).replace('**', '').strip()}")
     if urgency:
-        st.markdown(f"**Urgency:** {urgency.group(1).replace('**', '').strip()}")
+        plan_box.markdown(f"**Urgency:** {urgency.group(1).replace('**', '').strip()}")
     if not any([action, reason, urgency]):
-        st.markdown(response_text)
+        plan_box.markdown(response_text)
 
     st.markdown("---")
 
@@ -121,44 +296,40 @@ def display_insight_panel(x_col, predefined_insights, summary_df, model="llama-3
     followup = st.text_input(f"Ask anything about the insights:", key=f"followup_{x_col}")
 
     if followup:
-        followup_prompt = f"""
-        You are a senior business consultant.
+        # Summary rows most relevant to the question, within the model's prompt budget
+        facts = ai_context.dataset_facts(followup)
+        context = ai_context.build_prompt(
+            lambda summary_text: followup_prompt(followup, full_insight_text, summary_text, facts),
+            summary_df, model, question=followup,
+        )
+        st.info("AI Says:")
+        answer_area = st.empty()
+        streamed = []
+
+        def show_answer(delta):
+            streamed.append(delta)
+            answer_area.markdown("".join(streamed) + " ▌")
 
-        User asked: "{followup}"
-
-        Context Insights:
-        \"\"\"{full_insight_text}\"\"\"
-
-        Summary Table:
-        \"\"\"{summary_text}\"\"\"
-
-        Give a concise, precise, very short, helpful and practical answer in simple business terms.
-        Structure your response as bullet points for clarity. You're miscalculating lakhs as crores. 
-        The entire sales is only 90+ crores. Please and give a careful and precise answer!
-        """
         try:
             with st.spinner("AI answering..."):
-                followup_response = client.chat.completions.create(
-                    messages=[{"role": "user", "content": followup_prompt}],
-                    model=model,
-                    temperature=0.6,
-                    max_tokens=400,
-                )
-                st.info("AI Says:")
-                response_text = followup_response.choices[0].message.content.strip()
+                response_text = complete(context.prompt, model, 0.6, 400,
+                                         scope=cache_scope, summary_hash=summary_hash,
+                                         on_token=show_answer, on_attempt=streamed.clear)
+                answer_box = answer_area.container()
                 lines = response_text.split("•")
 
                 first_line = lines[0].strip()
                 if first_line and not first_line.startswith("-"):
-                    st.markdown(first_line)
+                    answer_box.markdown(first_line)
 
                 for line in lines[1:]:
                     cleaned = line.strip()
                     if cleaned:
-                        st.markdown(f"- {cleaned}")
+                        answer_box.markdown(f"- {cleaned}")
+                st.caption(context.caption())
 
         except Exception as e:
-            st.error(f"⚠️ Failed to answer: {e}")
+            answer_area.error(f"⚠️ Failed to answer: {e}")
 
 # === Format Summary Helper ===
 def format_summary(summary_data):
@@ -0,0 +1,188 @@
+import os
+import random
+import threading
+import time
+
+# === AI Call Broker ===
+# One per server process, shared by every Streamlit session:
+#  - identical in-flight requests are coalesced (single flight): the first
+#    caller sends it, the others wait for that reply
+#  - at most MAX_CONCURRENT requests are outbound at once
+#  - 429 and 5xx replies are retried with full-jitter exponential backoff
+#    (honouring Retry-After when the server sends it)
+# stats() exposes queue depth and wait times for the semaphore.
+# A leader that raises Cancelled (its caller gave up, e.g. an abandoned
+# prefetch, or a Streamlit rerun mid-stream) hands the request to one of its
+# waiters instead of failing them.
+
+MAX_CONCURRENT = int(os.environ.get("DASHBOARD_AI_MAX_CONCURRENT", "4"))
+MAX_RETRIES = int(os.environ.get("DASHBOARD_AI_MAX_RETRIES", "4"))
+BASE_DELAY = 0.5
+MAX_DELAY = 8.0
+
+
+def status_code(exc):
+    """HTTP status of a failed request, or None for non-HTTP errors."""
+    status = getattr(exc, "status_code", None)
+    if status is None:
+        status = getattr(getattr(exc, "response", None), "status_code", None)
+    return status
+
+
+def is_retryable(exc):
+    status = status_code(exc)
+    return status is not None and (status == 429 or status >= 500)
+
+
+def retry_after(exc):
+    headers = getattr(getattr(exc, "response", None), "headers", None) or {}
+    try:
+        return float(headers.get("retry-after"))
+    except (TypeError, ValueError):
+        return None
+
+
+class Cancelled(Exception):
+    """The caller no longer wants the reply; raised from inside ``fn``."""
+
+
+class _Flight:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+        self.waiters = 0
+
+
+class CallBroker:
+    """Single-flight, concurrency-capped, retrying runner for outbound AI calls."""
+
+    def __init__(self, max_concurrent=MAX_CONCURRENT, max_retries=MAX_RETRIES,
+                 base_delay=BASE_DELAY, max_delay=MAX_DELAY, sleep=time.sleep):
+        self.max_concurrent = max_concurrent
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self._sleep = sleep
+        self._slots = threading.BoundedSemaphore(max_concurrent)
+        self._lock = threading.Lock()
+        self._flights = {}
+        self.calls = 0
+        self.coalesced = 0
+        self.retries = 0
+        self.failures = 0
+        self.queued = 0
+        self.max_queued = 0
+        self.active = 0
+        self.total_wait_s = 0.0
+        self.max_wait_s = 0.0
+        self.waits = 0
+
+    def call(self, key, fn):
+        """Return ``fn()``, sharing one outbound call among concurrent callers with the same ``key``."""
+        while True:
+            with self._lock:
+                flight = self._flights.get(key)
+                leader = flight is None
+                if leader:
+                    flight = self._flights[key] = _Flight()
+                else:
+                    flight.waiters += 1
+                    self.coalesced += 1
+
+            if leader:
+                break
+            flight.done.wait()
+            if isinstance(flight.error, Cancelled):
+                continue
+            if flight.error is not None:
+                raise flight.error
+            return flight.result
+
+        try:
+            flight.result = self._run(fn)
+        except Exception as e:
+            flight.error = e
+            raise
+        except BaseException:
+            # Streamlit's rerun/stop exceptions interrupt the leader's session
+            # only; its waiters retry rather than take an empty result.
+            flight.error = Cancelled()
+            raise
+        finally:
+            with self._lock:
+                del self._flights[key]
+            flight.done.set()
+        return flight.result
+
+    def _acquire(self):
+        start = time.perf_counter()
+        with self._lock:
+            self.queued += 1
+            self.max_queued = max(self.max_queued, self.queued)
+        self._slots.acquire()
+        waited = time.perf_counter() - start
+        with self._lock:
+            self.queued -= 1
+            self.active += 1
+            self.waits += 1
+            self.total_wait_s += waited
+            self.max_wait_s = max(self.max_wait_s, waited)
+
+    def _release(self):
+        with self._lock:
+            self.active -= 1
+        self._slots.release()
+
+    def _run(self, fn):
+        attempt = 0
+        while True:
+            self._acquire()
+            try:
+                with self._lock:
+                    self.calls += 1
+                return fn()
+            except Cancelled:
+                raise
+            except Exception as e:
+                if not is_retryable(e) or attempt >= self.max_retries:
+                    with self._lock:
+                        self.failures += 1
+                    raise
+                delay = retry_after(e)
+                if delay is None:
+                    delay = random.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt))
+                attempt += 1
+                with self._lock:
+                    self.retries += 1
+            finally:
+                self._release()
+            # Back off without holding a slot
+            self._sleep(min(delay, self.max_delay))
+
+    def stats(self):
+        with self._lock:
+            return {
+                "calls": self.calls,
+                "coalesced": self.coalesced,
+                "retries": self.retries,
+                "failures": self.failures,
+                "in_flight": len(self._flights),
+                "active": self.active,
+                "queue_depth": self.queued,
+                "max_queue_depth": self.max_queued,
+                "avg_wait_s": self.total_wait_s / self.waits if self.waits else 0.0,
+                "max_wait_s": self.max_wait_s,
+            }
+
+
+_broker = None
+_broker_lock = threading.Lock()
+
+
+def get_broker():
+    global _broker
+    with _broker_lock:
+        if _broker is None:
+            _broker = CallBroker()
+        return _broker
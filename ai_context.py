@@ -0,0 +1,219 @@
+import math
+import os
+import re
+import threading
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+import cube
+from data_sources import dataset_version
+
+# === AI Prompt Context Builder ===
+# Keeps the AI prompts inside a hard token budget per model. Summary rows
+# are scored against the follow-up question in one vectorized pass (term
+# hits across the row text, then the size of the row's numbers as a tie
+# break) and only the best ones that fit are sent. Dataset totals, in
+# crores, and the totals of any brand/region/... named in the question are
+# computed from the loaded frame and added on demand.
+
+CHARS_PER_TOKEN = 4
+
+# Whole-prompt budgets (the reply's max_tokens comes on top)
+PROMPT_TOKEN_BUDGETS = {
+    "llama-3.3-70b-versatile": 4000,
+    "llama-3.1-8b-instant": 2000,
+}
+DEFAULT_PROMPT_TOKENS = 2000
+BUDGET_OVERRIDE = os.environ.get("DASHBOARD_AI_PROMPT_TOKENS")
+
+# Rough prefill cost, only used to report the latency the trimming saves
+PREFILL_S_PER_1K_TOKENS = float(os.environ.get("DASHBOARD_AI_PREFILL_S_PER_1K", "0.05"))
+
+CRORE = 1e7
+
+STOPWORDS = {
+    "the", "and", "for", "with", "what", "which", "why", "how", "who", "are", "was", "were",
+    "this", "that", "these", "those", "does", "did", "can", "could", "should", "would", "about",
+    "from", "into", "more", "most", "less", "than", "have", "has", "our", "their", "them", "give",
+    "show", "tell", "discount", "discounts",
+}
+
+
+def estimate_tokens(text):
+    return math.ceil(len(text) / CHARS_PER_TOKEN)
+
+
+def token_budget(model):
+    if BUDGET_OVERRIDE:
+        return int(BUDGET_OVERRIDE)
+    return PROMPT_TOKEN_BUDGETS.get(model, DEFAULT_PROMPT_TOKENS)
+
+
+def question_terms(question):
+    words = re.findall(r"[a-z0-9][a-z0-9()%+\-]*", (question or "").lower())
+    return sorted({w for w in words if len(w) >= 2 and w not in STOPWORDS})
+
+
+# === Summary rows ===
+
+def summary_lines(summary_df):
+    """One "• a — b — c" line per row, as ai_agent.format_summary writes them."""
+    columns = [summary_df[c].astype(str) for c in summary_df.columns]
+    if not columns:
+        return pd.Series([], dtype=str)
+    lines = "• " + columns[0]
+    for column in columns[1:]:
+        lines = lines + " — " + column
+    return lines.reset_index(drop=True)
+
+
+def rank_rows(summary_df, lines, question=None):
+    """Row positions, most relevant first."""
+    text = lines.str.lower()
+    score = np.zeros(len(lines))
+    for term in question_terms(question):
+        score += text.str.contains(term, regex=False).to_numpy()
+    numeric = summary_df.select_dtypes("number")
+    if numeric.shape[1]:
+        prior = numeric.abs().rank(pct=True).mean(axis=1).fillna(0).to_numpy()
+    else:
+        prior = np.zeros(len(lines))
+    return np.lexsort((np.arange(len(lines)), -prior, -score))
+
+
+def fit_rows(summary_df, question, token_limit):
+    """The summary block that fits ``token_limit``, rows kept, rows total and the untrimmed block."""
+    if summary_df is None:
+        return "No summary data available.", 0, 0, "No summary data available."
+    if isinstance(summary_df, list):
+        summary_df = pd.DataFrame(summary_df)
+    if not isinstance(summary_df, pd.DataFrame):
+        return "Invalid summary format.", 0, 0, "Invalid summary format."
+
+    lines = summary_lines(summary_df)
+    full_text = "\n".join(lines)
+    order = rank_rows(summary_df, lines, question)
+    tokens = np.ceil((lines.str.len().to_numpy() + 1) / CHARS_PER_TOKEN)
+    note_tokens = 20
+    fits = np.cumsum(tokens[order]) <= max(token_limit - note_tokens, 0)
+    keep = np.sort(order[fits])
+    text = "\n".join(lines.iloc[keep])
+    if len(keep) < len(lines):
+        text += f"\n({len(lines) - len(keep)} of {len(lines)} rows left out as less relevant to the question)"
+    return text, len(keep), len(lines), full_text
+
+
+# === Dataset facts ===
+
+def use_dataset(df):
+    """Make the loaded frame available to this session's AI prompts."""
+    st.session_state["ai_context_df"] = df
+
+
+def _crores(value):
+    return f"₹{value / CRORE:,.2f} crore"
+
+
+@st.cache_data(show_spinner=False)
+def _totals(_df, dataset_version):
+    value, discount = _df["value"].sum(), _df["discount"].sum()
+    line = (f"Dataset totals: sales {_crores(value)}, discount {_crores(discount)}"
+            f" ({discount / value * 100 if value else 0:.2f}% of sales), {len(_df):,} transactions")
+    if "customerno" in _df.columns:
+        line += f", {_df['customerno'].nunique():,} customers"
+    if "docdate" in _df.columns and _df["docdate"].notna().any():
+        line += f", {_df['docdate'].min():%d %b %Y} to {_df['docdate'].max():%d %b %Y}"
+    return line + ". 1 crore = 100 lakh = ₹1,00,00,000."
+
+
+@st.cache_data(show_spinner=False)
+def _members(_df, dataset_version):
+    """Sales, discount and transactions of every dimension member, from the cube."""
+    aggregates = cube.build_cube(_df, dataset_version)
+    frames = []
+    for dim in cube.DIMENSIONS:
+        if ("all", (dim,)) not in aggregates:
+            continue
+        sales = cube.group_stats(aggregates, dim, "value")
+        discount = cube.group_stats(aggregates, dim, "discount")
+        frames.append(pd.DataFrame({
+            "dimension": dim,
+            "member": sales.index.astype(str),
+            "sales": sales["sum"].to_numpy(),
+            "discount": discount["sum"].to_numpy(),
+            "transactions": sales["count"].to_numpy(),
+        }))
+    members = pd.concat(frames, ignore_index=True) if frames else pd.DataFrame(
+        columns=["dimension", "member", "sales", "discount", "transactions"])
+    members["needle"] = " " + members["member"].str.lower() + " "
+    return members[~members["member"].str.upper().isin(["NULL", "[NULL]", "NIL", "NAN", "NONE"])]
+
+
+def dataset_facts(question=None, max_members=8):
+    """Totals line plus one line per dimension member named in ``question``."""
+    df = st.session_state.get("ai_context_df")
+    if df is None or df.empty:
+        return ""
+    version = dataset_version(df)
+    lines = [_totals(df, version)]
+    if question:
+        members = _members(df, version)
+        haystack = " " + " ".join(re.findall(r"[a-z0-9()%+\-]+", question.lower())) + " "
+        named = members[[needle in haystack for needle in members["needle"]]].head(max_members)
+        for row in named.itertuples(index=False):
+            rate = row.discount / row.sales * 100 if row.sales else 0
+            lines.append(f"{row.member} ({row.dimension}): sales {_crores(row.sales)}, discount "
+                         f"{_crores(row.discount)} ({rate:.2f}%), {int(row.transactions):,} transactions")
+    return "\n".join(lines)
+
+
+# === Prompt assembly ===
+
+class PromptContext:
+    def __init__(self, prompt, tokens, full_tokens, rows_kept, rows_total, budget):
+        self.prompt = prompt
+        self.tokens = tokens
+        self.full_tokens = full_tokens
+        self.rows_kept = rows_kept
+        self.rows_total = rows_total
+        self.budget = budget
+
+    @property
+    def trimmed(self):
+        return self.rows_kept < self.rows_total
+
+    def caption(self):
+        text = f"Prompt ≈ {self.tokens:,} tokens (budget {self.budget:,})"
+        if self.trimmed:
+            text += (f" · {self.rows_kept:,} of {self.rows_total:,} summary rows,"
+                     f" {self.full_tokens - self.tokens:,} tokens trimmed")
+        return text
+
+
+_lock = threading.Lock()
+_stats = {"prompts": 0, "trimmed": 0, "tokens_sent": 0, "tokens_full": 0}
+
+
+def build_prompt(render, summary_df, model, question=None):
+    """Render ``render(summary_text)`` with as many summary rows as the model's budget allows."""
+    budget = token_budget(model)
+    base_tokens = estimate_tokens(render(""))
+    summary_text, kept, total, full_text = fit_rows(summary_df, question, budget - base_tokens)
+    prompt = render(summary_text)
+    tokens = estimate_tokens(prompt)
+    full_tokens = estimate_tokens(render(full_text)) if kept < total else tokens
+    with _lock:
+        _stats["prompts"] += 1
+        _stats["trimmed"] += kept < total
+        _stats["tokens_sent"] += tokens
+        _stats["tokens_full"] += full_tokens
+    return PromptContext(prompt, tokens, full_tokens, kept, total, budget)
+
+
+def stats():
+    with _lock:
+        saved = _stats["tokens_full"] - _stats["tokens_sent"]
+        return dict(_stats, tokens_saved=saved,
+                    est_latency_saved_s=round(saved / 1000 * PREFILL_S_PER_1K_TOKENS, 3))
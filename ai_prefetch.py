@@ -0,0 +1,147 @@
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+from ai_broker import Cancelled
+
+# === AI Recommendation Prefetch ===
+# Opt-in (DASHBOARD_AI_PREFETCH=1): a panel's action-plan request starts in
+# the background as soon as its summary table is known, so "Reveal AI
+# Powered Action Plan" usually finds the reply in llm_cache (or joins the
+# request still in flight through ai_broker).
+#  - each session has one prefetch slot; a new plot cancels the old one
+#  - each session may start at most PREFETCH_LIMIT prefetches per
+#    PREFETCH_WINDOW seconds, so browsing plots cannot use up the API quota
+#  - PREFETCH_WORKERS threads are shared by all sessions, fewer than the
+#    broker's slots so clicked requests are never starved
+
+ENABLED = os.environ.get("DASHBOARD_AI_PREFETCH", "0") == "1"
+PREFETCH_WORKERS = int(os.environ.get("DASHBOARD_AI_PREFETCH_WORKERS", "2"))
+PREFETCH_LIMIT = int(os.environ.get("DASHBOARD_AI_PREFETCH_LIMIT", "20"))
+PREFETCH_WINDOW = float(os.environ.get("DASHBOARD_AI_PREFETCH_WINDOW", "3600"))
+
+
+class _Slot:
+    def __init__(self, key):
+        self.key = key
+        self.cancel = threading.Event()
+        self.future = None
+
+    def check(self, *_):
+        if self.cancel.is_set():
+            raise Cancelled(self.key)
+
+
+class Prefetcher:
+    """Runs at most one background request per session, within a per-session budget."""
+
+    def __init__(self, workers=PREFETCH_WORKERS, limit=PREFETCH_LIMIT, window=PREFETCH_WINDOW):
+        self.limit = limit
+        self.window = window
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="ai-prefetch")
+        self._lock = threading.Lock()
+        self._slots = {}
+        self._started = {}
+        self.submitted = 0
+        self.completed = 0
+        self.cancelled = 0
+        self.failed = 0
+        self.throttled = 0
+
+    def submit(self, session_id, key, fn):
+        """Start ``fn(check)`` for ``session_id`` unless ``key`` is already its current prefetch.
+
+        ``fn`` should call ``check()`` now and then; it raises Cancelled once
+        the session has asked for something else. Returns False when the
+        session's budget is spent.
+        """
+        now = time.monotonic()
+        with self._lock:
+            slot = self._slots.get(session_id)
+            if slot is not None and slot.key == key:
+                return True
+            if slot is not None:
+                self._cancel(slot)
+                del self._slots[session_id]
+
+            started = self._started.setdefault(session_id, deque())
+            while started and now - started[0] > self.window:
+                started.popleft()
+            if len(started) >= self.limit:
+                self.throttled += 1
+                return False
+            started.append(now)
+
+            slot = self._slots[session_id] = _Slot(key)
+            self.submitted += 1
+            slot.future = self._pool.submit(self._run, slot, fn)
+        return True
+
+    def _run(self, slot, fn):
+        try:
+            slot.check()
+            result = fn(slot.check)
+        except Cancelled:
+            with self._lock:
+                self.cancelled += 1
+            return None
+        except Exception:
+            # The click path will ask again and show the error there
+            with self._lock:
+                self.failed += 1
+            return None
+        with self._lock:
+            self.completed += 1
+        return result
+
+    def _cancel(self, slot):
+        slot.cancel.set()
+        if slot.future is not None and slot.future.cancel():
+            self.cancelled += 1
+
+    def cancel(self, session_id):
+        with self._lock:
+            slot = self._slots.pop(session_id, None)
+            if slot is not None:
+                self._cancel(slot)
+
+    def stats(self):
+        with self._lock:
+            return {
+                "submitted": self.submitted,
+                "completed": self.completed,
+                "cancelled": self.cancelled,
+                "failed": self.failed,
+                "throttled": self.throttled,
+                "running": sum(1 for s in self._slots.values() if s.future is not None and s.future.running()),
+                "sessions": len(self._slots),
+            }
+
+
+_prefetcher = None
+_prefetcher_lock = threading.Lock()
+
+
+def get_prefetcher():
+    global _prefetcher
+    with _prefetcher_lock:
+        if _prefetcher is None:
+            _prefetcher = Prefetcher()
+        return _prefetcher
+
+
+def session_id():
+    """The current Streamlit session's id, or None outside a script run."""
+    from streamlit.runtime.scriptrunner import get_script_run_ctx
+
+    ctx = get_script_run_ctx()
+    return ctx.session_id if ctx is not None else None
+
+
+def cancel_current():
+    """Cancel this session's prefetch, e.g. when it leaves the AI panels."""
+    session = session_id()
+    if ENABLED and session is not None:
+        get_prefetcher().cancel(session)
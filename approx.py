@@ -0,0 +1,210 @@
+import os
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+from data_sources import dataset_version
+
+# === Approximate Statistics ===
+# Distinct counts from HyperLogLog and quantiles from a KLL sketch, built
+# once per monthly partition and merged, so a figure over tens of millions
+# of rows reads a few kilobytes of sketch state instead of the column. Every
+# sketch reports its own error bound for display. Whether pages use them is
+# one switch: the SWITCH_KEY toggle if a page shows it, else
+# DASHBOARD_STATS_MODE (exact / approx / auto; auto goes approximate from
+# DASHBOARD_APPROX_ROWS rows up).
+
+MODE = os.environ.get("DASHBOARD_STATS_MODE", "auto")
+APPROX_ROWS = int(os.environ.get("DASHBOARD_APPROX_ROWS", "10000000"))
+SWITCH_KEY = "approximate_stats"
+
+HLL_PRECISION = 14  # 16,384 registers, ~0.8% standard error
+KLL_K = 200         # ~1.3% rank error
+
+
+def use_approx(df):
+    """True when figures over ``df`` should come from sketches."""
+    choice = st.session_state.get(SWITCH_KEY)
+    if choice is not None:
+        return choice
+    return MODE == "approx" or (MODE == "auto" and len(df) >= APPROX_ROWS)
+
+
+class HyperLogLog:
+    """Mergeable distinct-count sketch over 64-bit value hashes."""
+
+    def __init__(self, precision=HLL_PRECISION):
+        self.precision = precision
+        self.registers = np.zeros(1 << precision, dtype=np.uint8)
+
+    def add(self, series):
+        # Repeats cannot change a register, so only the distinct values are hashed
+        hashes = pd.util.hash_pandas_object(pd.Series(series.dropna().unique()), index=False).to_numpy()
+        tail_bits = 64 - self.precision
+        buckets = (hashes >> np.uint64(tail_bits)).astype(np.intp)
+        tail = hashes & np.uint64((1 << tail_bits) - 1)
+        # Position of the leftmost 1-bit in the tail; tails fit a float64 exactly
+        bit_length = np.frexp(tail.astype(np.float64))[1]
+        np.maximum.at(self.registers, buckets, (tail_bits - bit_length + 1).astype(np.uint8))
+        return self
+
+    def merge(self, other):
+        np.maximum(self.registers, other.registers, out=self.registers)
+        return self
+
+    def estimate(self):
+        m = len(self.registers)
+        alpha = 0.7213 / (1 + 1.079 / m)
+        raw = alpha * m * m / np.ldexp(1.0, -self.registers.astype(np.int64)).sum()
+        zeros = int((self.registers == 0).sum())
+        if raw <= 2.5 * m and zeros:
+            return int(round(m * np.log(m / zeros)))  # linear counting for small sets
+        return int(round(raw))
+
+    @property
+    def relative_error(self):
+        """Two standard errors, as a fraction of the estimate."""
+        return 2 * 1.04 / np.sqrt(len(self.registers))
+
+
+class KLLSketch:
+    """Mergeable quantile sketch (KLL compactors) plus exact count, sum, min and max."""
+
+    def __init__(self, k=KLL_K, seed=0):
+        self.k = k
+        self.levels = [np.empty(0)]
+        self.count = 0
+        self.total = 0.0
+        self.total_sq = 0.0
+        self.min = np.inf
+        self.max = -np.inf
+        self._rng = np.random.default_rng(seed)
+
+    def add(self, series):
+        values = pd.to_numeric(series, errors="coerce").dropna().to_numpy(dtype="float64")
+        if len(values):
+            self.count += len(values)
+            self.total += values.sum()
+            self.total_sq += np.square(values).sum()
+            self.min = min(self.min, values.min())
+            self.max = max(self.max, values.max())
+            self.levels[0] = np.concatenate([self.levels[0], values])
+            self._compress()
+        return self
+
+    def merge(self, other):
+        for level, items in enumerate(other.levels):
+            if level == len(self.levels):
+                self.levels.append(np.empty(0))
+            self.levels[level] = np.concatenate([self.levels[level], items])
+        self.count += other.count
+        self.total += other.total
+        self.total_sq += other.total_sq
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        self._compress()
+        return self
+
+    def _capacity(self, level):
+        depth = len(self.levels) - level - 1
+        return max(2, int(np.ceil(self.k * (2 / 3) ** depth)))
+
+    def _compress(self):
+        level = 0
+        while level < len(self.levels):
+            items = self.levels[level]
+            if len(items) > self._capacity(level):
+                if level + 1 == len(self.levels):
+                    self.levels.append(np.empty(0))
+                items = np.sort(items)
+                # An odd item out stays behind; the rest promote every other item
+                self.levels[level], items = items[len(items) - len(items) % 2:], items[:len(items) - len(items) % 2]
+                promoted = items[self._rng.integers(2)::2]
+                self.levels[level + 1] = np.concatenate([self.levels[level + 1], promoted])
+            level += 1
+
+    def quantiles(self, qs):
+        """Approximate values at the fractions ``qs``; 0 and 1 give the exact min and max."""
+        qs = np.asarray(qs, dtype="float64")
+        if not self.count:
+            return np.full(qs.shape, np.nan)
+        values = np.concatenate(self.levels)
+        weights = np.concatenate([np.full(len(items), 2.0 ** level) for level, items in enumerate(self.levels)])
+        order = np.argsort(values, kind="stable")
+        values, cumulative = values[order], np.cumsum(weights[order])
+        positions = np.searchsorted(cumulative, qs * cumulative[-1], side="left")
+        out = values[np.clip(positions, 0, len(values) - 1)]
+        out[qs <= 0] = self.min
+        out[qs >= 1] = self.max
+        return out
+
+    @property
+    def mean(self):
+        return self.total / self.count if self.count else np.nan
+
+    @property
+    def std(self):
+        if self.count < 2:
+            return np.nan
+        variance = (self.total_sq - self.count * self.mean ** 2) / (self.count - 1)
+        return max(variance, 0.0) ** 0.5
+
+    @property
+    def rank_error(self):
+        """Normalized rank error of a single quantile (99% confidence, DataSketches' fit for k)."""
+        return 2.296 / self.k ** 0.9723
+
+
+def _partitions(df):
+    """Row positions of each calendar month of ``docdate`` (undated rows form their own part)."""
+    if "docdate" not in df.columns:
+        return [np.arange(len(df))]
+    codes, _ = pd.factorize(df["docdate"].to_numpy().astype("datetime64[M]"), use_na_sentinel=False)
+    order = np.argsort(codes, kind="stable")
+    return np.split(order, np.cumsum(np.bincount(codes))[:-1])
+
+
+@st.cache_data(show_spinner=False)
+def _monthly_sketches(_df, dataset_version, key, distinct, quantiles, _mask):
+    df = _df if _mask is None else _df[_mask(_df)]
+    parts = []
+    for rows in _partitions(df):
+        part = df.iloc[rows]
+        sketches = {col: HyperLogLog().add(part[col]) for col in distinct}
+        sketches.update({col: KLLSketch().add(part[col]) for col in quantiles})
+        parts.append(sketches)
+    return parts
+
+
+def sketches(df, key, distinct=(), quantiles=(), mask=None):
+    """``{column: sketch}`` over ``df`` (after ``mask``), merged from its monthly partitions.
+
+    ``key`` names the mask in the cache: the same key must always mean the
+    same ``mask``. ``distinct`` columns get a HyperLogLog, ``quantiles``
+    columns a KLLSketch.
+    """
+    parts = _monthly_sketches(df, dataset_version(df), key, tuple(distinct), tuple(quantiles), mask)
+    merged = {col: HyperLogLog() for col in distinct}
+    merged.update({col: KLLSketch() for col in quantiles})
+    for part in parts:
+        for col, sketch in part.items():
+            merged[col].merge(sketch)
+    return merged
+
+
+def describe(kll_sketches, percentiles=(0.25, 0.5, 0.75)):
+    """A ``DataFrame.describe().T``-shaped table from KLL sketches, with a rank-error column."""
+    rows = {}
+    for col, sketch in kll_sketches.items():
+        row = {"count": sketch.count, "mean": sketch.mean, "std": sketch.std,
+               "min": sketch.min if sketch.count else np.nan, "max": sketch.max if sketch.count else np.nan}
+        row.update(zip([f"{p:.0%}" for p in percentiles], sketch.quantiles(percentiles)))
+        row["percentile rank error"] = f"±{sketch.rank_error:.1%}"
+        rows[col] = row
+    return pd.DataFrame.from_dict(rows, orient="index")
+
+
+def format_estimate(hll):
+    """``≈12,345 (±1.6%)`` for display."""
+    return f"≈{hll.estimate():,} (±{hll.relative_error:.1%})"
@@ -0,0 +1,9 @@
+"""Helpers shared by the benchmark scripts."""
+import time
+
+
+def timed(fn):
+    """``(seconds, result)`` of one call to ``fn()``."""
+    start = time.perf_counter()
+    result = fn()
+    return time.perf_counter() - start, result
@@ -0,0 +1,64 @@
+"""Facts-page distinct counts and percentiles: exact vs. monthly sketches.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_approx --rows 1000000 --rows 10000000
+
+"build" includes sketching every monthly partition; "cached" is a rerun,
+which only merges the stored sketches.
+"""
+import argparse
+
+import numpy as np
+
+import approx
+import preprocess
+from benchmarks._util import timed
+from benchmarks.synthetic import make_transactions
+
+DISTINCT = ["customerno", "loccode", "totcategory"]
+QUANTILES = ["qty", "value", "wt", "discount", "idisc", "obdisc", "ghsdisc", "mc", "goldprice", "stonevalue"]
+PERCENTILES = [0.25, 0.5, 0.75]
+
+
+def exact(df):
+    distinct = {col: df[col].nunique() for col in DISTINCT}
+    return distinct, df[QUANTILES].describe().T[["25%", "50%", "75%"]]
+
+
+def sketched(df):
+    sketches = approx.sketches(df, "bench", distinct=DISTINCT, quantiles=QUANTILES)
+    return sketches, approx.describe({col: sketches[col] for col in QUANTILES}, PERCENTILES)
+
+
+def _rank_error(values, estimate, q):
+    values = np.sort(values[~np.isnan(values)])
+    low = np.searchsorted(values, estimate, side="left") / len(values)
+    high = np.searchsorted(values, estimate, side="right") / len(values)
+    return max(0.0, low - q, q - high)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, action="append")
+    args = parser.parse_args()
+
+    print(f"{'rows':>11} {'exact ms':>9} {'build ms':>9} {'cached ms':>10} {'max distinct err':>17} {'max rank err':>13}")
+    for rows in args.rows or [1_000_000]:
+        df = preprocess.clean(make_transactions(rows))
+        df.attrs["dataset_version"] = f"bench-{rows}"
+
+        exact_s, (distinct, _) = timed(lambda: exact(df))
+        approx._monthly_sketches.clear()
+        build_s, (sketches, table) = timed(lambda: sketched(df))
+        cached_s, _ = timed(lambda: sketched(df))
+
+        distinct_err = max(abs(sketches[col].estimate() - distinct[col]) / distinct[col] for col in DISTINCT)
+        rank_err = max(_rank_error(df[col].to_numpy(dtype="float64"), table.at[col, f"{q:.0%}"], q)
+                       for col in QUANTILES for q in PERCENTILES)
+        print(f"{rows:>11,} {exact_s * 1000:>9.0f} {build_s * 1000:>9.0f} {cached_s * 1000:>10.1f} "
+              f"{distinct_err:>16.2%} {rank_err:>12.2%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+"""Plot 9 multiselect filters: isin() masks vs. the bitmap filter index.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_bitmap --rows 4000000
+"""
+import argparse
+
+import numpy as np
+
+import bitmap
+import preprocess
+from benchmarks._util import timed
+from benchmarks.synthetic import make_transactions
+
+SELECTIONS = {
+    "all values": None,
+    "two brands": {"brand": ["MIA", "ZOYA"]},
+    "one region, one brand": {"region": ["WEST 2"], "brand": ["TANISHQ"]},
+}
+
+
+def base_mask(df):
+    return (df['discount'] > 0) & (df['value'] > 0) & df['region'].notna() & df['brand'].notna()
+
+
+def isin_path(df, regions, brands):
+    """What multivariate Plot 9 did on every widget change."""
+    valid_df = df[base_mask(df)]
+    sorted(valid_df['region'].unique()), sorted(valid_df['brand'].unique())
+    return valid_df[(valid_df['region'].isin(regions)) & (valid_df['brand'].isin(brands))]
+
+
+def bitmap_path(df, regions, brands):
+    index = bitmap.filter_index(df)
+    index.add_base("bench", lambda: base_mask(df))
+    index.values('region', base="bench"), index.values('brand', base="bench")
+    return df[index.select("bench", region=regions, brand=brands)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=4_000_000)
+    args = parser.parse_args()
+
+    df = preprocess.clean(make_transactions(args.rows))
+    df.attrs["dataset_version"] = f"bench-{args.rows}"
+    regions = sorted(df['region'].dropna().unique())
+    brands = sorted(df['brand'].dropna().unique())
+
+    build_s, _ = timed(lambda: bitmap_path(df, regions, brands))
+    print(f"{args.rows:,} rows; index and base built once in {build_s * 1000:.0f} ms")
+    print(f"{'selection':<24} {'isin ms':>9} {'bitmap ms':>10} {'cached ms':>10}")
+    for name, chosen in SELECTIONS.items():
+        chosen = chosen or {}
+        picked = (chosen.get("region", regions), chosen.get("brand", brands))
+        isin_s, expected = timed(lambda: isin_path(df, *picked))
+        bitmap.filter_index(df)._selections.clear()
+        bitmap_s, got = timed(lambda: bitmap_path(df, *picked))
+        cached_s, _ = timed(lambda: bitmap_path(df, *picked))
+        assert np.array_equal(expected.index.to_numpy(), got.index.to_numpy()), name
+        print(f"{name:<24} {isin_s * 1000:>9.1f} {bitmap_s * 1000:>10.1f} {cached_s * 1000:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+"""AI call broker against the local chat-completions stand-in.
+
+Many sessions ask a handful of distinct prompts at once, direct vs. through
+ai_broker.CallBroker. Run from the repository root:
+
+    python -m benchmarks.bench_broker --sessions 24 --prompts 3 --error-rate 0.2
+"""
+import argparse
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from groq import Groq
+
+import ai_broker
+import llm_cache
+from benchmarks.fake_llm_server import start_server
+
+MODEL = "llama-3.3-70b-versatile"
+
+
+def run(server, sessions, prompts, broker=None):
+    client = Groq(api_key="unused", base_url=server.url, max_retries=0)
+    with server.lock:
+        before = dict(server.counts)
+
+    def ask(i):
+        prompt = f"Recommend an action for plot {i % prompts}."
+
+        def send():
+            response = client.chat.completions.create(
+                messages=[{"role": "user", "content": prompt}], model=MODEL,
+                temperature=0.5, max_tokens=300,
+            )
+            return response.choices[0].message.content
+
+        try:
+            if broker is None:
+                send()
+            else:
+                broker.call(llm_cache.prompt_key(MODEL, 0.5, 300, prompt), send)
+            return True
+        except Exception:
+            return False
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=sessions) as pool:
+        ok = sum(pool.map(ask, range(sessions)))
+    elapsed = time.perf_counter() - start
+    with server.lock:
+        sent = server.counts["requests"] - before["requests"]
+        peak = server.counts["max_concurrent"]
+    return ok, sent, peak, elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sessions", type=int, default=24)
+    parser.add_argument("--prompts", type=int, default=3, help="distinct prompts among the sessions")
+    parser.add_argument("--latency", type=float, default=0.5)
+    parser.add_argument("--error-rate", type=float, default=0.2)
+    parser.add_argument("--max-concurrent", type=int, default=2)
+    args = parser.parse_args()
+
+    print(f"{args.sessions} sessions, {args.prompts} distinct prompts, "
+          f"{args.latency:.1f} s latency, {args.error_rate:.0%} errors")
+    print(f"{'mode':<8} {'answered':>9} {'requests':>9} {'peak conc':>10} {'wall s':>7}")
+    for label in ["direct", "broker"]:
+        server = start_server(latency=args.latency, jitter=0.05, error_rate=args.error_rate, seed=1)
+        broker = ai_broker.CallBroker(max_concurrent=args.max_concurrent, base_delay=0.1) if label == "broker" else None
+        ok, sent, peak, elapsed = run(server, args.sessions, args.prompts, broker)
+        server.shutdown()
+        print(f"{label:<8} {ok:>5}/{args.sessions:<3} {sent:>9} {peak:>10} {elapsed:>7.2f}")
+        if broker is not None:
+            stats = broker.stats()
+            print(f"         coalesced {stats['coalesced']}, retries {stats['retries']}, "
+                  f"max queue {stats['max_queue_depth']}, avg wait {stats['avg_wait_s']:.2f} s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+"""Follow-up prompt size and latency: whole summary table vs. the token-budgeted context.
+
+Large summary tables (every customer, a full region x brand x category
+grid) are sent to the local chat-completions stand-in, which charges
+--prefill-per-1k seconds per 1,000 prompt tokens. Run from the repository
+root:
+
+    python -m benchmarks.bench_context --rows 50000 --prefill-per-1k 0.05
+"""
+import argparse
+
+from groq import Groq
+
+import ai_context
+import derived
+import preprocess
+from ai_agent import followup_prompt, format_summary
+from benchmarks.fake_llm_server import start_server
+from benchmarks._util import timed
+from benchmarks.synthetic import make_transactions
+
+MODEL = "llama-3.3-70b-versatile"
+
+
+def tables(df):
+    return {
+        "customers": (
+            df.groupby("customerno").agg(Max_Discount=("discount", "max"), Transaction_Count=("discount", "count"),
+                                         Total_Spend=("value", "sum")).round(2).reset_index(),
+            "Which repeat customers with high spend get the largest discounts?",
+        ),
+        "region x brand x category": (
+            df.groupby(["region", "brand", "totcategory"], observed=True)
+            .agg(Total_Value=("value", "sum"), Avg_Discount=("discount", "mean")).round(2).reset_index(),
+            "Why is WEST 2 discounting DIA more than NORTH 1?",
+        ),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=50_000)
+    parser.add_argument("--prefill-per-1k", type=float, default=0.05)
+    args = parser.parse_args()
+
+    df = derived.add_derived(preprocess.clean(make_transactions(args.rows)))
+    server = start_server(latency=0.2, jitter=0.0, prefill_per_1k=args.prefill_per_1k)
+    client = Groq(api_key="unused", base_url=server.url, max_retries=0, timeout=600)
+
+    def ask(prompt):
+        return client.chat.completions.create(messages=[{"role": "user", "content": prompt}], model=MODEL,
+                                              temperature=0.6, max_tokens=400)
+
+    print(f"{args.rows:,} rows, budget {ai_context.token_budget(MODEL):,} tokens, "
+          f"{args.prefill_per_1k:.2f} s prefill per 1k tokens")
+    print(f"{'table':<26} {'rows':>7} {'full tok':>9} {'sent tok':>9} {'build ms':>9} {'full s':>7} {'sent s':>7}")
+    try:
+        for name, (table, question) in tables(df).items():
+            full = followup_prompt(question, "", format_summary(table), "")
+            build_s, context = timed(lambda: ai_context.build_prompt(
+                lambda summary_text: followup_prompt(question, "", summary_text, ""), table, MODEL, question))
+            full_s, _ = timed(lambda: ask(full))
+            sent_s, _ = timed(lambda: ask(context.prompt))
+            print(f"{name:<26} {len(table):>7,} {ai_context.estimate_tokens(full):>9,} {context.tokens:>9,} "
+                  f"{build_s * 1000:>9.1f} {full_s:>7.2f} {sent_s:>7.2f}")
+    finally:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
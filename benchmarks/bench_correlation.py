@@ -0,0 +1,77 @@
+"""Multivariate Plot 5 correlations: four df.corr() calls per branch vs. one engine matrix.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_correlation --rows 1000000
+"""
+import argparse
+
+import numpy as np
+
+import correlation
+import derived
+import preprocess
+from benchmarks._util import timed
+from benchmarks.synthetic import make_transactions
+
+DISCOUNT_COLUMNS = ['discount', 'idisc', 'obdisc', 'ghsdisc']
+BASE_EXCLUDE = ['year', 'yearmonth', 'customerno', 'brand', 'totcategory']
+
+
+def old_plot5(df):
+    """The heatmap loop and the summary loop Plot 5 used to run."""
+    targets = {}
+    for disc_col in DISCOUNT_COLUMNS:
+        exclude_cols = [col for col in DISCOUNT_COLUMNS if col != disc_col] + BASE_EXCLUDE
+        eligible_columns = [col for col in df.select_dtypes(include='number').columns if col not in exclude_cols]
+        targets[disc_col] = df[eligible_columns].corr()[disc_col].drop(disc_col)
+    for disc_col in DISCOUNT_COLUMNS:
+        eligible_columns = [col for col in df.select_dtypes(include='number').columns
+                            if col not in DISCOUNT_COLUMNS + BASE_EXCLUDE]
+        df[eligible_columns + [disc_col]].corr()[disc_col].drop(disc_col).idxmax()
+    return targets
+
+
+def engine_plot5(df):
+    numeric_columns = [col for col in df.select_dtypes(include='number').columns
+                       if col not in BASE_EXCLUDE and col not in derived.DERIVED_COLUMNS]
+    matrix = correlation.correlation_matrix(df, numeric_columns)
+    return {disc_col: matrix.loc[[col for col in numeric_columns if col == disc_col or col not in DISCOUNT_COLUMNS],
+                                 disc_col].drop(disc_col)
+            for disc_col in DISCOUNT_COLUMNS}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--workers", type=int, default=4)
+    args = parser.parse_args()
+
+    raw = preprocess.clean(make_transactions(args.rows))
+    df = derived.add_derived(raw)
+    df.attrs["dataset_version"] = f"bench-{args.rows}"
+
+    # The old loops ran on the frame before derived columns existed
+    old_s, expected = timed(lambda: old_plot5(raw))
+    correlation._correlations.clear()
+    engine_s, got = timed(lambda: engine_plot5(df))
+    cached_s, _ = timed(lambda: engine_plot5(df))
+    for disc_col in DISCOUNT_COLUMNS:
+        assert list(got[disc_col].index) == list(expected[disc_col].index)
+        assert np.allclose(expected[disc_col], got[disc_col], equal_nan=True)
+
+    segment_s = {}
+    for workers in (1, args.workers):
+        correlation._segment_correlations.clear()
+        segment_s[workers], _ = timed(lambda: correlation.segment_correlations(df, "region", workers=workers))
+
+    print(f"{args.rows:,} rows")
+    print(f"  old Plot 5 loops          {old_s * 1000:>9.1f} ms")
+    print(f"  engine, one matrix        {engine_s * 1000:>9.1f} ms")
+    print(f"  engine, cached            {cached_s * 1000:>9.2f} ms")
+    print(f"  per region, 1 worker      {segment_s[1] * 1000:>9.1f} ms")
+    print(f"  per region, {args.workers} workers     {segment_s[args.workers] * 1000:>9.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+"""Per-customer aggregates: regrouping per plot vs. the customer feature store.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_customer_store --rows 1000000 --append-rows 100000
+"""
+import argparse
+
+import customers
+import derived
+import preprocess
+from benchmarks._util import timed
+from benchmarks.synthetic import make_transactions
+
+
+def regroup(df):
+    """The groupbys multivariate Plots 2, 3 and 6 used to run (Plot 2 twice)."""
+    for _ in range(2):
+        df.groupby('customerno').agg({'got_discount': 'any', 'returned': 'any'})
+    df.groupby('buyer_type', observed=True)['customerno'].nunique()
+    discounted = df.dropna(subset=['customerno', 'discount'])
+    discounted = discounted[discounted['discount'] > 0]
+    discounted.groupby('customerno')['discount'].mean().sort_values(ascending=False).head(50)
+
+
+def from_store(df):
+    store = customers.customer_store(df)
+    store.features[['got_discount', 'returned']]
+    (store.features['transactions'] > 1).value_counts()
+    store.top(50, 'avg_discount_when_discounted')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--append-rows", type=int, default=100_000)
+    args = parser.parse_args()
+
+    df = derived.add_derived(preprocess.clean(make_transactions(args.rows + args.append_rows)))
+    base, new_rows = df.iloc[:args.rows], df.iloc[args.rows:]
+    base.attrs["dataset_version"] = f"bench-{args.rows}"
+
+    regroup_s, _ = timed(lambda: regroup(base))
+    build_s, store = timed(lambda: customers.CustomerStore.build(base))
+    customers._store_registry()["stores"].clear()
+    customers.customer_store(base)
+    cached_s, _ = timed(lambda: from_store(base))
+    append_s, _ = timed(lambda: store.append(new_rows))
+    rebuild_s, _ = timed(lambda: customers.CustomerStore.build(df))
+    lookup_s, _ = timed(lambda: [store.lookup(customerno) for customerno in range(1, 1001)])
+
+    print(f"{args.rows:,} rows, {len(store):,} customers")
+    print(f"  regroup per plot          {regroup_s * 1000:>9.1f} ms")
+    print(f"  store build               {build_s * 1000:>9.1f} ms")
+    print(f"  plots from cached store   {cached_s * 1000:>9.1f} ms")
+    print(f"  append {args.append_rows:,} rows     {append_s * 1000:>9.1f} ms  (full rebuild {rebuild_s * 1000:.1f} ms)")
+    print(f"  1,000 single lookups      {lookup_s * 1000:>9.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,57 @@
+"""New/Repeat customer tagging: the old sort + merge + row-wise apply vs. customers.py.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_customers --rows 100000 --rows 1000000
+
+The apply path is skipped above --max-apply-rows (it takes minutes).
+"""
+import argparse
+
+import customers
+import preprocess
+from benchmarks._util import timed
+from benchmarks.synthetic import make_transactions
+
+
+def apply_counts(df, cust_col="customerno"):
+    """The tagging fandf.show_facts_and_figures used to do on every rerun."""
+    raw_df = df.sort_values('docdate')
+    first_purchase = raw_df.groupby(cust_col)['docdate'].min().reset_index()
+    first_purchase.columns = [cust_col, 'first_purchase']
+    raw_df = raw_df.merge(first_purchase, on=cust_col)
+    raw_df['Customer Type'] = raw_df.apply(
+        lambda row: 'New' if row['docdate'] == row['first_purchase'] else 'Repeat',
+        axis=1
+    )
+    return {"New": int((raw_df['Customer Type'] == 'New').sum()),
+            "Repeat": int((raw_df['Customer Type'] == 'Repeat').sum())}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, action="append")
+    parser.add_argument("--max-apply-rows", type=int, default=1_000_000)
+    args = parser.parse_args()
+
+    print(f"{'rows':>10} {'apply ms':>10} {'engine ms':>10} {'cached ms':>10} {'index ms':>10}  counts")
+    for rows in args.rows or [100_000, 1_000_000]:
+        df = preprocess.clean(make_transactions(rows))
+        df.attrs["dataset_version"] = f"bench-{rows}"
+
+        customers._transaction_tags.clear()
+        engine_s, counts = timed(lambda: customers.customer_type_counts(df))
+        cached_s, _ = timed(lambda: customers.customer_type_counts(df))
+        index_s, _ = timed(lambda: customers.customer_index(df))
+        if rows <= args.max_apply_rows:
+            apply_s, expected = timed(lambda: apply_counts(df))
+            assert expected == counts, (expected, counts)
+            apply_ms = f"{apply_s * 1000:>10.0f}"
+        else:
+            apply_ms = f"{'skipped':>10}"
+        print(f"{rows:>10,} {apply_ms} {engine_s * 1000:>10.1f} {cached_s * 1000:>10.2f} "
+              f"{index_s * 1000:>10.1f}  {counts}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+"""Derived-column store vs. the per-plot ``apply``/``merge`` code it replaced.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_derived --rows 1000000
+"""
+import argparse
+
+import numpy as np
+import pandas as pd
+
+import derived
+import preprocess
+from benchmarks._util import timed
+from benchmarks.synthetic import make_transactions
+
+
+def old_discount_pct(df):
+    return df.apply(
+        lambda row: round((row['discount'] / row['value']) * 100, 2) if row['value'] > 0 else 0,
+        axis=1
+    )
+
+
+def old_buyer_type(df):
+    txn_counts = df.groupby('customerno').size().reset_index(name='transaction_count')
+    txn_counts['Buyer Type'] = txn_counts['transaction_count'].apply(
+        lambda x: 'One-Time Buyer' if x == 1 else 'Multiple-Time Buyer'
+    )
+    return df.merge(txn_counts[['customerno', 'Buyer Type']], on='customerno', how='left')['Buyer Type']
+
+
+def old_day_of_week(df):
+    return df['docdate'].dt.day_name()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    args = parser.parse_args()
+
+    df = preprocess.clean(make_transactions(args.rows))
+
+    cases = [
+        ("discount_pct (apply)", lambda: old_discount_pct(df), ["bill_discount_pct"]),
+        ("buyer type (merge)", lambda: old_buyer_type(df), ["buyer_type"]),
+        ("day_of_week (day_name)", lambda: old_day_of_week(df), ["day_of_week"]),
+    ]
+    print(f"{args.rows:,} rows")
+    print(f"{'column':<24} {'old s':>9} {'store s':>9} {'speedup':>8}")
+    for label, old, names in cases:
+        old_s, old_result = timed(old)
+        new_s, store = timed(lambda: derived.add_derived(df, names))
+        new_result = store[names[0]]
+        if pd.api.types.is_float_dtype(new_result):
+            # np.round and Python's round can disagree by one cent on exact ties
+            assert np.allclose(old_result, new_result, atol=0.011), label
+        else:
+            assert (old_result.astype(str).to_numpy() == new_result.astype(str).to_numpy()).all(), label
+        print(f"{label:<24} {old_s:>9.3f} {new_s:>9.3f} {old_s / new_s:>7.0f}x")
+
+    all_s, _ = timed(lambda: derived.add_derived(df))
+    print(f"{'all derived columns':<24} {'':>9} {all_s:>9.3f}")
+
+
+if __name__ == "__main__":
+    main()
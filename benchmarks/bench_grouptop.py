@@ -0,0 +1,57 @@
+"""Per-customer favourite brand and category: groupby + mode() lambda vs. grouptop.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_grouptop --rows 100000 --rows 1000000
+
+The lambda path is skipped above --max-lambda-rows (it takes minutes).
+"""
+import argparse
+
+import grouptop
+import preprocess
+from benchmarks._util import timed
+from benchmarks.synthetic import make_transactions
+
+COLUMNS = ["brand", "totcategory"]
+
+
+def lambda_modes(df):
+    """What multivariate Plot 6 used to run for each column."""
+    return {col: df.groupby('customerno')[col].agg(lambda x: x.mode().iloc[0] if not x.mode().empty else None)
+            for col in COLUMNS}
+
+
+def vectorized_modes(df):
+    return {col: grouptop.group_mode(df, 'customerno', col) for col in COLUMNS}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, action="append")
+    parser.add_argument("--max-lambda-rows", type=int, default=300_000)
+    args = parser.parse_args()
+
+    print(f"{'rows':>10} {'customers':>10} {'lambda ms':>10} {'grouptop ms':>12} {'cached ms':>10}")
+    for rows in args.rows or [100_000, 1_000_000]:
+        df = preprocess.clean(make_transactions(rows))
+        df.attrs["dataset_version"] = f"bench-{rows}"
+
+        vector_s, got = timed(lambda: vectorized_modes(df))
+        grouptop._cached_top_k.clear()
+        for col in COLUMNS:
+            grouptop.cached_group_mode(df, "bench", 'customerno', col)
+        cached_s, _ = timed(lambda: [grouptop.cached_group_mode(df, "bench", 'customerno', col) for col in COLUMNS])
+        if rows <= args.max_lambda_rows:
+            lambda_s, expected = timed(lambda: lambda_modes(df))
+            for col in COLUMNS:
+                same = expected[col].dropna().astype(str) == got[col].reindex(expected[col].dropna().index).astype(str)
+                assert same.all(), col
+            lambda_ms = f"{lambda_s * 1000:>10.0f}"
+        else:
+            lambda_ms = f"{'skipped':>10}"
+        print(f"{rows:>10,} {df['customerno'].nunique():>10,} {lambda_ms} {vector_s * 1000:>12.1f} {cached_s * 1000:>10.2f}")
+
+
+if __name__ == "__main__":
+    main()
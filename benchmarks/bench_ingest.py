@@ -0,0 +1,77 @@
+"""Peak memory and throughput: in-memory XLSX parse vs. streaming ingest.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_ingest --rows 10000,100000,1000000
+
+Each measurement runs in a fresh subprocess and reports the tracemalloc
+peak, which covers Python objects and NumPy buffers alike. Tracing slows
+both paths equally, so compare rows/s between paths only.
+
+"current" is the original ``pd.read_excel(io.BytesIO(...))`` route;
+"streaming" is ``ingest.read_xlsx_batched`` on a file on disk.
+"""
+import argparse
+import json
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+from benchmarks.synthetic import make_transactions
+
+_CHILD = r"""
+import io, json, sys, time, tracemalloc
+import pandas as pd
+import ingest
+
+mode, path = sys.argv[1], sys.argv[2]
+tracemalloc.start()
+start = time.perf_counter()
+if mode == "current":
+    with open(path, "rb") as f:
+        data = f.read()
+    df = pd.read_excel(io.BytesIO(data), engine="openpyxl")
+else:
+    df = ingest.read_xlsx_batched(path)
+elapsed = time.perf_counter() - start
+_, peak = tracemalloc.get_traced_memory()
+print(json.dumps({
+    "rows": len(df),
+    "seconds": elapsed,
+    "peak_mb": peak / 1e6,
+    "frame_mb": df.memory_usage(deep=True).sum() / 1e6,
+}))
+"""
+
+
+def measure(mode, path):
+    out = subprocess.run(
+        [sys.executable, "-c", _CHILD, mode, str(path)],
+        check=True, capture_output=True, text=True,
+    )
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", default="10000,100000,1000000")
+    parser.add_argument("--workdir", default=None)
+    args = parser.parse_args()
+
+    workdir = Path(args.workdir or tempfile.mkdtemp(prefix="bench_ingest_"))
+    workdir.mkdir(parents=True, exist_ok=True)
+
+    print(f"{'rows':>10} {'path':>10} {'rows/s':>10} {'peak MB':>9} {'frame MB':>9} {'peak/frame':>10}")
+    for rows in (int(r) for r in args.rows.split(",")):
+        xlsx = workdir / f"synthetic_{rows}.xlsx"
+        if not xlsx.exists():
+            make_transactions(rows).to_excel(xlsx, index=False, engine="openpyxl")
+        for mode in ("current", "streaming"):
+            r = measure(mode, xlsx)
+            print(f"{rows:>10,} {mode:>10} {r['rows'] / r['seconds']:>10,.0f} "
+                  f"{r['peak_mb']:>9.1f} {r['frame_mb']:>9.1f} {r['peak_mb'] / r['frame_mb']:>9.1f}x")
+
+
+if __name__ == "__main__":
+    main()
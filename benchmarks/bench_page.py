@@ -0,0 +1,94 @@
+"""End-to-end page latency with realistic AI timings, fully offline.
+
+Each run drives the dashboard in a fresh interpreter on the synthetic LLM
+backend: paint a plot, reveal its AI action plan, ask a follow-up, for
+every quantitative plot. Run from the repository root:
+
+    python -m benchmarks.bench_page --rows 100000 --latency lognormal:0.8,0.35 --latency fixed:0.2
+
+Replies are not served from the response cache (its TTL is set to zero),
+so every reveal pays the sampled latency. Pass --backend replay to use
+recordings made with DASHBOARD_LLM_BACKEND=record instead.
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+from benchmarks.synthetic import make_transactions
+
+PAGE_SNIPPET = """
+import json, time
+from streamlit.testing.v1 import AppTest
+at = AppTest.from_file("main.py", default_timeout=600)
+at.secrets["gdrive"] = {{"file_id": "unused"}}
+at.run()
+timings = {{"paint": [], "reveal": [], "followup": []}}
+errors = []
+
+def timed(name):
+    start = time.perf_counter()
+    at.run()
+    timings[name].append(time.perf_counter() - start)
+    errors.extend(e.message for e in at.exception)
+
+for i in range({plots}):
+    at.selectbox[1].select_index(i)
+    timed("paint")
+    [b for b in at.button if "AI" in b.label][0].click()
+    timed("reveal")
+    at.text_input[0].input("Which segment should we act on first?")
+    timed("followup")
+    [b for b in at.button if "AI" in b.label][0].click()
+    at.run()
+print(json.dumps({{"timings": timings, "errors": errors}}))
+"""
+
+
+def _percentile(values, share):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(share * len(values)))]
+
+
+def run(source, snapshots, plots, backend, latency, token_interval, error_rate):
+    with tempfile.TemporaryDirectory() as tmp:
+        env = dict(os.environ, DASHBOARD_DATA_SOURCE=str(source), DASHBOARD_SNAPSHOT_DIR=str(snapshots),
+                   DASHBOARD_LLM_BACKEND=backend, DASHBOARD_LLM_LATENCY=latency,
+                   DASHBOARD_LLM_TOKEN_INTERVAL=str(token_interval), DASHBOARD_LLM_ERROR_RATE=str(error_rate),
+                   DASHBOARD_LLM_CACHE=str(Path(tmp) / "responses.sqlite"), DASHBOARD_LLM_CACHE_TTL="0")
+        out = subprocess.run([sys.executable, "-c", PAGE_SNIPPET.format(plots=plots)], capture_output=True,
+                             text=True, env=env, check=True)
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--plots", type=int, default=6, help="quantitative plots to visit")
+    parser.add_argument("--backend", default="synthetic", choices=["synthetic", "replay"])
+    parser.add_argument("--latency", action="append", help="time to first token, e.g. lognormal:0.8,0.35 (repeatable)")
+    parser.add_argument("--token-interval", type=float, default=0.02)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        source = Path(tmp) / "transactions.parquet"
+        make_transactions(args.rows).to_parquet(source, index=False)
+        print(f"{args.rows:,} rows, {args.plots} plots, {args.backend} backend, "
+              f"{args.token_interval * 1000:.0f} ms per token, {args.error_rate:.0%} errors")
+        print(f"{'latency':<22} {'step':<9} {'p50 ms':>8} {'p95 ms':>8} {'max ms':>8}")
+        for latency in args.latency or ["lognormal:0.8,0.35"]:
+            result = run(source, Path(tmp) / "snapshots", args.plots, args.backend, latency,
+                         args.token_interval, args.error_rate)
+            for step, values in result["timings"].items():
+                print(f"{latency:<22} {step:<9} {_percentile(values, 0.5) * 1000:>8.0f} "
+                      f"{_percentile(values, 0.95) * 1000:>8.0f} {max(values) * 1000:>8.0f}")
+            if result["errors"]:
+                print("app errors:", *sorted(set(result["errors"])), sep="\n  ")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,59 @@
+"""Time-series views: regrouping the raw frame vs. the calendar engine's day partitions.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_periods --rows 4000000 --days 365
+"""
+import argparse
+
+import numpy as np
+import pandas as pd
+
+import derived
+import periods
+import preprocess
+from benchmarks._util import timed
+from benchmarks.synthetic import make_transactions
+
+VIEWS = [("Daily", 1), ("Weekly", 1), ("Monthly", 1), ("Daily", 7)]
+
+
+def raw_path(df, freq, window):
+    """The same view computed from the transactions."""
+    rows = df[periods.FILTERS["discounted_capped"](df)]
+    keys = rows['docdate'].dt.to_period(periods.FREQUENCIES[freq])
+    grouped = rows.groupby(keys)['discount_pct']
+    sums, counts = grouped.sum(), grouped.count()
+    span = pd.period_range(sums.index.min(), sums.index.max(), freq=periods.FREQUENCIES[freq])
+    sums, counts = sums.reindex(span, fill_value=0), counts.reindex(span, fill_value=0)
+    if window > 1:
+        sums, counts = sums.rolling(window).sum(), counts.rolling(window).sum()
+    return sums / counts.where(counts > 0)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=4_000_000)
+    parser.add_argument("--days", type=int, default=365)
+    args = parser.parse_args()
+
+    df = derived.add_derived(preprocess.clean(make_transactions(args.rows, days=args.days)))
+    df.attrs["dataset_version"] = f"bench-{args.rows}-{args.days}"
+
+    build_s, _ = timed(lambda: periods.partitions(df, "discounted_capped"))
+    print(f"{args.rows:,} rows over {args.days} days; partitions built once in {build_s * 1000:.0f} ms")
+    print(f"{'view':<18} {'raw ms':>9} {'engine ms':>10}")
+    for freq, window in VIEWS:
+        raw_s, expected = timed(lambda: raw_path(df, freq, window))
+        engine_s, got = timed(lambda: periods.series(df, 'discount_pct', freq, "discounted_capped", window=window))
+        assert np.allclose(expected.to_numpy(), got.to_numpy(), equal_nan=True), (freq, window)
+        name = freq if window == 1 else f"{freq}, {window} rolling"
+        print(f"{name:<18} {raw_s * 1000:>9.1f} {engine_s * 1000:>10.1f}")
+    fold_raw_s, expected = timed(lambda: df[periods.FILTERS["discounted_capped"](df)].groupby('day')['discount_pct'].mean())
+    fold_s, got = timed(lambda: periods.fold_by_day(df, 'discount_pct', "discounted_capped"))
+    assert np.allclose(expected.to_numpy(), got.to_numpy())
+    print(f"{'day-of-month fold':<18} {fold_raw_s * 1000:>9.1f} {fold_s * 1000:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,58 @@
+"""Facts-page column statistics: the old per-section loops vs. quality.profile.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_quality --rows 1000000 --workers 4
+"""
+import argparse
+
+import preprocess
+import quality
+from benchmarks._util import timed
+from benchmarks.synthetic import make_transactions
+
+
+def loop_stats(df):
+    """The three scans fandf.show_facts_and_figures used to make."""
+    distinct = {col: df[col].nunique() for col in df.columns}
+    categorical_cols = df.select_dtypes(include=['object', 'category']).columns
+    missing = {col: df[col].isna().sum() for col in categorical_cols}
+    summary = {}
+    for col in categorical_cols:
+        non_null_data = df[col].dropna()
+        top_value = non_null_data.mode().iloc[0] if not non_null_data.empty else 'N/A'
+        summary[col] = (non_null_data.nunique(), top_value, (non_null_data == top_value).sum())
+    return distinct, missing, summary, (df['docdate'].min(), df['docdate'].max())
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--workers", type=int, default=4)
+    args = parser.parse_args()
+
+    df = preprocess.clean(make_transactions(args.rows))
+    df.attrs["dataset_version"] = f"bench-{args.rows}"
+
+    loop_s, (distinct, missing, summary, dates) = timed(lambda: loop_stats(df))
+    timings = {}
+    for workers in (1, args.workers):
+        quality._profile.clear()
+        timings[workers], prof = timed(lambda: quality.profile(df, workers=workers))
+    cached_s, _ = timed(lambda: quality.profile(df))
+
+    assert prof["distinct"].to_dict() == distinct
+    for col, (unique, top, freq) in summary.items():
+        assert (prof.at[col, "distinct"], prof.at[col, "top"], prof.at[col, "freq"]) == (unique, top, freq), col
+        assert prof.at[col, "missing"] == missing[col], col
+    assert (prof.at["docdate", "min"], prof.at["docdate", "max"]) == dates
+
+    print(f"{args.rows:,} rows, {df.shape[1]} columns")
+    print(f"  per-section loops       {loop_s * 1000:>9.1f} ms")
+    print(f"  profile, 1 worker       {timings[1] * 1000:>9.1f} ms")
+    print(f"  profile, {args.workers} workers      {timings[args.workers] * 1000:>9.1f} ms")
+    print(f"  profile, cached         {cached_s * 1000:>9.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+"""Quantitative regplot render time: seaborn scatter + bootstrap vs. the large-N mode.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_regplot --rows 10000 100000 1000000 10000000
+"""
+import argparse
+import io
+import time
+
+import matplotlib
+matplotlib.use("Agg")
+import matplotlib.pyplot as plt
+import numpy as np
+import pandas as pd
+import seaborn as sns
+
+import figcache
+import quantitative
+
+
+def make_points(n_rows, seed=0):
+    # Only the two plotted columns, shaped like value/discount in the workbook
+    rng = np.random.default_rng(seed)
+    value = rng.lognormal(10.5, 1.2, n_rows).round(2)
+    discount = (value * rng.uniform(0, 0.15, n_rows)).round(2)
+    return pd.DataFrame({"value": value, "discount": discount})
+
+
+def render(draw):
+    start = time.perf_counter()
+    fig, ax = plt.subplots(figsize=(7, 4))
+    draw(ax)
+    fig.savefig(io.BytesIO(), **figcache.SAVEFIG_OPTIONS)
+    plt.close(fig)
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, nargs="+", default=[10_000, 100_000, 1_000_000, 10_000_000])
+    parser.add_argument("--seaborn-max-rows", type=int, default=100_000,
+                        help="skip sns.regplot above this many rows (it takes minutes)")
+    args = parser.parse_args()
+
+    print(f"{'rows':>12} {'regplot s':>10} {'large-N s':>10}")
+    for n_rows in args.rows:
+        df = make_points(n_rows)
+
+        # The closed-form line must match numpy's least-squares fit
+        fit, _, _ = quantitative.ols_band(df["value"].to_numpy(), df["discount"].to_numpy(), np.array([0.0, 1.0]))
+        slope, intercept = np.polyfit(df["value"], df["discount"], 1)
+        assert np.allclose(fit, [intercept, intercept + slope]), n_rows
+
+        if n_rows <= args.seaborn_max_rows:
+            seaborn_s = f"{render(lambda ax: sns.regplot(data=df, x='value', y='discount', ax=ax)):.2f}"
+        else:
+            seaborn_s = "skipped"
+        large_s = render(lambda ax: quantitative.density_regplot(df["value"], df["discount"], ax))
+        print(f"{n_rows:>12,} {seaborn_s:>10} {large_s:>10.2f}")
+
+
+if __name__ == "__main__":
+    main()
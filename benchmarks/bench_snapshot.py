@@ -0,0 +1,54 @@
+"""Cold XLSX parse vs. Parquet snapshot load.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_snapshot --rows 10000,1000000,10000000
+
+Writing the source workbook is itself slow at 10M rows (openpyxl writes
+roughly 50k rows/s), so the generated files are kept in ``--workdir`` and
+reused between runs.
+"""
+import argparse
+import os
+import tempfile
+from pathlib import Path
+
+from benchmarks._util import timed
+from benchmarks.synthetic import make_transactions
+
+
+def run(rows, workdir):
+    os.environ["DASHBOARD_SNAPSHOT_DIR"] = str(workdir / "snapshots")
+    import snapshot
+
+    snapshot.SNAPSHOT_DIR = Path(os.environ["DASHBOARD_SNAPSHOT_DIR"])
+
+    xlsx = workdir / f"synthetic_{rows}.xlsx"
+    if not xlsx.exists():
+        make_transactions(rows).to_excel(xlsx, index=False, engine="openpyxl")
+    digest = snapshot.file_hash(xlsx)
+    snapshot.invalidate(digest)
+
+    parse_s, _ = timed(lambda: snapshot.load_or_parse(digest, lambda: snapshot.parse_excel(xlsx)))
+    load_s, _ = timed(lambda: snapshot.load_snapshot(digest))
+    snap_mb = snapshot.snapshot_path(digest).stat().st_size / 1e6
+    return parse_s, load_s, xlsx.stat().st_size / 1e6, snap_mb
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", default="10000,1000000,10000000")
+    parser.add_argument("--workdir", default=None)
+    args = parser.parse_args()
+
+    workdir = Path(args.workdir or tempfile.mkdtemp(prefix="bench_snapshot_"))
+    workdir.mkdir(parents=True, exist_ok=True)
+
+    print(f"{'rows':>10} {'xlsx MB':>9} {'snap MB':>9} {'xlsx s':>9} {'snap s':>9} {'speedup':>8}")
+    for rows in (int(r) for r in args.rows.split(",")):
+        parse_s, load_s, xlsx_mb, snap_mb = run(rows, workdir)
+        print(f"{rows:>10,} {xlsx_mb:>9.1f} {snap_mb:>9.1f} {parse_s:>9.2f} {load_s:>9.3f} {parse_s / load_s:>7.0f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+"""Startup cost: cold import time per module and the dashboard's first paint.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_startup --rows 100000
+
+Each measurement runs in a fresh interpreter. The first paint also checks
+that modules for the analysis types not on screen (and the groq client)
+were not imported; it exits non-zero on that or when --max-first-paint
+is exceeded, so it can gate regressions.
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+from benchmarks.synthetic import make_transactions
+
+MODULES = [
+    "data_sources", "preprocess", "derived", "cube", "summary", "figcache",
+    "ai_agent", "quantitative", "qualitativee", "multivariate", "timeseries", "fandf",
+]
+
+# Must stay unloaded while the default (Quantitative) view is painted
+LAZY_MODULES = ["groq", "multivariate", "timeseries", "fandf", "qualitativee"]
+
+IMPORT_SNIPPET = """
+import time
+start = time.perf_counter()
+import {module}
+print(time.perf_counter() - start)
+"""
+
+FIRST_PAINT_SNIPPET = """
+import json, sys, time
+from streamlit.testing.v1 import AppTest
+at = AppTest.from_file("main.py", default_timeout=600)
+at.secrets["gdrive"] = {{"file_id": "unused"}}
+at.secrets["groq"] = {{"groq_api_key": "unused"}}
+start = time.perf_counter()
+at.run()
+first = time.perf_counter() - start
+start = time.perf_counter()
+at.run()
+rerun = time.perf_counter() - start
+print(json.dumps({{
+    "first": first,
+    "rerun": rerun,
+    "errors": [e.message for e in at.exception],
+    "loaded": [m for m in {lazy!r} if m in sys.modules],
+}}))
+"""
+
+
+def _python(code, env=None):
+    out = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True,
+                         env=env, check=True)
+    return out.stdout.strip().splitlines()[-1]
+
+
+def import_times(repeat):
+    for module in MODULES:
+        best = min(float(_python(IMPORT_SNIPPET.format(module=module))) for _ in range(repeat))
+        print(f"{'import ' + module:<28} {best * 1000:>9.0f} ms")
+
+
+def first_paint(rows):
+    with tempfile.TemporaryDirectory() as tmp:
+        source = Path(tmp) / "transactions.parquet"
+        make_transactions(rows).to_parquet(source, index=False)
+        env = dict(os.environ, DASHBOARD_DATA_SOURCE=str(source),
+                   DASHBOARD_SNAPSHOT_DIR=str(Path(tmp) / "snapshots"))
+        return json.loads(_python(FIRST_PAINT_SNIPPET.format(lazy=LAZY_MODULES), env=env))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--max-first-paint", type=float, default=None,
+                        help="fail when the first paint takes longer (seconds)")
+    args = parser.parse_args()
+
+    import_times(args.repeat)
+
+    result = first_paint(args.rows)
+    print(f"{f'first paint ({args.rows:,} rows)':<28} {result['first'] * 1000:>9.0f} ms")
+    print(f"{'rerun':<28} {result['rerun'] * 1000:>9.0f} ms")
+
+    failed = False
+    if result["errors"]:
+        print("app errors:", *result["errors"], sep="\n  ")
+        failed = True
+    if result["loaded"]:
+        print("loaded eagerly:", ", ".join(result["loaded"]))
+        failed = True
+    if args.max_first_paint is not None and result["first"] > args.max_first_paint:
+        print(f"first paint over budget ({args.max_first_paint:.1f} s)")
+        failed = True
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
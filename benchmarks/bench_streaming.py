@@ -0,0 +1,87 @@
+"""Streamed vs. whole AI replies against the local chat-completions stand-in.
+
+Time to first token and to each action-plan field (as ai_agent's
+incremental parser sees them) vs. waiting for the full reply. Run from the
+repository root:
+
+    python -m benchmarks.bench_streaming --latency 0.8 --token-interval 0.05
+"""
+import argparse
+import time
+
+from groq import Groq
+
+from ai_agent import PLAN_FIELDS, ActionPlanParser
+from benchmarks.fake_llm_server import start_server
+
+MODEL = "llama-3.3-70b-versatile"
+PROMPT = "Recommend an action for the discount plot."
+
+
+def _best_of(fn, repeat):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn(start)
+        elapsed = time.perf_counter() - start
+        if best is None or elapsed < best[0]:
+            best = (elapsed, result)
+    return best
+
+
+def whole(client):
+    def run(start):
+        response = client.chat.completions.create(
+            messages=[{"role": "user", "content": PROMPT}], model=MODEL, temperature=0.5, max_tokens=300,
+        )
+        return response.choices[0].message.content
+    return run
+
+
+def streamed(client):
+    def run(start):
+        parser = ActionPlanParser()
+        first_token = None
+        field_seen = {}
+        for chunk in client.chat.completions.create(
+            messages=[{"role": "user", "content": PROMPT}], model=MODEL, temperature=0.5, max_tokens=300,
+            stream=True,
+        ):
+            delta = chunk.choices[0].delta.content if chunk.choices else None
+            if not delta:
+                continue
+            now = time.perf_counter() - start
+            if first_token is None:
+                first_token = now
+            for label in parser.feed(delta):
+                field_seen.setdefault(label, now)
+        return first_token, field_seen
+    return run
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--latency", type=float, default=0.8, help="seconds to the first token")
+    parser.add_argument("--token-interval", type=float, default=0.05)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    server = start_server(latency=args.latency, jitter=0.0, token_interval=args.token_interval)
+    client = Groq(api_key="unused", base_url=server.url, max_retries=0)
+    try:
+        total, _ = _best_of(whole(client), args.repeat)
+        stream_total, (first_token, field_seen) = _best_of(streamed(client), args.repeat)
+    finally:
+        server.shutdown()
+
+    print(f"{args.latency:.2f} s to first token, {args.token_interval * 1000:.0f} ms per token")
+    print(f"{'whole reply':<28} {total * 1000:>9.0f} ms")
+    print(f"{'streamed: first token':<28} {first_token * 1000:>9.0f} ms")
+    for label, title in PLAN_FIELDS:
+        if label in field_seen:
+            print(f"{'streamed: ' + title:<28} {field_seen[label] * 1000:>9.0f} ms")
+    print(f"{'streamed: complete':<28} {stream_total * 1000:>9.0f} ms")
+
+
+if __name__ == "__main__":
+    main()
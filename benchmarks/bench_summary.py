@@ -0,0 +1,42 @@
+"""Summary engine: first build vs. memoized lookup for every table.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_summary --rows 1000000
+"""
+import argparse
+
+import derived
+import preprocess
+import summary
+from benchmarks._util import timed
+from benchmarks.synthetic import make_transactions
+
+# The filter main.py uses for each plot
+ROW_FILTERS = {
+    "qty": "positive", "value": "positive", "wt": "positive", "mc": "positive",
+    "goldprice": "positive", "stonevalue": "positive", "discount": "components",
+    "priceband": "discounted", "totalecband": "discounted", "clusterecband": "discounted",
+    "amcb": "discounted", "day": "discounted",
+}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    args = parser.parse_args()
+
+    df = derived.add_derived(preprocess.clean(make_transactions(args.rows)))
+    df.attrs["dataset_version"] = f"bench-{args.rows}"
+
+    print(f"{args.rows:,} rows")
+    print(f"{'table':<16} {'build ms':>9} {'cached ms':>10}")
+    for x_col in summary.SUMMARIES:
+        row_filter = ROW_FILTERS.get(x_col, "all")
+        build_s, _ = timed(lambda: summary.summary_table(df, x_col, row_filter))
+        cached_s, _ = timed(lambda: summary.summary_table(df, x_col, row_filter))
+        print(f"{x_col:<16} {build_s * 1000:>9.1f} {cached_s * 1000:>10.2f}")
+
+
+if __name__ == "__main__":
+    main()
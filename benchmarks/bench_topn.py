@@ -0,0 +1,57 @@
+"""Top 20 discounts: full sort vs. the top-N engine's per-partition lists.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_topn --rows 10000000
+"""
+import argparse
+
+import numpy as np
+
+import preprocess
+import topn
+from benchmarks._util import timed
+from benchmarks.synthetic import make_transactions
+
+REQUIRE = ('value', 'docdate', 'loccode')
+
+QUERIES = {
+    "all rows": {},
+    "one brand": {"brands": ["MIA"]},
+    "two regions, 6 days": {"regions": ["WEST 2", "NORTH 1"], "start": "2025-01-10", "end": "2025-01-15"},
+}
+
+
+def sort_path(df, brands=None, regions=None, start=None, end=None):
+    """What multivariate Plot 1 did, plus the same filters."""
+    rows = df.dropna(subset=['discount', *REQUIRE])
+    if brands is not None:
+        rows = rows[rows['brand'].isin(brands)]
+    if regions is not None:
+        rows = rows[rows['region'].isin(regions)]
+    if start is not None:
+        rows = rows[(rows['docdate'] >= start) & (rows['docdate'] <= end)]
+    return rows.sort_values(by='discount', ascending=False).head(20)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=10_000_000)
+    args = parser.parse_args()
+
+    df = preprocess.clean(make_transactions(args.rows))
+    df.attrs["dataset_version"] = f"bench-{args.rows}"
+
+    topn._lists.clear()
+    build_s, _ = timed(lambda: topn.top_n(df, 'discount', 20, require=REQUIRE))
+    print(f"{args.rows:,} rows; lists built once in {build_s * 1000:.0f} ms")
+    print(f"{'query':<22} {'sort ms':>9} {'top-N ms':>9}")
+    for name, filters in QUERIES.items():
+        sort_s, expected = timed(lambda: sort_path(df, **filters))
+        engine_s, got = timed(lambda: topn.top_n(df, 'discount', 20, require=REQUIRE, **filters))
+        assert np.array_equal(expected['discount'].to_numpy(), got['discount'].to_numpy()), name
+        print(f"{name:<22} {sort_s * 1000:>9.1f} {engine_s * 1000:>9.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,202 @@
+"""Local stand-in for the Groq chat-completions endpoint.
+
+Replies after a configurable latency and fails a configurable share of
+requests with 429 or 503, so the AI call path can be exercised offline:
+
+    python -m benchmarks.fake_llm_server --port 8765 --latency 2 --error-rate 0.2
+    GROQ_BASE_URL=http://127.0.0.1:8765 streamlit run main.py
+
+--prefill-per-1k adds latency per 1,000 prompt tokens (estimated at four
+characters a token), so prompt size shows up in response times.
+
+Requests with "stream": true get server-sent chat.completion.chunk events:
+the first token after the latency, then one every --token-interval seconds.
+--no-stream rejects them with 400 instead, as an endpoint without streaming
+would.
+
+GET /stats returns the request counters as JSON.
+"""
+import argparse
+import json
+import random
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+REPLY = (
+    "Action: Cap discounts in the highest-discount segment and review approvals weekly.\n"
+    "Reason: A small share of transactions carries most of the discount spend.\n"
+    "Urgency: High"
+)
+
+
+class FakeLLMServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, latency=1.0, jitter=0.2, error_rate=0.0, rate_limit_share=0.5,
+                 retry_after=None, reply=REPLY, seed=None, token_interval=0.05, streaming=True,
+                 prefill_per_1k=0.0):
+        super().__init__(address, _Handler)
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.rate_limit_share = rate_limit_share
+        self.retry_after = retry_after
+        self.reply = reply
+        self.token_interval = token_interval
+        self.streaming = streaming
+        self.prefill_per_1k = prefill_per_1k
+        self.random = random.Random(seed)
+        self.lock = threading.Lock()
+        self.counts = {"requests": 0, "ok": 0, "streamed": 0, "disconnected": 0, "400": 0, "429": 0,
+                       "503": 0, "max_concurrent": 0}
+        self.concurrent = 0
+
+    @property
+    def url(self):
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+
+class _Handler(BaseHTTPRequestHandler):
+    def log_message(self, *args):
+        pass
+
+    def _send(self, status, body, headers=None):
+        data = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_GET(self):
+        if self.path.rstrip("/") == "/stats":
+            with self.server.lock:
+                self._send(200, dict(self.server.counts))
+        else:
+            self._send(404, {"error": {"message": "not found"}})
+
+    def do_POST(self):
+        server = self.server
+        if not self.path.endswith("/chat/completions"):
+            self._send(404, {"error": {"message": "not found"}})
+            return
+        request = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+        stream = bool(request.get("stream"))
+        if stream and not server.streaming:
+            with server.lock:
+                server.counts["requests"] += 1
+                server.counts["400"] += 1
+            self._send(400, {"error": {"message": "stream is not supported", "type": "invalid_request_error"}})
+            return
+
+        with server.lock:
+            server.counts["requests"] += 1
+            server.concurrent += 1
+            server.counts["max_concurrent"] = max(server.counts["max_concurrent"], server.concurrent)
+            fail = server.random.random() < server.error_rate
+            status = 429 if server.random.random() < server.rate_limit_share else 503
+            delay = max(0.0, server.latency + server.random.uniform(-server.jitter, server.jitter))
+        prompt_chars = sum(len(m.get("content") or "") for m in request.get("messages", []))
+        delay += prompt_chars / 4 / 1000 * server.prefill_per_1k
+        try:
+            time.sleep(delay)
+            if fail:
+                with server.lock:
+                    server.counts[str(status)] += 1
+                headers = {"Retry-After": str(server.retry_after)} if server.retry_after is not None else None
+                message = "Rate limit reached" if status == 429 else "Service unavailable"
+                self._send(status, {"error": {"message": message, "type": "fake_error"}}, headers)
+                return
+            with server.lock:
+                server.counts["ok"] += 1
+                server.counts["streamed"] += stream
+                completion_id = f"chatcmpl-fake-{server.counts['requests']}"
+            if stream:
+                self._stream(completion_id, request.get("model", "fake"))
+                return
+            self._send(200, {
+                "id": completion_id,
+                "object": "chat.completion",
+                "created": int(time.time()),
+                "model": request.get("model", "fake"),
+                "choices": [{
+                    "index": 0,
+                    "message": {"role": "assistant", "content": server.reply},
+                    "finish_reason": "stop",
+                }],
+                "usage": {"prompt_tokens": 0, "completion_tokens": 0, "total_tokens": 0},
+            })
+        finally:
+            with server.lock:
+                server.concurrent -= 1
+
+    def _stream(self, completion_id, model):
+        server = self.server
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Cache-Control", "no-cache")
+        self.end_headers()
+
+        def event(delta, finish_reason=None):
+            chunk = {
+                "id": completion_id,
+                "object": "chat.completion.chunk",
+                "created": int(time.time()),
+                "model": model,
+                "choices": [{"index": 0, "delta": delta, "finish_reason": finish_reason}],
+            }
+            self.wfile.write(f"data: {json.dumps(chunk)}\n\n".encode())
+            self.wfile.flush()
+
+        try:
+            event({"role": "assistant", "content": ""})
+            for i, token in enumerate(re.findall(r"\S+\s*|\s+", server.reply)):
+                if i:
+                    time.sleep(server.token_interval)
+                event({"content": token})
+            event({}, "stop")
+            self.wfile.write(b"data: [DONE]\n\n")
+            self.wfile.flush()
+        except (BrokenPipeError, ConnectionResetError):
+            # The client closed the stream early (e.g. a cancelled prefetch)
+            with server.lock:
+                server.counts["disconnected"] += 1
+            self.close_connection = True
+
+
+def start_server(port=0, **config):
+    """Start a server on a background thread; returns it (``server.url``, ``server.shutdown()``)."""
+    server = FakeLLMServer(("127.0.0.1", port), **config)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", type=float, default=1.0, help="seconds per reply")
+    parser.add_argument("--jitter", type=float, default=0.2, help="+/- seconds added to the latency")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="share of requests that fail")
+    parser.add_argument("--rate-limit-share", type=float, default=0.5,
+                        help="share of failures that are 429 (the rest are 503)")
+    parser.add_argument("--retry-after", type=float, default=None, help="Retry-After seconds on failures")
+    parser.add_argument("--token-interval", type=float, default=0.05, help="seconds between streamed tokens")
+    parser.add_argument("--prefill-per-1k", type=float, default=0.0, help="seconds per 1,000 prompt tokens")
+    parser.add_argument("--no-stream", action="store_true", help="reject streaming requests with 400")
+    args = parser.parse_args()
+
+    server = FakeLLMServer(("127.0.0.1", args.port), latency=args.latency, jitter=args.jitter,
+                           error_rate=args.error_rate, rate_limit_share=args.rate_limit_share,
+                           retry_after=args.retry_after, token_interval=args.token_interval,
+                           streaming=not args.no_stream, prefill_per_1k=args.prefill_per_1k)
+    print(f"Fake chat-completions endpoint on {server.url} (set GROQ_BASE_URL to this)")
+    server.serve_forever()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,56 @@
+"""Synthetic transactions shaped like the production workbook.
+
+Used by the benchmark scripts so they run offline and at any row count.
+"""
+import numpy as np
+import pandas as pd
+
+BRANDS = ["TANISHQ", "MIA", "ZOYA", "ECOM"]
+REGIONS = ["EAST 1", "EAST 2", "NORTH 1", "NORTH 2", "NORTH 3", "SOUTH 1",
+           "SOUTH 2", "WEST 1", "WEST 2", "WEST 3", "NULL", "[NULL]"]
+LEVELS = ["L1", "L2", "L3"]
+RCLUSTERS = ["STUDDED", "PLAIN", "COINS", "SILVER", "NULL"]
+CATEGORIES = ["DIA", "GIS", "HCG", "MCG", "SSA", "LCG", "SIL", "COI", "NULL"]
+PRICEBANDS = ["A(0-25K)", "B(25-50K)", "C(50-100K)", "D(1-2L)", "E(2-3L)", "NIL"]
+ECBANDS = ["A(0-50K)", "B(50-100K)", "C(1-2L)", "D(2-3L)", "E(3-5L)", "H(10L+)", "NIL"]
+AMCB = ["A(1-10%)", "B(11-14%)", "C(14-18%)", "D(18-24%)", "E(24-30%)", "F(30%+)", None]
+
+
+def make_transactions(n_rows, seed=0, start="2025-01-01", days=31):
+    rng = np.random.default_rng(seed)
+    value = rng.lognormal(10.5, 1.2, n_rows).round(2)
+    discount = (value * rng.uniform(0, 0.15, n_rows)).round(2)
+    returned = rng.random(n_rows) < 0.04
+    sign = np.where(returned, -1, 1)
+    idisc_share = rng.uniform(0.95, 1.0, n_rows)
+    docdate = pd.Timestamp(start) + pd.to_timedelta(rng.integers(0, days, n_rows), unit="D")
+
+    df = pd.DataFrame({
+        "docdate": docdate,
+        "customerno": rng.integers(1, max(2, n_rows // 3), n_rows),
+        "loccode": rng.choice([f"L{i:03d}" for i in range(200)], n_rows),
+        "brand": rng.choice(BRANDS, n_rows, p=[0.8, 0.15, 0.01, 0.04]),
+        "region": rng.choice(REGIONS, n_rows),
+        "level": rng.choice(LEVELS, n_rows, p=[0.7, 0.29, 0.01]),
+        "rcluster": rng.choice(RCLUSTERS, n_rows),
+        "totcategory": rng.choice(CATEGORIES, n_rows),
+        "priceband": rng.choice(PRICEBANDS, n_rows),
+        "totalecband": rng.choice(ECBANDS, n_rows),
+        "clusterecband": rng.choice(ECBANDS, n_rows),
+        "amcb": rng.choice(np.array(AMCB, dtype=object), n_rows),
+        "bdisc": rng.choice(["BD1", "BD2", "NULL"], n_rows),
+        "qty": sign * rng.integers(1, 6, n_rows),
+        "value": sign * value,
+        "wt": (rng.gamma(2.0, 5.0, n_rows)).round(3),
+        "discount": discount,
+        "idisc": (discount * idisc_share).round(2),
+        "obdisc": (discount * (1 - idisc_share) * 0.6).round(2),
+        "ghsdisc": (discount * (1 - idisc_share) * 0.4).round(2),
+        "mc": (value * rng.uniform(0.05, 0.2, n_rows)).round(2),
+        "goldprice": (value * rng.uniform(0.3, 0.9, n_rows)).round(2),
+        "stonevalue": (value * rng.uniform(0, 0.5, n_rows)).round(2),
+    })
+    df["year"] = df["docdate"].dt.year
+    df["month"] = df["docdate"].dt.month
+    df["yearmonth"] = df["year"] * 100 + df["month"]
+    return df
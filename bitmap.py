@@ -0,0 +1,85 @@
+import os
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+from data_sources import dataset_version
+from preprocess import CATEGORICAL_COLUMNS
+
+# === Bitmap Filter Index ===
+# One packed bitset (np.packbits, one bit per row) per value of each
+# categorical dimension, built once per dataset version. A multiselect
+# filter is an OR of its values' bitsets, filters combine with AND, and
+# named base predicates (a plot's validity rules) are stored as bitsets
+# too, so a widget change costs a few byte-wise operations on n/8 bytes
+# instead of isin() scans. Resolved selections are kept per filter
+# combination.
+
+SELECTION_CACHE = int(os.environ.get("DASHBOARD_BITMAP_SELECTIONS", "64"))
+
+
+class BitmapIndex:
+    """Per-value row bitsets over the categorical columns of one frame."""
+
+    def __init__(self, df, columns=CATEGORICAL_COLUMNS):
+        self.rows = len(df)
+        self.bitmaps = {}
+        for col in columns:
+            if col not in df.columns:
+                continue
+            codes, uniques = pd.factorize(df[col])
+            self.bitmaps[col] = {value: np.packbits(codes == code) for code, value in enumerate(uniques)}
+        self._bases = {}
+        self._selections = OrderedDict()
+        self._lock = threading.Lock()
+
+    def add_base(self, name, predicate):
+        """Register ``predicate()`` (a row mask) as base ``name``, evaluated once.
+
+        The same name must always mean the same predicate.
+        """
+        with self._lock:
+            if name not in self._bases:
+                self._bases[name] = np.packbits(np.asarray(predicate(), dtype=bool))
+
+    def values(self, col, base=None):
+        """Sorted values of ``col`` present in at least one row of ``base``."""
+        present = [value for value, bitmap in self.bitmaps[col].items()
+                   if (bitmap if base is None else bitmap & self._bases[base]).any()]
+        return sorted(present)
+
+    def select(self, base=None, **filters):
+        """Boolean row mask for ``base`` AND each ``col=values`` filter (values ORed)."""
+        key = (base, tuple(sorted((col, frozenset(values)) for col, values in filters.items())))
+        with self._lock:
+            if key in self._selections:
+                self._selections.move_to_end(key)
+                return np.unpackbits(self._selections[key], count=self.rows).view(bool)
+
+        bits = self._bases[base].copy() if base is not None else np.full((self.rows + 7) // 8, 0xFF, dtype=np.uint8)
+        for col, values in filters.items():
+            union = np.zeros_like(bits)
+            for value in values:
+                bitmap = self.bitmaps[col].get(value)
+                if bitmap is not None:
+                    union |= bitmap
+            bits &= union
+
+        with self._lock:
+            self._selections[key] = bits
+            while len(self._selections) > SELECTION_CACHE:
+                self._selections.popitem(last=False)
+        return np.unpackbits(bits, count=self.rows).view(bool)
+
+
+@st.cache_resource(show_spinner=False, max_entries=4)
+def _index(_df, dataset_version):
+    return BitmapIndex(_df)
+
+
+def filter_index(df):
+    """The BitmapIndex for ``df``, shared by every session of its dataset version."""
+    return _index(df, dataset_version(df))
@@ -0,0 +1,97 @@
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+from data_sources import dataset_version
+from derived import DERIVED_COLUMNS
+
+# === Correlation Engine ===
+# Every pairwise correlation among the numeric columns from one set of
+# matrix products (counts, sums, sums of squares and cross-products over
+# the rows where both columns are present), so a caller that needs the
+# correlations of several targets reads them from one matrix instead of
+# rebuilding df.corr() per target. Matrices are memoized per (dataset
+# version, filter, method, columns); per-segment matrices are computed on
+# a thread pool (DASHBOARD_CORR_WORKERS), since the products release the GIL.
+
+WORKERS = int(os.environ.get("DASHBOARD_CORR_WORKERS", "4"))
+
+METHODS = ["pearson", "spearman"]
+
+# Row filters applied before correlating
+FILTERS = {
+    "all": None,
+    "discounted": lambda df: df["discount"] > 0,
+}
+
+
+def _matrix(frame, method):
+    if method == "spearman":
+        # Average ranks over each column's non-missing values
+        frame = frame.rank(method="average")
+    values = frame.to_numpy(dtype="float64", na_value=np.nan)
+    present = ~np.isnan(values)
+    # Centring first keeps the sums-of-squares subtraction well conditioned
+    values = np.where(present, values - np.nanmean(values, axis=0) if len(values) else values, 0.0)
+    weights = present.astype("float64")
+
+    n = weights.T @ weights          # rows where both i and j are present
+    sum_x = values.T @ weights       # [i, j]: sum of x_i over those rows
+    sum_sq = (values ** 2).T @ weights
+    cross = values.T @ values
+    with np.errstate(invalid="ignore", divide="ignore"):
+        cov = cross - sum_x * sum_x.T / n
+        var_x = sum_sq - sum_x ** 2 / n
+        corr = cov / np.sqrt(var_x * var_x.T)
+    corr[n < 2] = np.nan
+    corr = np.clip(corr, -1.0, 1.0)
+    # A column with any variance correlates perfectly with itself
+    diagonal = np.diagonal(corr).copy()
+    np.fill_diagonal(corr, np.where(np.isnan(diagonal), np.nan, 1.0))
+    return pd.DataFrame(corr, index=frame.columns, columns=frame.columns)
+
+
+def _numeric_columns(df):
+    # The raw numeric columns; derived ratios would correlate with their own sources
+    return [col for col in df.select_dtypes(include="number").columns if col not in DERIVED_COLUMNS]
+
+
+def _rows(df, row_filter):
+    mask = FILTERS[row_filter]
+    return df if mask is None else df[mask(df)]
+
+
+@st.cache_data(show_spinner=False)
+def _correlations(_df, dataset_version, columns, row_filter, method):
+    return _matrix(_rows(_df, row_filter)[list(columns)], method)
+
+
+def correlation_matrix(df, columns=None, method="pearson", row_filter="all"):
+    """Pairwise-complete correlations among ``columns`` (default: every raw numeric column).
+
+    Matches ``df[columns].corr(method)`` for Pearson; Spearman ranks each
+    column over its own non-missing values.
+    """
+    columns = tuple(_numeric_columns(df) if columns is None else columns)
+    return _correlations(df, dataset_version(df), columns, row_filter, method)
+
+
+@st.cache_data(show_spinner=False)
+def _segment_correlations(_df, dataset_version, by, columns, row_filter, method, _workers):
+    df = _rows(_df, row_filter)
+    segments = [(key, part[list(columns)]) for key, part in df.groupby(by, observed=True, sort=True)]
+    with ThreadPoolExecutor(max_workers=max(1, _workers), thread_name_prefix="corr") as pool:
+        matrices = list(pool.map(lambda segment: _matrix(segment[1], method), segments))
+    if not segments:
+        return pd.DataFrame(columns=list(columns), index=pd.MultiIndex.from_arrays([[], []], names=[by, None]))
+    return pd.concat(matrices, keys=[key for key, _ in segments], names=[by, None])
+
+
+def segment_correlations(df, by, columns=None, method="pearson", row_filter="all", workers=None):
+    """One correlation matrix per value of ``by``, stacked under a (segment, column) index."""
+    columns = tuple(_numeric_columns(df) if columns is None else columns)
+    workers = WORKERS if workers is None else workers
+    return _segment_correlations(df, dataset_version(df), by, columns, row_filter, method, workers)
@@ -0,0 +1,71 @@
+import pandas as pd
+import streamlit as st
+
+# === Aggregate Cube ===
+# Sum, count, sum of squares, min and max of the main measures, grouped by
+# every dimension and the common dimension pairs. Built once per dataset
+# version; qualitative/quantitative lookups then read a few dozen rows
+# instead of scanning every transaction.
+
+DIMENSIONS = [
+    "brand", "region", "level", "rcluster", "totcategory",
+    "amcb", "priceband", "totalecband", "clusterecband",
+]
+
+PAIRS = [
+    ("region", "brand"), ("brand", "level"), ("brand", "totcategory"),
+    ("region", "level"), ("totcategory", "priceband"), ("brand", "priceband"),
+]
+
+MEASURES = ["discount", "value", "idisc", "obdisc", "ghsdisc"]
+
+STATS = ["sum", "count", "sumsq", "min", "max"]
+
+# Row filters the plots apply before grouping
+FILTERS = {
+    "all": None,
+    "discounted": lambda df: df["discount"] > 0,
+}
+
+
+def _aggregate(df, dims):
+    measures = df[MEASURES].astype("float64")
+    keys = [df[d] for d in dims]
+    stats = measures.groupby(keys, observed=True).agg(["sum", "count", "min", "max"])
+    sumsq = (measures ** 2).groupby(keys, observed=True).sum()
+    sumsq.columns = pd.MultiIndex.from_product([sumsq.columns, ["sumsq"]])
+    return pd.concat([stats, sumsq], axis=1)
+
+
+@st.cache_data(show_spinner=False)
+def build_cube(_df, dataset_version):
+    """Return ``{(filter, dims): frame}``; ``dataset_version`` is the cache key."""
+    cube = {}
+    for name, row_filter in FILTERS.items():
+        df = _df if row_filter is None else _df[row_filter(_df)]
+        for dims in [(d,) for d in DIMENSIONS if d in df.columns] + PAIRS:
+            if all(d in df.columns for d in dims):
+                cube[(name, dims)] = _aggregate(df, list(dims))
+    return cube
+
+
+def lookup(cube, dims, row_filter="all"):
+    """The raw cube slice for ``dims`` (a column name or tuple, any order)."""
+    dims = (dims,) if isinstance(dims, str) else tuple(dims)
+    if (row_filter, dims) in cube:
+        return cube[(row_filter, dims)]
+    for (name, stored), frame in cube.items():
+        if name == row_filter and sorted(stored) == sorted(dims):
+            return frame.reorder_levels(list(dims)).sort_index()
+    raise KeyError(f"{dims} with filter {row_filter!r} is not materialized in the cube")
+
+
+def group_stats(cube, dims, measure, row_filter="all"):
+    """Per-group sum, count, mean, std, min and max of one measure."""
+    frame = lookup(cube, dims, row_filter)[measure]
+    out = frame[["sum", "count", "min", "max"]].copy()
+    out["mean"] = out["sum"] / out["count"]
+    # Sample variance from the stored moments, as pandas' .std() would give
+    variance = (frame["sumsq"] - out["count"] * out["mean"] ** 2) / (out["count"] - 1)
+    out["std"] = variance.clip(lower=0) ** 0.5
+    return out
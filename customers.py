@@ -0,0 +1,229 @@
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+from data_sources import dataset_version
+
+# === Customer First-Seen Engine ===
+# When each customer first bought, where every transaction falls in its
+# customer's history and how recently each customer was last seen. Built
+# with vectorized groupby transforms over integer customer codes (no
+# row-wise apply, no merge) and memoized per (dataset version, filter),
+# so the Facts page pays for it once per dataset.
+
+# Row filters, matching the ones the Facts page offers
+FILTERS = {
+    "all": None,
+    "positive": lambda df: (df["qty"] > 0) & (df["value"] > 0) & (df["wt"] > 0) & (df["discount"] >= 0),
+}
+
+CUSTOMER_TYPES = ["New", "Repeat"]
+
+
+def _rows(df, row_filter):
+    mask = FILTERS[row_filter]
+    return df if mask is None else df[mask(df)]
+
+
+@st.cache_data(show_spinner=False)
+def _transaction_tags(_df, dataset_version, cust_col, row_filter):
+    df = _rows(_df, row_filter)
+    codes, _ = pd.factorize(df[cust_col])
+    known = codes >= 0
+    keys = pd.Series(np.where(known, codes, -1), index=df.index)
+    dates = df["docdate"].where(known)
+
+    first_purchase = dates.groupby(keys).transform("min").where(known)
+    # Same rule as before: a transaction on the first purchase date is "New"
+    labels = np.where(~known, -1, np.where(dates == first_purchase, 0, 1)).astype("int8")
+    return pd.DataFrame({
+        "first_purchase": first_purchase,
+        "txn_rank": dates.groupby(keys).rank(method="first").astype("Int64"),
+        "days_since_first": (dates - first_purchase).dt.days.astype("Int64"),
+        "customer_type": pd.Categorical.from_codes(labels, categories=CUSTOMER_TYPES),
+    }, index=df.index)
+
+
+def transaction_tags(df, cust_col="customerno", row_filter="all"):
+    """Per transaction: first_purchase, txn_rank (1 = first), days_since_first and customer_type.
+
+    Rows without a customer get missing values and no customer type.
+    """
+    return _transaction_tags(df, dataset_version(df), cust_col, row_filter)
+
+
+@st.cache_data(show_spinner=False)
+def _customer_index(_df, dataset_version, cust_col, row_filter):
+    df = _rows(_df, row_filter)
+    dates = df["docdate"]
+    index = dates.groupby(df[cust_col], observed=True).agg(
+        first_purchase="min", last_purchase="max", transactions="size"
+    )
+    index["recency_days"] = (dates.max() - index["last_purchase"]).dt.days.astype("Int64")
+    return index
+
+
+def customer_index(df, cust_col="customerno", row_filter="all"):
+    """Per customer: first_purchase, last_purchase, transactions and recency_days (to the latest date in the data)."""
+    return _customer_index(df, dataset_version(df), cust_col, row_filter)
+
+
+def customer_type_counts(df, cust_col="customerno", row_filter="all"):
+    """Transactions tagged New and Repeat."""
+    counts = transaction_tags(df, cust_col, row_filter)["customer_type"].value_counts()
+    return {label: int(counts.get(label, 0)) for label in CUSTOMER_TYPES}
+
+
+# === Customer Feature Store ===
+# One row per customerno with the per-customer aggregates the plots used to
+# regroup the raw transactions for. Only additive pieces (counts, sums,
+# max, first/last dates) are stored, so transactions appended later (a new
+# monthly drop in a DirectorySource) fold in without touching the old rows.
+# One store per (dataset version, filter) is shared by every session.
+
+STORE_VERSIONS = 4
+
+# Stored aggregates and their dtypes
+STORE_COLUMNS = {
+    "transactions": "int32",
+    "discounted_transactions": "int32",
+    "returns": "int32",
+    "discount_count": "int32",
+    "discount_sum": "float64",
+    "discounted_sum": "float64",
+    "max_discount": "float64",
+    "total_spend": "float64",
+    "first_purchase": "datetime64[ns]",
+    "last_purchase": "datetime64[ns]",
+}
+
+# How two partial aggregates of the same customer combine
+_COMBINE = {
+    "max_discount": "max",
+    "first_purchase": "min",
+    "last_purchase": "max",
+}
+
+
+def _aggregate(df):
+    rows = df[df["customerno"].notna()]
+    discount = rows["discount"].astype("float64")
+    discounted = discount > 0
+    frame = pd.DataFrame({
+        "customerno": rows["customerno"],
+        "discounted": discounted,
+        "returned": (rows["qty"] < 0) | (rows["value"] < 0),
+        "discount": discount,
+        "discounted_amount": discount.where(discounted, 0.0),
+        "value": rows["value"].astype("float64"),
+        "docdate": rows["docdate"],
+    })
+    grouped = frame.groupby("customerno", sort=True).agg(
+        transactions=("customerno", "size"),
+        discounted_transactions=("discounted", "sum"),
+        returns=("returned", "sum"),
+        discount_count=("discount", "count"),
+        discount_sum=("discount", "sum"),
+        discounted_sum=("discounted_amount", "sum"),
+        max_discount=("discount", "max"),
+        total_spend=("value", "sum"),
+        first_purchase=("docdate", "min"),
+        last_purchase=("docdate", "max"),
+    )
+    return grouped.astype(STORE_COLUMNS)
+
+
+class CustomerStore:
+    """Per-customer features indexed by customerno, built from ``rows`` transactions.
+
+    ``features`` holds the stored aggregates plus got_discount, returned,
+    mean_discount and avg_discount_when_discounted.
+    """
+
+    def __init__(self, aggregates, rows, parts=()):
+        self.rows = rows
+        self.parts = list(parts)
+        features = aggregates.copy()
+        with np.errstate(divide="ignore", invalid="ignore"):
+            features["got_discount"] = features["discounted_transactions"] > 0
+            features["returned"] = features["returns"] > 0
+            features["mean_discount"] = features["discount_sum"] / features["discount_count"].where(features["discount_count"] > 0)
+            features["avg_discount_when_discounted"] = (
+                features["discounted_sum"] / features["discounted_transactions"].where(features["discounted_transactions"] > 0)
+            )
+        self.features = features
+
+    @classmethod
+    def build(cls, df):
+        return cls(_aggregate(df), len(df), df.attrs.get("dataset_parts", ()))
+
+    def append(self, new_rows, parts=()):
+        """A new store covering this one's transactions plus ``new_rows``."""
+        stored = self.features[list(STORE_COLUMNS)]
+        combined = pd.concat([stored, _aggregate(new_rows)])
+        how = {col: _COMBINE.get(col, "sum") for col in STORE_COLUMNS}
+        aggregates = combined.groupby(level=0, sort=True).agg(how).astype(STORE_COLUMNS)
+        return CustomerStore(aggregates, self.rows + len(new_rows), parts)
+
+    def lookup(self, customerno):
+        """One customer's features (a hash lookup on the index), or None."""
+        try:
+            return self.features.loc[customerno]
+        except KeyError:
+            return None
+
+    def top(self, n, metric, ascending=False):
+        """The ``n`` customers with the highest (or lowest) ``metric``; missing values never rank."""
+        values = self.features[metric].dropna()
+        picked = values.nsmallest(n) if ascending else values.nlargest(n)
+        return self.features.loc[picked.index]
+
+    def __len__(self):
+        return len(self.features)
+
+
+@st.cache_resource
+def _store_registry():
+    # (dataset version, filter) -> CustomerStore, most recently used last; shared by every session
+    return {"stores": OrderedDict(), "lock": threading.Lock()}
+
+
+def _is_prefix(parts, of):
+    return 0 < len(parts) <= len(of) and list(map(tuple, parts)) == list(map(tuple, of[:len(parts)]))
+
+
+def customer_store(df, row_filter="all"):
+    """The CustomerStore for ``df`` filtered by ``row_filter``, built once per dataset version.
+
+    ``df`` must be the full frame of its dataset version; filter with
+    ``row_filter``, not beforehand. When ``df`` is a directory of drops whose
+    leading parts match a stored version's (``attrs["dataset_parts"]``), only
+    the new drops are aggregated.
+    """
+    key = (dataset_version(df), row_filter)
+    rows = _rows(df, row_filter)
+    registry = _store_registry()
+    with registry["lock"]:
+        stores = registry["stores"]
+        if key in stores:
+            stores.move_to_end(key)
+            store = stores[key]
+            if store.rows != len(rows):
+                raise ValueError(f"customer_store got {len(rows):,} rows for a version stored with {store.rows:,}; "
+                                 "pass the full frame and a row_filter")
+            return store
+        parts = df.attrs.get("dataset_parts", ())
+        # Filters are row-wise, so the filtered old drops are a prefix of the filtered new frame
+        base = next((store for (_, base_filter), store in reversed(stores.items())
+                     if base_filter == row_filter and store.parts and _is_prefix(store.parts, parts)), None)
+        if base is not None and base.rows <= len(rows):
+            store = base.append(rows.iloc[base.rows:], parts)
+        else:
+            store = CustomerStore.build(rows)
+        stores[key] = store
+        while len(stores) > STORE_VERSIONS:
+            stores.popitem(last=False)
+        return store
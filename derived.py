@@ -0,0 +1,96 @@
+import numpy as np
+import pandas as pd
+
+# === Derived-Column Store ===
+# Columns the plots used to rebuild on every rerun (often with row-wise
+# ``apply`` or a merge) are computed here once, vectorized, right after
+# ``preprocess.clean``. They are cached together with the base frame in
+# ``main.load_data``. New columns are declared with ``@derived("name")``.
+
+DAY_ORDER = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday']
+
+DERIVED_COLUMNS = {}
+
+
+def derived(name):
+    def register(func):
+        DERIVED_COLUMNS[name] = func
+        return func
+    return register
+
+
+def _ratio_pct(numerator, denominator):
+    # Plain division, same as the old per-plot code: a zero bill value gives
+    # inf/NaN, which each plot filters the way it always has.
+    num = numerator.to_numpy(dtype="float64", na_value=np.nan)
+    den = denominator.to_numpy(dtype="float64", na_value=np.nan)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return num / den * 100
+
+
+@derived("discount_pct")
+def _discount_pct(df):
+    return _ratio_pct(df['discount'], df['value'])
+
+
+@derived("bill_discount_pct")
+def _bill_discount_pct(df):
+    # Rounded and zero for non-positive bills (multivariate Plot 3)
+    value = df['value'].to_numpy(dtype="float64", na_value=np.nan)
+    return np.where(value > 0, np.round(_ratio_pct(df['discount'], df['value']), 2), 0.0)
+
+
+@derived("idisc_pct")
+def _idisc_pct(df):
+    return _ratio_pct(df['idisc'], df['value'])
+
+
+@derived("obdisc_pct")
+def _obdisc_pct(df):
+    return _ratio_pct(df['obdisc'], df['value'])
+
+
+@derived("ghsdisc_pct")
+def _ghsdisc_pct(df):
+    return _ratio_pct(df['ghsdisc'], df['value'])
+
+
+@derived("day")
+def _day(df):
+    return df['docdate'].dt.day
+
+
+@derived("day_of_week")
+def _day_of_week(df):
+    # dt.dayofweek is 0=Monday; mapping codes avoids building a string per row
+    codes = df['docdate'].dt.dayofweek.to_numpy(dtype="float64", na_value=np.nan)
+    codes = np.where(np.isnan(codes), -1, codes).astype("int8")
+    return pd.Categorical.from_codes(codes, categories=DAY_ORDER, ordered=True)
+
+
+@derived("returned")
+def _returned(df):
+    return (df['qty'] < 0) | (df['value'] < 0)
+
+
+@derived("got_discount")
+def _got_discount(df):
+    return df['discount'] > 0
+
+
+@derived("buyer_type")
+def _buyer_type(df):
+    # Transactions per customer via factorize + bincount instead of a merge
+    codes, _ = pd.factorize(df['customerno'])
+    counts = np.bincount(codes[codes >= 0], minlength=1)
+    labels = np.where(codes < 0, -1, np.where(counts[codes] == 1, 0, 1)).astype("int8")
+    return pd.Categorical.from_codes(labels, categories=['One-Time Buyer', 'Multiple-Time Buyer'])
+
+
+def add_derived(df, names=None):
+    """Return ``df`` with the registered derived columns appended."""
+    df = df.copy()
+    for name, func in DERIVED_COLUMNS.items():
+        if names is None or name in names:
+            df[name] = func(df)
+    return df
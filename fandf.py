@@ -1,11 +1,24 @@
 import streamlit as st
 import pandas as pd
+from derived import DERIVED_COLUMNS
+import approx
+import customers
+import quality
+
+def _numeric_summary_rows(df, row_filter, numeric_cols):
+    # The rows the Numeric Summary describes: the page filter, then no negative measures
+    rows = df[numeric_cols].ge(0, axis=1).all(axis=1)
+    mask = customers.FILTERS[row_filter]
+    return rows if mask is None else rows & mask(df)
 
 def show_facts_and_figures(df):
     st.set_page_config(page_title="Jewellery Data Explorer", layout="centered")
 
     st.markdown("### <b> Interactive Facts and Figures of the Dataset</b>", unsafe_allow_html=True)
 
+    # Facts describe the source data, not the precomputed derived columns
+    df = df.drop(columns=list(DERIVED_COLUMNS), errors='ignore')
+
     # Optional Exclude Negative Transactions
     exclude_negatives = st.checkbox(" Exclude returned (negative) transactions", value=False)
     filtered_df = df.copy()
@@ -13,6 +26,18 @@ def show_facts_and_figures(df):
         filtered_df = filtered_df[(filtered_df['qty'] > 0) & (filtered_df['value'] > 0) & (filtered_df['wt'] > 0) & (filtered_df['discount'] >= 0)]
 
     raw_df = filtered_df.copy()
+    row_filter = "positive" if exclude_negatives else "all"
+    numeric_cols = ['qty', 'value', 'wt', 'discount', 'idisc', 'obdisc', 'ghsdisc', 'mc', 'goldprice', 'stonevalue']
+
+    # Approximate mode: sketches replace the exact scans of the large numeric columns
+    approximate = st.toggle(" Approximate statistics (for very large datasets)", key=approx.SWITCH_KEY,
+                            value=approx.use_approx(df))
+    # (the discount components stay exact: the Categorical Summary counts them)
+    sketched_cols = [col for col in ['customerno', 'qty', 'value', 'wt', 'discount', 'mc', 'goldprice', 'stonevalue']
+                     if approximate and col in df.columns and pd.api.types.is_numeric_dtype(df[col])]
+    # Distinct counts of these come from HyperLogLog sketches, so they are not profiled either
+    hll_cols = [col for col in ['customerno', 'loccode', 'totcategory'] if approximate and col in df.columns]
+    unprofiled_cols = list(dict.fromkeys(sketched_cols + hll_cols))
 
     # === Dataset Overview ===
     st.markdown("### <b> Dataset Overview</b>", unsafe_allow_html=True)
@@ -28,22 +53,14 @@ def show_facts_and_figures(df):
             
             if customer_cols and 'docdate' in raw_df.columns:
                 cust_col = customer_cols[0]
-                raw_df['docdate'] = pd.to_datetime(raw_df['docdate'], errors='coerce')
-                raw_df = raw_df.sort_values('docdate')
-
-                # Get first purchase date
-                first_purchase = raw_df.groupby(cust_col)['docdate'].min().reset_index()
-                first_purchase.columns = [cust_col, 'first_purchase']
-                raw_df = raw_df.merge(first_purchase, on=cust_col)
-
-                # Tag new/repeat
-                raw_df['Customer Type'] = raw_df.apply(
-                    lambda row: 'New' if row['docdate'] == row['first_purchase'] else 'Repeat',
-                    axis=1
+
+                # Tag new/repeat (first-purchase dates are computed once per dataset)
+                type_counts = customers.customer_type_counts(
+                    df, cust_col, "positive" if exclude_negatives else "all"
                 )
 
-                new_txns = (raw_df['Customer Type'] == 'New').sum()
-                repeat_txns = (raw_df['Customer Type'] == 'Repeat').sum()
+                new_txns = type_counts['New']
+                repeat_txns = type_counts['Repeat']
                 total_txns = new_txns + repeat_txns
 
                 new_pct = round((new_txns / total_txns) * 100, 2)
@@ -63,26 +80,46 @@ def show_facts_and_figures(df):
     # === High-Level Facts ===
     st.markdown("### <b> High-Level Facts</b>", unsafe_allow_html=True)
 
-    def cleaned_unique_count(df, column):
-        return df[~df[column].astype(str).str.upper().isin(["NULL", "NA", "NIL", "","[NULL]"])][column].nunique()
+    # Per-column counts come from one profiling pass over the filtered rows
+    prof = quality.profile(df, row_filter, columns=df.columns.drop(unprofiled_cols))
+
+    def cleaned_unique_count(column):
+        return prof.at[column, 'distinct']
+
+    def non_null(column):
+        return prof.at[column, 'rows'] - prof.at[column, 'missing']
+
+    if approximate:
+        sketches = approx.sketches(df, f"facts-{row_filter}", distinct=hll_cols,
+                                   quantiles=['discount'], mask=customers.FILTERS[row_filter])
+        max_discount = sketches['discount'].max
+    else:
+        sketches = {}
+        max_discount = prof.at['discount', 'max']
+
+    # HyperLogLog estimates (with their error bound) in approximate mode
+    def distinct_count(column):
+        if column in sketches:
+            return approx.format_estimate(sketches[column])
+        return cleaned_unique_count(column)
 
     facts = {
-        "Unique Brands": raw_df['brand'].nunique(),
-        "Regions Covered": cleaned_unique_count(raw_df, 'region'),
-        "Retail Levels": raw_df['level'].nunique(),
-        "Years Available": raw_df['year'].nunique(),
-        "YearMonth Patterns": raw_df['yearmonth'].nunique(),
-        "Months in Data": raw_df['month'].nunique(),
-        "Date Range": f"{pd.to_datetime(raw_df['docdate']).min().date()} to {pd.to_datetime(raw_df['docdate']).max().date()}",
-        "Unique Locations": raw_df['loccode'].nunique(),
-        "Retail Clusters": cleaned_unique_count(raw_df, 'rcluster'),
-        "Bill Discount Types": raw_df['bdisc'].nunique() + (1 if (raw_df['discount'] > 0).any() else 0),
-        "Categories": cleaned_unique_count(raw_df, 'totcategory'),
-        "EC Bands (Total)": cleaned_unique_count(raw_df, 'totalecband'),
-        "Cluster EC Bands": cleaned_unique_count(raw_df, 'clusterecband'),
-        "Price Bands": cleaned_unique_count(raw_df, 'priceband'),
-        "AMCB Bands": raw_df['amcb'].nunique(),
-        "Unique Customers": cleaned_unique_count(raw_df, 'customerno')
+        "Unique Brands": cleaned_unique_count('brand'),
+        "Regions Covered": cleaned_unique_count('region'),
+        "Retail Levels": cleaned_unique_count('level'),
+        "Years Available": cleaned_unique_count('year'),
+        "YearMonth Patterns": cleaned_unique_count('yearmonth'),
+        "Months in Data": cleaned_unique_count('month'),
+        "Date Range": f"{prof.at['docdate', 'min'].date()} to {prof.at['docdate', 'max'].date()}",
+        "Unique Locations": distinct_count('loccode'),
+        "Retail Clusters": cleaned_unique_count('rcluster'),
+        "Bill Discount Types": cleaned_unique_count('bdisc') + (1 if max_discount > 0 else 0),
+        "Categories": distinct_count('totcategory'),
+        "EC Bands (Total)": cleaned_unique_count('totalecband'),
+        "Cluster EC Bands": cleaned_unique_count('clusterecband'),
+        "Price Bands": cleaned_unique_count('priceband'),
+        "AMCB Bands": cleaned_unique_count('amcb'),
+        "Unique Customers": distinct_count('customerno')
     }
 
     for key, value in facts.items():
@@ -113,89 +150,56 @@ def show_facts_and_figures(df):
         st.markdown(f"-**Month with Highest Transactions:** {busiest_month}")
 
         # Top regions by total sales value
-        top_regions = df.groupby('region')['value'].sum().sort_values(ascending=False).head(3)
+        top_regions = df.groupby('region', observed=True)['value'].sum().sort_values(ascending=False).head(3)
         st.markdown("-**Top Regions by Total Sales Value:**")
         for region, val in top_regions.items():
             st.markdown(f"  - {region}: ₹{val:,.0f}")
 
     except Exception as e:
         st.warning(f"Could not generate customer insights: {e}")
-        # Missing values in categorical columns (including amcb with NaN and placeholder strings)
-    missing_like = ["NULL", "NA", "NIL", "", "[NULL]"]
-
+        # Missing values in categorical columns (placeholder strings are already NA)
     st.markdown("-**Missing Values in Categorical Columns:**")
 
     found_missing = False
 
     # Check object (categorical) columns
-    for col in df.select_dtypes(include='object').columns:
-        col_upper = df[col].astype(str).str.upper()
-        missing_count = col_upper.isin(missing_like).sum()
+    all_rows = quality.profile(df, columns=df.columns.drop(unprofiled_cols))
+    for col in df.select_dtypes(include=['object', 'category']).columns:
+        missing_count = all_rows.at[col, 'missing'] if col in all_rows.index else int(df[col].isna().sum())
         if missing_count > 0:
             st.markdown(f"  - {col}: {missing_count:,} missing")
             found_missing = True
 
-    # Check 'amcb' column
-    if 'amcb' in df.columns:
-        amcb_str_missing = df['amcb'].astype(str).str.upper().isin(missing_like).sum()
-        amcb_nan_missing = df['amcb'].isnull().sum()
-        total_amcb_missing = amcb_str_missing + amcb_nan_missing
-        if total_amcb_missing > 0:
-            st.markdown(f"  - amcb: {total_amcb_missing:,} missing")
-            found_missing = True
-
     if not found_missing:
         st.markdown("   No missing values found")
 
     # === Summary Statistics ===
     st.markdown("### <b>Summary Statistics</b>", unsafe_allow_html=True)
     if not filtered_df.empty:
-        numeric_cols = ['qty', 'value', 'wt', 'discount', 'idisc', 'obdisc', 'ghsdisc', 'mc', 'goldprice', 'stonevalue']
         filtered_df = filtered_df[filtered_df[numeric_cols].ge(0, axis=1).all(axis=1)]
-        num_summary = filtered_df[numeric_cols].describe().T[['min', 'mean', 'max', 'std', '25%', '50%', '75%']]
+        if approximate:
+            num_summary = approx.describe(approx.sketches(
+                df, f"facts-numeric-{row_filter}", quantiles=numeric_cols,
+                mask=lambda frame: _numeric_summary_rows(frame, row_filter, numeric_cols),
+            ))[['min', 'mean', 'max', 'std', '25%', '50%', '75%', 'percentile rank error']]
+        else:
+            num_summary = filtered_df[numeric_cols].describe().T[['min', 'mean', 'max', 'std', '25%', '50%', '75%']]
 
         st.markdown("#### <b>Numeric Summary</b>", unsafe_allow_html=True)
         st.dataframe(num_summary, use_container_width=True)
 
 # === Categorical Summary — match High-Level Facts ===
-    placeholder_values = ["NULL", "NA", "[NA]", "NIL", "", "[NULL]"]
-    cleaned_obj_df = raw_df.copy()
-
-    # Replace placeholders with NaN for consistency
-    for col in cleaned_obj_df.select_dtypes(include='object').columns:
-        cleaned_obj_df[col] = cleaned_obj_df[col].astype(str).replace(placeholder_values, pd.NA)
-
-    display_df = cleaned_obj_df
+    display_df = raw_df
 
     # Get object (categorical) columns
-    categorical_cols = display_df.select_dtypes(include='object').columns
-
-    # Prepare summary dictionary
-    summary_data = {'unique': [], 'top': [], 'freq': []}
-
-    for col in categorical_cols:
-        col_data = display_df[col]
-        # Convert everything to actual NaNs first
-        col_data = col_data.replace(placeholder_values + ['nan', 'NaN', 'None'], pd.NA)
-
-        # Drop NaNs before computing
-        non_null_data = col_data.dropna()
-
-        summary_data['unique'].append(non_null_data.nunique())
-
-        if not non_null_data.empty:
-            top_value = non_null_data.mode().iloc[0]
-            freq = (non_null_data == top_value).sum()
-        else:
-            top_value = 'N/A'
-            freq = 0
-
-        summary_data['top'].append(top_value)
-        summary_data['freq'].append(freq)
-
+    categorical_cols = display_df.select_dtypes(include=['object', 'category']).columns
 
-    # Create summary DataFrame
-    obj_summary = pd.DataFrame(summary_data, index=categorical_cols)
+    # Unique/top/freq ignore NA and placeholders, as in the profile
+    obj_summary = prof.reindex(categorical_cols)[['distinct', 'top', 'freq']].rename(columns={'distinct': 'unique'})
+    # Sketched columns show the HyperLogLog estimate and no top value
+    for col in categorical_cols.intersection(hll_cols):
+        obj_summary.at[col, 'unique'] = sketches[col].estimate()
+    obj_summary = obj_summary.astype({'unique': 'int64', 'freq': 'Int64'})
 
     # Remove 'discount' and 'customertype' rows if present
    # Remove unwanted rows
@@ -204,7 +208,7 @@ def show_facts_and_figures(df):
             obj_summary = obj_summary.drop(index=unwanted_row)
 
     # Remove 'amcb' row if it's all NA
-    if 'amcb' in display_df.columns and display_df['amcb'].dropna().empty:
+    if 'amcb' in display_df.columns and prof.at['amcb', 'distinct'] == 0:
         obj_summary = obj_summary.drop(index='amcb', errors='ignore')
 
     # Add new combined 'discount' summary row (across discount types)
@@ -212,15 +216,15 @@ def show_facts_and_figures(df):
     discount_summary = {
     'unique': 3,
     'top': 'idisc',
-    'freq': display_df['idisc'].notna().sum() if 'idisc' in display_df.columns else 0
+    'freq': non_null('idisc') if 'idisc' in display_df.columns else 0
 }
     discount_cols = ['bdisc', 'idisc', 'ghsdisc', 'obdisc']
     available_discounts = [col for col in discount_cols if col in display_df.columns]
 
     if available_discounts:
-        total_unique = sum(display_df[col].nunique(dropna=True) for col in available_discounts)
+        total_unique = sum(cleaned_unique_count(col) for col in available_discounts)
         top_combined = ', '.join(available_discounts)
-        total_freq = sum(display_df[col].notna().sum() for col in available_discounts)
+        total_freq = sum(non_null(col) for col in available_discounts)
         obj_summary.loc['discount'] = {'unique': total_unique, 'top': top_combined, 'freq': total_freq}
         obj_summary.loc['discount'] = discount_summary
 
@@ -234,9 +238,7 @@ def show_facts_and_figures(df):
     time_col = st.selectbox("Select Time Column", options=['docdate'])
     metric_col = st.selectbox("Select Metric to Visualize", options=numeric_cols)
     if time_col and metric_col:
-        trend_df = filtered_df.copy()
-        trend_df[time_col] = pd.to_datetime(trend_df[time_col], errors='coerce')
-        trend_df = trend_df.dropna(subset=[time_col])
+        trend_df = filtered_df.dropna(subset=[time_col])
         trend_data = trend_df.groupby(time_col)[metric_col].sum().reset_index()
         trend_data = trend_data.sort_values(by=time_col)
         st.line_chart(trend_data.set_index(time_col))
@@ -0,0 +1,149 @@
+import hashlib
+import io
+import os
+import threading
+from collections import OrderedDict
+from pathlib import Path
+
+import pandas as pd
+import streamlit as st
+
+from data_sources import dataset_version
+
+# === Rendered-Figure Cache ===
+# Stores the PNG bytes of each rendered figure, keyed by (dataset
+# fingerprint, module, plot key, filter selections, theme). A rerun that
+# only toggles a button serves the stored image instead of rebuilding the
+# seaborn/matplotlib figure. Memory is LRU-bounded; setting
+# DASHBOARD_FIGURE_CACHE_DIR adds a disk tier that survives restarts.
+
+MAX_BYTES = int(os.environ.get("DASHBOARD_FIGURE_CACHE_MB", "64")) * 1024 * 1024
+DISK_DIR = os.environ.get("DASHBOARD_FIGURE_CACHE_DIR")
+
+# Same output st.pyplot produces
+SAVEFIG_OPTIONS = {"format": "png", "dpi": 200, "bbox_inches": "tight"}
+
+
+class FigureCache:
+    """LRU map of key -> rendered image bytes, with an optional disk tier."""
+
+    def __init__(self, max_bytes=MAX_BYTES, disk_dir=DISK_DIR):
+        self.max_bytes = max_bytes
+        self.disk_dir = Path(disk_dir) if disk_dir else None
+        self._images = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.bytes_held = 0
+
+    def _disk_path(self, key):
+        return self.disk_dir / f"{key}.{SAVEFIG_OPTIONS['format']}"
+
+    def get(self, key):
+        with self._lock:
+            data = self._images.get(key)
+            if data is not None:
+                self._images.move_to_end(key)
+                self.hits += 1
+                return data
+        if self.disk_dir is not None:
+            try:
+                data = self._disk_path(key).read_bytes()
+            except OSError:
+                data = None
+            if data is not None:
+                with self._lock:
+                    self.disk_hits += 1
+                self._remember(key, data)
+                return data
+        with self._lock:
+            self.misses += 1
+        return None
+
+    def put(self, key, data):
+        self._remember(key, data)
+        if self.disk_dir is not None:
+            self.disk_dir.mkdir(parents=True, exist_ok=True)
+            tmp = self._disk_path(key).with_suffix(".tmp")
+            tmp.write_bytes(data)
+            os.replace(tmp, self._disk_path(key))
+
+    def _remember(self, key, data):
+        with self._lock:
+            if key in self._images:
+                self.bytes_held -= len(self._images.pop(key))
+            if len(data) > self.max_bytes:
+                return
+            self._images[key] = data
+            self.bytes_held += len(data)
+            while self.bytes_held > self.max_bytes:
+                _, evicted = self._images.popitem(last=False)
+                self.bytes_held -= len(evicted)
+
+    def clear(self):
+        with self._lock:
+            self._images.clear()
+            self.bytes_held = 0
+
+    def stats(self):
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "entries": len(self._images),
+                "bytes_held": self.bytes_held,
+                "max_bytes": self.max_bytes,
+            }
+
+
+@st.cache_resource
+def get_cache():
+    # One cache per server process, shared by every session
+    return FigureCache()
+
+
+def fingerprint(df):
+    """The dataset version, or a content hash for frames without one."""
+    version = dataset_version(df)
+    if version != "unversioned":
+        return version
+    return hashlib.sha256(pd.util.hash_pandas_object(df, index=True).to_numpy().tobytes()).hexdigest()
+
+
+def _theme():
+    # The Streamlit base theme plus the matplotlib/seaborn style in effect.
+    # pyplot() undoes any style a draw() sets, so this is the same before
+    # and after a plot's first render.
+    import matplotlib.pyplot as plt
+    return (st.get_option("theme.base"), repr(sorted(plt.rcParams.items())))
+
+
+def figure_key(df, module, plot_key, params=()):
+    parts = (fingerprint(df), module, plot_key, repr(params), _theme())
+    return hashlib.sha256(repr(parts).encode()).hexdigest()
+
+
+def pyplot(draw, df, module, plot_key, params=()):
+    """Show the figure ``draw()`` returns, serving cached bytes when the inputs are unchanged."""
+    cache = get_cache()
+    key = figure_key(df, module, plot_key, params)
+    data = cache.get(key)
+    if data is None:
+        import matplotlib.pyplot as plt
+
+        # draw() may call sns.set_theme; keep that from leaking into later keys
+        with plt.rc_context():
+            fig = draw()
+            buffer = io.BytesIO()
+            fig.savefig(buffer, **SAVEFIG_OPTIONS)
+            plt.close(fig)
+        data = buffer.getvalue()
+        cache.put(key, data)
+    st.image(data)
+
+
+def stats():
+    """Hit/miss counters and bytes held by the figure cache."""
+    return get_cache().stats()
@@ -0,0 +1,55 @@
+import os
+
+import streamlit as st
+
+from data_sources import dataset_version
+
+# === Top-k Values per Group ===
+# The most frequent values of a column within each group (a customer's
+# favourite brand, say) from one grouped count and one stable sort, in
+# place of a Python-level Series.mode() per group. Ties go to the value
+# that sorts first, as Series.mode() would pick. Results for a named row
+# selection are memoized per dataset version, keeping the last
+# DASHBOARD_GROUPTOP_RESULTS of them.
+
+RESULT_CACHE = int(os.environ.get("DASHBOARD_GROUPTOP_RESULTS", "64"))
+
+
+def top_k_per_group(df, group_col, value_col, k=1):
+    """The ``k`` most frequent ``value_col`` values per ``group_col``: group, rank (1 = top), value, count.
+
+    Missing values are not counted; a group with none has no rows.
+    """
+    counts = df.groupby([group_col, value_col], observed=True, sort=True).size()
+    counts = counts[counts > 0].rename("count").reset_index()
+    # Stable sort keeps values in ascending order inside each count tie
+    counts = counts.sort_values([group_col, "count"], ascending=[True, False], kind="stable")
+    rank = counts.groupby(group_col, observed=True, sort=False).cumcount() + 1
+    counts.insert(1, "rank", rank)
+    return counts[rank <= k].reset_index(drop=True)
+
+
+def group_mode(df, group_col, value_col):
+    """``value_col``'s mode per ``group_col``, indexed by group."""
+    top = top_k_per_group(df, group_col, value_col, k=1)
+    return top.set_index(group_col)[value_col]
+
+
+@st.cache_data(show_spinner=False, max_entries=RESULT_CACHE)
+def _cached_top_k(_df, dataset_version, selection, group_col, value_col, k):
+    return top_k_per_group(_df, group_col, value_col, k)
+
+
+def cached_top_k(df, selection, group_col, value_col, k=1):
+    """``top_k_per_group`` memoized per (dataset version, ``selection``).
+
+    ``selection`` is a hashable description of the rows ``df`` holds (the
+    filters and widget choices that produced it); the same selection must
+    always mean the same rows.
+    """
+    return _cached_top_k(df, dataset_version(df), selection, group_col, value_col, k)
+
+
+def cached_group_mode(df, selection, group_col, value_col):
+    """``group_mode`` memoized like ``cached_top_k``."""
+    return cached_top_k(df, selection, group_col, value_col).set_index(group_col)[value_col]
@@ -0,0 +1,105 @@
+import hashlib
+import os
+import tempfile
+from pathlib import Path
+
+import pandas as pd
+
+# === Streaming Ingest ===
+# The original path held the whole HTTP body in memory, let openpyxl build the
+# full workbook object graph on top of it, then copied everything into pandas.
+# Here the body goes straight to disk and rows are read with openpyxl's
+# read-only iterator in fixed-size batches, so peak memory stays near the size
+# of the final frame.
+
+CHUNK_SIZE = 1 << 20    # 1 MiB per network read
+BATCH_ROWS = 10_000     # rows per typed batch
+
+# Strings ``pd.read_excel`` turns into NaN by default; kept identical so both
+# paths produce the same frame.
+NA_STRINGS = frozenset([
+    "", "#N/A", "#N/A N/A", "#NA", "-1.#IND", "-1.#QNAN", "-NaN", "-nan",
+    "1.#IND", "1.#QNAN", "<NA>", "N/A", "NA", "NULL", "NaN", "None", "n/a",
+    "nan", "null",
+])
+
+
+def file_hash(path, chunk_size=CHUNK_SIZE):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def download_to_file(url, dest_dir=None, suffix=".xlsx", chunk_size=CHUNK_SIZE):
+    """Stream ``url`` to a temporary file and return its path.
+
+    The caller owns the file and must delete it.
+    """
+    import requests
+
+    if dest_dir is not None:
+        Path(dest_dir).mkdir(parents=True, exist_ok=True)
+    fd, path = tempfile.mkstemp(suffix=suffix, dir=dest_dir)
+    try:
+        with requests.get(url, stream=True) as response, os.fdopen(fd, "wb") as f:
+            response.raise_for_status()
+            for chunk in response.iter_content(chunk_size=chunk_size):
+                f.write(chunk)
+    except BaseException:
+        os.unlink(path)
+        raise
+    return Path(path)
+
+
+def _batch_columns(header, rows):
+    # Transpose a batch of row tuples into one typed Series per column.
+    columns = zip(*rows) if rows else [()] * len(header)
+    return {
+        name: pd.Series(
+            [None if v.__class__ is str and v in NA_STRINGS else v for v in values],
+            dtype=object,
+        ).infer_objects()
+        for name, values in zip(header, columns)
+    }
+
+
+def read_xlsx_batched(path, batch_rows=BATCH_ROWS):
+    """Read the first sheet of ``path`` into a DataFrame with bounded memory."""
+    from openpyxl import load_workbook
+
+    wb = load_workbook(path, read_only=True, data_only=True)
+    try:
+        rows = wb.worksheets[0].iter_rows(values_only=True)
+        header = next(rows, None)
+        if header is None:
+            return pd.DataFrame()
+        header = [str(h) if h is not None else f"Unnamed: {i}" for i, h in enumerate(header)]
+
+        chunks = {name: [] for name in header}
+        batch = []
+        for row in rows:
+            if not any(cell is not None for cell in row):
+                continue  # pandas skips fully blank rows too
+            batch.append(row[:len(header)] + (None,) * (len(header) - len(row)))
+            if len(batch) == batch_rows:
+                for name, series in _batch_columns(header, batch).items():
+                    chunks[name].append(series)
+                batch = []
+        if batch:
+            for name, series in _batch_columns(header, batch).items():
+                chunks[name].append(series)
+    finally:
+        wb.close()
+
+    # Concatenate one column at a time and drop its batches immediately, so
+    # at most one column exists twice in memory.
+    data = {}
+    for name in header:
+        parts = chunks.pop(name)
+        data[name] = pd.concat(parts, ignore_index=True) if parts else pd.Series(dtype=object)
+        if data[name].dtype == object:
+            data[name] = data[name].infer_objects()
+        del parts
+    return pd.DataFrame(data, copy=False)
@@ -0,0 +1,310 @@
+import argparse
+import hashlib
+import json
+import math
+import os
+import random
+import re
+import threading
+import time
+from pathlib import Path
+
+import llm_cache
+
+# === LLM Backends ===
+# Every backend exposes a stable ``key`` and
+# ``complete(prompt, model, temperature, max_tokens, on_token=None)``, which
+# returns the reply text and, when ``on_token`` is given, passes each text
+# delta to it as it arrives. ai_agent picks one with backend_from_spec():
+#   groq       the Groq API (default)
+#   synthetic  canned replies with configurable latency, no network
+#   replay     stored replies looked up by prompt hash
+#   record     Groq, saving every reply for later replay
+# so the dashboard can be load-tested and regression-tested offline.
+
+RECORDINGS_PATH = Path(os.environ.get("DASHBOARD_LLM_RECORDINGS", ".llm_cache/recordings.jsonl"))
+
+
+class BackendError(Exception):
+    """A failed request; ``status_code`` lets ai_broker decide whether to retry."""
+
+    def __init__(self, message, status_code=None):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+def _words(text):
+    return re.findall(r"\S+\s*|\s+", text)
+
+
+class GroqBackend:
+    def __init__(self, api_key, base_url=None):
+        # GROQ_BASE_URL points it at another endpoint (e.g. benchmarks/fake_llm_server.py)
+        from groq import Groq
+
+        # Retries are done by ai_broker, with backoff shared across sessions
+        self.client = Groq(api_key=api_key, base_url=base_url, max_retries=0)
+        self.key = f"groq:{self.client.base_url}"
+
+    def _request(self, prompt, model, temperature, max_tokens, **kwargs):
+        return self.client.chat.completions.create(
+            messages=[{"role": "user", "content": prompt}],
+            model=model,
+            temperature=temperature,
+            max_tokens=max_tokens,
+            **kwargs,
+        )
+
+    def _stream(self, prompt, model, temperature, max_tokens, on_token):
+        parts = []
+        # Closing the stream drops the connection when on_token gives up (ai_broker.Cancelled)
+        with self._request(prompt, model, temperature, max_tokens, stream=True) as stream:
+            for chunk in stream:
+                delta = chunk.choices[0].delta.content if chunk.choices else None
+                if delta:
+                    parts.append(delta)
+                    on_token(delta)
+        return "".join(parts).strip()
+
+    def complete(self, prompt, model, temperature, max_tokens, on_token=None):
+        import ai_broker
+
+        if on_token is not None:
+            try:
+                return self._stream(prompt, model, temperature, max_tokens, on_token)
+            except ai_broker.Cancelled:
+                raise
+            except Exception as e:
+                if ai_broker.status_code(e) is not None:
+                    raise
+                # Streaming unavailable (or the connection dropped): ask again without it
+        response = self._request(prompt, model, temperature, max_tokens)
+        return response.choices[0].message.content.strip()
+
+
+# === Synthetic ===
+
+def parse_latency(spec):
+    """A sampler from "fixed:S", "uniform:LO,HI", "normal:MEAN,SD" or "lognormal:MEDIAN,SIGMA" (seconds)."""
+    kind, _, args = spec.partition(":")
+    values = [float(v) for v in args.split(",") if v.strip()]
+    samplers = {
+        "fixed": lambda rng, s: s,
+        "uniform": lambda rng, lo, hi: rng.uniform(lo, hi),
+        "normal": lambda rng, mean, sd: max(0.0, rng.gauss(mean, sd)),
+        "lognormal": lambda rng, median, sigma: rng.lognormvariate(math.log(median), sigma),
+    }
+    if kind not in samplers:
+        raise ValueError(f"Unknown latency distribution {kind!r}; use one of {', '.join(samplers)}")
+    sampler = samplers[kind]
+    return lambda rng: sampler(rng, *values)
+
+
+SYNTHETIC_PLAN = (
+    "Action: Review discount approvals for segment {tag} and cap the top band.\n"
+    "Reason: Synthetic reply {tag}; discounts there run above the dashboard average.\n"
+    "Urgency: {urgency}"
+)
+SYNTHETIC_ANSWER = (
+    "Synthetic answer {tag}.\n"
+    "• Discount spend is concentrated in a few segments.\n"
+    "• Compare the segment's share of sales with its share of discount.\n"
+    "• Revisit approvals where the gap is largest."
+)
+
+
+class SyntheticBackend:
+    """Canned, prompt-dependent replies after a sampled latency; no network.
+
+    Timings are drawn from ``latency`` (time to the first token) and
+    ``token_interval`` (per streamed word). The random stream depends only on
+    ``seed`` and the prompt, so a run is reproducible whatever the thread
+    order. ``error_rate`` fails that share of calls with 429/503.
+    """
+
+    def __init__(self, latency="lognormal:0.8,0.35", token_interval=0.02, error_rate=0.0, seed=0,
+                 sleep=time.sleep):
+        self.latency_spec = latency
+        self.sample_latency = parse_latency(latency)
+        self.token_interval = token_interval
+        self.error_rate = error_rate
+        self.seed = seed
+        self._sleep = sleep
+        self._lock = threading.Lock()
+        self._attempts = {}
+        self.key = f"synthetic:{latency}:{token_interval}:{error_rate}:{seed}"
+
+    def reply(self, prompt):
+        digest = hashlib.sha256(llm_cache.normalise(prompt).encode()).hexdigest()
+        tag = digest[:6]
+        if "Action:" in prompt and "Urgency:" in prompt:
+            return SYNTHETIC_PLAN.format(tag=tag, urgency=["Low", "Medium", "High"][int(digest[6], 16) % 3])
+        return SYNTHETIC_ANSWER.format(tag=tag)
+
+    def complete(self, prompt, model, temperature, max_tokens, on_token=None):
+        key = llm_cache.prompt_key(model, temperature, max_tokens, prompt)
+        with self._lock:
+            attempt = self._attempts[key] = self._attempts.get(key, 0) + 1
+        rng = random.Random(f"{self.seed}:{key}:{attempt}")
+        self._sleep(self.sample_latency(rng))
+        if rng.random() < self.error_rate:
+            status = rng.choice([429, 503])
+            raise BackendError(f"Synthetic {status}", status_code=status)
+
+        text = self.reply(prompt)
+        if on_token is None:
+            self._sleep(self.token_interval * len(_words(text)))
+            return text
+        for i, word in enumerate(_words(text)):
+            if i:
+                self._sleep(self.token_interval)
+            on_token(word)
+        return text
+
+
+# === Record / Replay ===
+
+class ReplayMiss(BackendError):
+    """No recording for this prompt."""
+
+
+def load_recordings(path):
+    recordings = {}
+    if Path(path).exists():
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                if line.strip():
+                    entry = json.loads(line)
+                    recordings[entry["key"]] = entry
+    return recordings
+
+
+class ReplayBackend:
+    """Serves recorded replies by prompt hash (see RecordingBackend).
+
+    With ``replay_timing`` the recorded time to first token and total
+    latency are reproduced; prompts that were never recorded go to
+    ``fallback`` or raise ReplayMiss.
+    """
+
+    def __init__(self, path=RECORDINGS_PATH, replay_timing=True, fallback=None, sleep=time.sleep):
+        self.path = Path(path)
+        self.recordings = load_recordings(self.path)
+        self.replay_timing = replay_timing
+        self.fallback = fallback
+        self._sleep = sleep
+        self.key = f"replay:{self.path.resolve()}"
+        self.misses = 0
+
+    def complete(self, prompt, model, temperature, max_tokens, on_token=None):
+        entry = self.recordings.get(llm_cache.prompt_key(model, temperature, max_tokens, prompt))
+        if entry is None:
+            self.misses += 1
+            if self.fallback is not None:
+                return self.fallback.complete(prompt, model, temperature, max_tokens, on_token=on_token)
+            raise ReplayMiss(f"No recorded reply for this prompt in {self.path}")
+
+        text = entry["response"]
+        latency = entry["latency_s"] if self.replay_timing else 0.0
+        first = min(entry.get("first_token_s") or latency, latency)
+        words = _words(text)
+        self._sleep(first)
+        if on_token is None:
+            self._sleep(latency - first)
+            return text
+        interval = (latency - first) / max(len(words) - 1, 1)
+        for i, word in enumerate(words):
+            if i:
+                self._sleep(interval)
+            on_token(word)
+        return text
+
+
+class RecordingBackend:
+    """Passes calls to ``inner`` and appends each reply, with its timings, to ``path``."""
+
+    def __init__(self, inner, path=RECORDINGS_PATH):
+        self.inner = inner
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self.key = f"record:{inner.key}"
+
+    def complete(self, prompt, model, temperature, max_tokens, on_token=None):
+        first_token = []
+        start = time.perf_counter()
+
+        def timed_token(delta):
+            if not first_token:
+                first_token.append(time.perf_counter() - start)
+            on_token(delta)
+
+        text = self.inner.complete(prompt, model, temperature, max_tokens,
+                                   on_token=timed_token if on_token is not None else None)
+        entry = {
+            "key": llm_cache.prompt_key(model, temperature, max_tokens, prompt),
+            "model": model,
+            "prompt": llm_cache.normalise(prompt),
+            "response": text,
+            "latency_s": round(time.perf_counter() - start, 4),
+            "first_token_s": round(first_token[0], 4) if first_token else None,
+            "recorded": time.time(),
+        }
+        with self._lock, open(self.path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+        return text
+
+
+# === Selection ===
+
+def synthetic_from_env():
+    return SyntheticBackend(
+        latency=os.environ.get("DASHBOARD_LLM_LATENCY", "lognormal:0.8,0.35"),
+        token_interval=float(os.environ.get("DASHBOARD_LLM_TOKEN_INTERVAL", "0.02")),
+        error_rate=float(os.environ.get("DASHBOARD_LLM_ERROR_RATE", "0")),
+        seed=int(os.environ.get("DASHBOARD_LLM_SEED", "0")),
+    )
+
+
+def backend_from_spec(spec, groq_api_key=None):
+    """Build a backend from "groq", "synthetic", "replay" or "record".
+
+    "replay" falls back to the synthetic backend for unrecorded prompts
+    when DASHBOARD_LLM_REPLAY_FALLBACK=synthetic.
+    """
+    spec = (spec or "groq").strip().lower()
+    if spec == "synthetic":
+        return synthetic_from_env()
+    if spec == "replay":
+        fallback = synthetic_from_env() if os.environ.get("DASHBOARD_LLM_REPLAY_FALLBACK") == "synthetic" else None
+        return ReplayBackend(fallback=fallback)
+    if spec not in ("groq", "record"):
+        raise ValueError(f"Unknown LLM backend {spec!r}; use groq, synthetic, replay or record")
+    groq = GroqBackend(groq_api_key, base_url=os.environ.get("GROQ_BASE_URL"))
+    return RecordingBackend(groq) if spec == "record" else groq
+
+
+# === CLI ===
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Inspect recorded LLM replies.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    sub.add_parser("stats", help="Show how many replies are recorded and their timings.")
+    sub.add_parser("clear", help="Delete the recordings file.")
+    args = parser.parse_args(argv)
+
+    if args.command == "stats":
+        recordings = load_recordings(RECORDINGS_PATH)
+        latencies = sorted(e["latency_s"] for e in recordings.values())
+        if not latencies:
+            print(f"No recordings in {RECORDINGS_PATH}")
+            return
+        median = latencies[len(latencies) // 2]
+        print(f"{len(recordings)} recorded replies in {RECORDINGS_PATH}, "
+              f"median latency {median:.2f} s, max {latencies[-1]:.2f} s")
+    elif args.command == "clear":
+        RECORDINGS_PATH.unlink(missing_ok=True)
+        print(f"Removed {RECORDINGS_PATH}")
+
+
+if __name__ == "__main__":
+    main()
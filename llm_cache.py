@@ -0,0 +1,202 @@
+import argparse
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from pathlib import Path
+
+# === LLM Response Cache ===
+# Groq replies shared across sessions and restarts. Entries are keyed by a
+# hash of (model, temperature, max_tokens, normalised prompt) and stored in
+# SQLite with a TTL and a total-size bound (least recently used go first).
+# Each entry also records the panel it belongs to and a hash of the
+# summary table it was built from. Lookups never invalidate: the prompt key
+# already covers the summary text, and a panel's summary legitimately
+# switches back and forth with widget selections, so replies for other
+# selections stay until TTL or LRU eviction removes them.
+
+CACHE_PATH = Path(os.environ.get("DASHBOARD_LLM_CACHE", ".llm_cache/responses.sqlite"))
+TTL_SECONDS = float(os.environ.get("DASHBOARD_LLM_CACHE_TTL", str(7 * 24 * 3600)))
+MAX_BYTES = int(os.environ.get("DASHBOARD_LLM_CACHE_MB", "20")) * 1024 * 1024
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS responses (
+    key TEXT PRIMARY KEY,
+    scope TEXT,
+    summary_hash TEXT,
+    response TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    latency_s REAL NOT NULL,
+    created REAL NOT NULL,
+    last_used REAL NOT NULL,
+    hits INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS responses_scope ON responses (scope);
+CREATE INDEX IF NOT EXISTS responses_last_used ON responses (last_used);
+"""
+
+
+def normalise(prompt):
+    # Indentation and line wrapping in the prompt templates do not change the answer
+    return " ".join(prompt.split())
+
+
+def prompt_key(model, temperature, max_tokens, prompt):
+    text = "\x1f".join([model, repr(float(temperature)), str(int(max_tokens)), normalise(prompt)])
+    return hashlib.sha256(text.encode()).hexdigest()
+
+
+def text_hash(text):
+    return hashlib.sha256(text.encode()).hexdigest()
+
+
+class ResponseCache:
+    """SQLite-backed prompt -> reply store with TTL and size-based eviction."""
+
+    def __init__(self, path=CACHE_PATH, ttl_seconds=TTL_SECONDS, max_bytes=MAX_BYTES):
+        self.path = Path(path)
+        self.ttl_seconds = ttl_seconds
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.saved_latency_s = 0.0
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with self._connect() as conn:
+            conn.executescript(SCHEMA)
+
+    def _connect(self):
+        # A short-lived connection per call keeps this safe across Streamlit's threads
+        conn = sqlite3.connect(self.path, timeout=10)
+        conn.execute("PRAGMA journal_mode=WAL")
+        return conn
+
+    def get(self, key):
+        now = time.time()
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT response, latency_s, created FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+            if row is not None and now - row[2] > self.ttl_seconds:
+                conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+                row = None
+            if row is not None:
+                conn.execute(
+                    "UPDATE responses SET last_used = ?, hits = hits + 1 WHERE key = ?", (now, key)
+                )
+        with self._lock:
+            if row is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self.saved_latency_s += row[1]
+        return row[0]
+
+    def contains(self, key):
+        """Whether ``key`` has a live entry; unlike get() this is not counted as a lookup."""
+        with self._connect() as conn:
+            row = conn.execute("SELECT created FROM responses WHERE key = ?", (key,)).fetchone()
+        return row is not None and time.time() - row[0] <= self.ttl_seconds
+
+    def put(self, key, response, latency_s, scope=None, summary_hash=None):
+        now = time.time()
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO responses "
+                "(key, scope, summary_hash, response, size, latency_s, created, last_used) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (key, scope, summary_hash, response, len(response.encode()), latency_s, now, now),
+            )
+            self._evict(conn, now)
+
+    def _evict(self, conn, now):
+        conn.execute("DELETE FROM responses WHERE created < ?", (now - self.ttl_seconds,))
+        total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        for key, size in conn.execute("SELECT key, size FROM responses ORDER BY last_used").fetchall():
+            conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+            total -= size
+            if total <= self.max_bytes:
+                break
+
+    def invalidate_scope(self, scope, summary_hash):
+        """Drop ``scope``'s entries that were built from a different summary table.
+
+        Explicit only: lookups do not call this (see the module comment).
+        """
+        with self._connect() as conn:
+            return conn.execute(
+                "DELETE FROM responses WHERE scope = ? AND summary_hash IS NOT ?", (scope, summary_hash)
+            ).rowcount
+
+    def clear(self):
+        with self._connect() as conn:
+            return conn.execute("DELETE FROM responses").rowcount
+
+    def stats(self):
+        with self._connect() as conn:
+            entries, size, stored_hits = conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0), COALESCE(SUM(hits), 0) FROM responses"
+            ).fetchone()
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "saved_latency_s": round(self.saved_latency_s, 3),
+                "entries": entries,
+                "bytes": size,
+                "stored_hits": stored_hits,
+            }
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_cache():
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = ResponseCache()
+        return _cache
+
+
+def cached_completion(call, prompt, model, temperature, max_tokens, scope=None, summary_hash=None):
+    """Return the reply for ``prompt``, calling ``call()`` only on a cache miss.
+
+    ``call`` sends the request and returns the reply text.
+    """
+    cache = get_cache()
+    key = prompt_key(model, temperature, max_tokens, prompt)
+    response = cache.get(key)
+    if response is not None:
+        return response
+    start = time.perf_counter()
+    response = call()
+    cache.put(key, response, time.perf_counter() - start, scope=scope, summary_hash=summary_hash)
+    return response
+
+
+# === CLI ===
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Manage the shared LLM response cache.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    sub.add_parser("stats", help="Show entry count, size and stored hits.")
+    sub.add_parser("clear", help="Delete every cached response.")
+    args = parser.parse_args(argv)
+
+    cache = ResponseCache()
+    if args.command == "stats":
+        stats = cache.stats()
+        print(f"{stats['entries']} entries, {stats['bytes'] / 1e3:.1f} kB, "
+              f"{stats['stored_hits']} hits served from {cache.path}")
+    elif args.command == "clear":
+        print(f"Removed {cache.clear()} response(s)")
+
+
+if __name__ == "__main__":
+    main()
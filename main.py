@@ -1,25 +1,26 @@
 import streamlit as st
 import pandas as pd
-import quantitative as quantitative
-import qualitativee as qualitative
-import matplotlib.pyplot as plt
-import multivariate
-import timeseries
-import fandf
-import requests
-import io
+import os
+import data_sources
+import preprocess
+import derived
+import cube
+import summary
+import figcache
+import ai_context
 
 
 st.set_page_config(page_title="Jewellery Discount Dashboard", layout="centered")
 
-# Load the image and convert to base64
-import streamlit as st
 import base64
 
-# Load the image and convert to base64
-with open("gold.png", "rb") as f:
-    data = f.read()
-    encoded = base64.b64encode(data).decode()
+# Load the image and convert to base64 (once per process, not on every rerun)
+@st.cache_resource
+def header_image():
+    with open("gold.png", "rb") as f:
+        return base64.b64encode(f.read()).decode()
+
+encoded = header_image()
 
 # Display the title in one line
 st.markdown(
@@ -34,19 +35,31 @@ st.markdown(
     unsafe_allow_html=True
 )
 
-# Load data
-@st.cache_data
-def load_data():
+# Pick the data source: DASHBOARD_DATA_SOURCE (path, folder or URL) wins,
+# then [data] source in secrets, then the Google Drive file
+def get_data_source():
+    spec = os.environ.get("DASHBOARD_DATA_SOURCE")
+    if not spec and "data" in st.secrets:
+        spec = st.secrets["data"].get("source")
+    if spec:
+        return data_sources.source_from_spec(spec)
+    return data_sources.GoogleDriveSource(st.secrets["gdrive"]["file_id"])
+
+# The source is stat'ed every few minutes; the frame is reloaded only when its
+# stat changes. A source that cannot be stat'ed (Drive often sends neither
+# Content-Length nor Last-Modified) is loaded once per process.
+@st.cache_data(ttl=300, show_spinner=False)
+def source_stat():
     try:
-        # Get file ID securely
-        file_id = st.secrets["gdrive"]["file_id"]
-        groq_api_key = st.secrets["groq"]["groq_api_key"]
-        url = f"https://drive.google.com/uc?export=download&id={file_id}"
-        # Download and read Excel file using openpyxl engine
-        response = requests.get(url)
-        response.raise_for_status()
+        return data_sources.source_stat(get_data_source())
+    except Exception:
+        return None
 
-        df = pd.read_excel(io.BytesIO(response.content), engine="openpyxl")
+@st.cache_data(max_entries=2)
+def load_data(stat):
+    try:
+        # Cleaned, typed and given its derived columns once here; the analysis modules rely on it
+        df = derived.add_derived(preprocess.clean(data_sources.load_source(get_data_source())))
 
         st.success(f"Data loaded: {df.shape[0]} rows, {df.shape[1]} columns")
 
@@ -56,7 +69,9 @@ def load_data():
         st.error(f"Failed to load data: {e}")
         return pd.DataFrame()
 
-df = load_data()
+df = load_data(source_stat())
+# Dataset totals for the AI follow-up answers come from this frame
+ai_context.use_dataset(df)
 
 # Dropdown 1: Select Analysis Type
 analysis_type = st.selectbox(
@@ -67,7 +82,10 @@ analysis_type = st.selectbox(
     #show_facts_and_figures("DiscAnSamp.xlsx")  # or pass the DataFrame if already loaded
 
 # Dropdown 2: Select Plot (based on selected analysis type)
+# Analysis modules (and seaborn/matplotlib with them) load only when selected
 if analysis_type == "Quantitative Analysis":
+    import quantitative
+
     plot_options = [
         "1. Quantity vs Discount",
         "2. Value vs Discount",
@@ -85,32 +103,38 @@ if analysis_type == "Quantitative Analysis":
     # 1. Quantity vs Discount
     if selected_plot == plot_options[0]:
         df_plot = df[(df['qty'] > 0) & (df['discount'] > 0)]
-        quantitative.plot_and_insight(df_plot, 'qty', "Quantity")
+        quantitative.plot_and_insight(df_plot, 'qty', "Quantity",
+                                      summary_df=summary.summary_table(df, 'qty', 'positive'))
 
     # 2. Value vs Discount
     elif selected_plot == plot_options[1]:
         df_plot = df[(df['value'] > 0) & (df['discount'] > 0)]
-        quantitative.plot_and_insight(df_plot, 'value', "Total Bill Value")
+        quantitative.plot_and_insight(df_plot, 'value', "Total Bill Value",
+                                      summary_df=summary.summary_table(df, 'value', 'positive'))
 
     # 3. Weight vs Discount
     elif selected_plot == plot_options[2]:
         df_plot = df[(df['wt'] > 0) & (df['discount'] > 0)]
-        quantitative.plot_and_insight(df_plot, 'wt', "Weight")
+        quantitative.plot_and_insight(df_plot, 'wt', "Weight",
+                                      summary_df=summary.summary_table(df, 'wt', 'positive'))
 
     # 4. Making Charges vs Discount
     elif selected_plot == plot_options[3]:
         df_plot = df[(df['mc'] > 0) & (df['discount'] > 0)]
-        quantitative.plot_and_insight(df_plot, 'mc', "Making Charges")
+        quantitative.plot_and_insight(df_plot, 'mc', "Making Charges",
+                                      summary_df=summary.summary_table(df, 'mc', 'positive'))
 
     # 5. Gold Price vs Discount
     elif selected_plot == plot_options[4]:
         df_plot = df[(df['goldprice'] > 0) & (df['discount'] > 0)]
-        quantitative.plot_and_insight(df_plot, 'goldprice', "Gold Price")
+        quantitative.plot_and_insight(df_plot, 'goldprice', "Gold Price",
+                                      summary_df=summary.summary_table(df, 'goldprice', 'positive'))
 
     # 6. Stone Value vs Discount
     elif selected_plot == plot_options[5]:
         df_plot = df[(df['stonevalue'] > 0) & (df['discount'] > 0)]
-        quantitative.plot_and_insight(df_plot, 'stonevalue', "Stone Value")
+        quantitative.plot_and_insight(df_plot, 'stonevalue', "Stone Value",
+                                      summary_df=summary.summary_table(df, 'stonevalue', 'positive'))
 
     # 7. Idisc, Obdisc, Ghsdisc vs Discount (Bar Chart)
     elif selected_plot == plot_options[6]:
@@ -131,48 +155,53 @@ if analysis_type == "Quantitative Analysis":
         percents = [val / discount_total for val in values]
         percent_labels = [f"{p:.1%}" for p in percents]
 
-        fig, ax = plt.subplots(figsize=(8, 4))
-        bars = ax.barh(labels, values, color=['#4C72B0', '#55A868', '#C44E52'])
-        ax.set_title("Discount Share", fontsize=14)
-        ax.set_xlabel("₹ Value")
+        def draw():
+            fig, ax = plt.subplots(figsize=(8, 4))
+            bars = ax.barh(labels, values, color=['#4C72B0', '#55A868', '#C44E52'])
+            ax.set_title("Discount Share", fontsize=14)
+            ax.set_xlabel("₹ Value")
 
-        for bar, percent, label in zip(bars, percents, percent_labels):
-            width = bar.get_width()
-            x_position = width - 0.02 * discount_total if percent > 0.1 else width + 0.01 * discount_total
-            align = 'right' if percent > 0.1 else 'left'
-            ax.text(x_position, bar.get_y() + bar.get_height() / 2, label,
-                    va='center', ha=align, fontsize=10, color='white' if percent > 0.1 else 'black')
+            for bar, percent, label in zip(bars, percents, percent_labels):
+                width = bar.get_width()
+                x_position = width - 0.02 * discount_total if percent > 0.1 else width + 0.01 * discount_total
+                align = 'right' if percent > 0.1 else 'left'
+                ax.text(x_position, bar.get_y() + bar.get_height() / 2, label,
+                        va='center', ha=align, fontsize=10, color='white' if percent > 0.1 else 'black')
 
-        plt.tight_layout()
-        st.pyplot(fig)
+            plt.tight_layout()
+            return fig
+        figcache.pyplot(draw, df_plot, "main", "discount share")
 
         # Reuse the same filtered df_plot
-        quantitative.plot_and_insight(df_plot, 'discount', "Discount Share")
+        quantitative.plot_and_insight(df_plot, 'discount', "Discount Share",
+                                      summary_df=summary.summary_table(df, 'discount', 'components'))
 
     # 8. Price Band vs Discount
     elif selected_plot == plot_options[7]:
         df_plot = df[(df['discount'] > 0) & (df['priceband'].notnull())].copy()
-        df_plot['priceband'] = df_plot['priceband'].astype(str).str.strip().str.upper()
-        df_plot = df_plot[~df_plot['priceband'].isin(['NIL', 'NULL'])]
-        quantitative.plot_and_insight(df_plot, 'priceband', "Price Band")
+        df_plot['priceband'] = df_plot['priceband'].cat.remove_unused_categories()
+        quantitative.plot_and_insight(df_plot, 'priceband', "Price Band",
+                                      summary_df=summary.summary_table(df, 'priceband', 'discounted'))
 
 
     # 9. Total EC Band vs Average Discount
     elif selected_plot == plot_options[8]:
-        df_plot = df[(df['discount'] > 0) & (df['totalecband'].str.lower() != 'nil')].copy()
-        quantitative.plot_and_insight(df_plot, 'totalecband', "Total EC Band")
+        df_plot = df[(df['discount'] > 0) & (df['totalecband'].notnull())].copy()
+        df_plot['totalecband'] = df_plot['totalecband'].cat.remove_unused_categories()
+        quantitative.plot_and_insight(df_plot, 'totalecband', "Total EC Band",
+                                      summary_df=summary.summary_table(df, 'totalecband', 'discounted'))
 
     # 10. Cluster EC Band vs Discount
     elif selected_plot == plot_options[9]:
-        df_plot = df.copy()
-        df_plot['clusterecband'] = df_plot['clusterecband'].astype(str).str.strip().str.upper()
-        invalid = ['[NULL]', 'NULL', 'NIL', 'NA', '', 'NONE']
-        df_plot = df_plot[(df_plot['discount'] > 0) & (~df_plot['clusterecband'].isin(invalid))]
-        df_plot['clusterecband'] = pd.Categorical(df_plot['clusterecband'], categories=sorted(df_plot['clusterecband'].unique()), ordered=True)
-        quantitative.plot_and_insight(df_plot, 'clusterecband', "Cluster EC Band")
+        df_plot = df[(df['discount'] > 0) & (df['clusterecband'].notnull())].copy()
+        df_plot['clusterecband'] = df_plot['clusterecband'].cat.remove_unused_categories()
+        quantitative.plot_and_insight(df_plot, 'clusterecband', "Cluster EC Band",
+                                      summary_df=summary.summary_table(df, 'clusterecband', 'discounted'))
 
 
 elif analysis_type == "Qualitative Analysis":
+    import qualitativee as qualitative
+
     plot_options = [
         "1. Brand vs Discount",
         "2. Region vs Discount",
@@ -184,77 +213,68 @@ elif analysis_type == "Qualitative Analysis":
     ]
     selected_plot = st.selectbox("Select Qualitative Plot:", plot_options)
 
-    # Call exact code blocks from combined.py
-    if selected_plot == plot_options[0]:
-        df_plot = df[(df['discount'] > 0) & (df['brand'].notnull())]
-        df_plot = df_plot.groupby('brand')['discount'].mean().reset_index().sort_values(by='discount', ascending=False)
-        qualitative.plot_and_insight(df_plot, 'brand', "Brand")
-    elif selected_plot == plot_options[1]:
-        df_plot = df[(df['discount'] > 0) & (df['region'].notnull())]
-
-        #  Standardize region names
-        df_plot['region'] = df_plot['region'].astype(str).str.strip().str.upper()
+    # Per-group totals come from the aggregate cube (built once per dataset version)
+    data_cube = cube.build_cube(df, data_sources.dataset_version(df))
 
-        #  Group and sort
-        df_plot = (
-            df_plot.groupby('region')['discount']
-            .mean()
+    def discount_by(x_col):
+        stats = cube.group_stats(data_cube, x_col, 'discount', row_filter='discounted')
+        return (
+            stats[['sum', 'count']]
+            .rename(columns={'sum': 'total_discount', 'count': 'transactions'})
             .reset_index()
-            .sort_values(by='discount', ascending=False)
         )
-        qualitative.plot_and_insight(df_plot, 'region', "Region")
+
+    if selected_plot == plot_options[0]:
+        qualitative.plot_and_insight(discount_by('brand'), 'brand', "Brand",
+                                     summary_df=summary.summary_table(df, 'brand'))
+    elif selected_plot == plot_options[1]:
+        qualitative.plot_and_insight(discount_by('region'), 'region', "Region",
+                                     summary_df=summary.summary_table(df, 'region'))
     elif selected_plot == plot_options[2]:
-        df_plot = df[(df['discount'] > 0) & (df['level'].notnull())]
-        df_plot = df_plot.groupby('level')['discount'].mean().reset_index().sort_values(by='discount', ascending=False)
-        qualitative.plot_and_insight(df_plot, 'level', "Level")
+        qualitative.plot_and_insight(discount_by('level'), 'level', "Level",
+                                     summary_df=summary.summary_table(df, 'level'))
     elif selected_plot == plot_options[3]:
-        df['rcluster'] = df['rcluster'].astype(str).str.strip().str.upper()
-        invalid = ['NULL', 'NIL', 'NA', '', '[NULL]']
-        df_plot = df[(df['discount'] > 0) & (~df['rcluster'].isin(invalid))]
-        df_plot = df_plot.groupby('rcluster')['discount'].mean().reset_index().sort_values(by='discount', ascending=False)
-        qualitative.plot_and_insight(df_plot, 'rcluster', "Retail Cluster")
+        qualitative.plot_and_insight(discount_by('rcluster'), 'rcluster', "Retail Cluster",
+                                     summary_df=summary.summary_table(df, 'rcluster'))
     elif selected_plot == plot_options[4]:
-        df['totcategory'] = df['totcategory'].astype(str).str.strip().str.title()
-        invalid = ['Null', 'Nil', '', '[Null]', 'Na']
-        df_plot = df[(df['discount'] > 0) & (~df['totcategory'].isin(invalid))]
-        df_plot = df_plot.groupby('totcategory')['discount'].mean().reset_index().sort_values(by='discount', ascending=False)
-        qualitative.plot_and_insight(df_plot, 'totcategory', "Product Category")
+        qualitative.plot_and_insight(discount_by('totcategory'), 'totcategory', "Product Category",
+                                     summary_df=summary.summary_table(df, 'totcategory'))
     elif selected_plot == plot_options[5]:
-        df_plot = df[df['amcb'].notnull()].copy()
-        df_plot['amcb'] = df_plot['amcb'].astype(str).str.strip().str.upper()
         valid_bands = ["F(30%+)", "E(24-30%)","D(18-24%)","C(14-18%)","B(11-14%)", "A(1-10%)"]
-        df_plot = df_plot[df_plot['amcb'].isin(valid_bands) & (df_plot['discount'] > 0)]
-        df_plot = df_plot.groupby('amcb')['discount'].mean().reset_index()
-        qualitative.plot_and_insight(df_plot, 'amcb', "AMCB Band", category_order=valid_bands)
+        df_plot = discount_by('amcb')
+        df_plot = df_plot[df_plot['amcb'].isin(valid_bands)]
+        qualitative.plot_and_insight(df_plot, 'amcb', "AMCB Band", category_order=valid_bands,
+                                     summary_df=summary.summary_table(df, 'amcb', 'discounted'))
     elif selected_plot == plot_options[6]:
-        df_plot = df.copy()
-        df_plot['docdate'] = pd.to_datetime(df_plot['docdate'], errors='coerce')
-        df_plot = df_plot.dropna(subset=['docdate', 'discount'])
+        df_plot = df.dropna(subset=['docdate', 'discount'])
 
         # Group by day of month (1–31)
-        df_plot['day'] = df_plot['docdate'].dt.day
         df_daily = df_plot.groupby('day')['discount'].mean().reset_index()
 
         # Plot
         import matplotlib.pyplot as plt
-        fig, ax = plt.subplots(figsize=(10, 5))
-        ax.plot(df_daily['day'], df_daily['discount'], marker='o', linestyle='-', color='blue')
-        ax.set_title("Average Discount by Day of Month")
-        ax.set_xlabel("Day of Month (1–31)")
-        ax.set_ylabel("Average Discount")
+        def draw():
+            fig, ax = plt.subplots(figsize=(10, 5))
+            ax.plot(df_daily['day'], df_daily['discount'], marker='o', linestyle='-', color='blue')
+            ax.set_title("Average Discount by Day of Month")
+            ax.set_xlabel("Day of Month (1–31)")
+            ax.set_ylabel("Average Discount")
         
-        #  Force all days 1–31 to show on x-axis
-        ax.set_xticks(range(1, 32))
+            #  Force all days 1–31 to show on x-axis
+            ax.set_xticks(range(1, 32))
 
-        ax.grid(True, linestyle='--', linewidth=0.5, alpha=0.7)
-        st.pyplot(fig)
+            ax.grid(True, linestyle='--', linewidth=0.5, alpha=0.7)
+            return fig
+        figcache.pyplot(draw, df_daily, "main", "daily discount trend")
 
         # Insights
-        qualitative.plot_and_insight(df_daily, 'day', "Day of Month", chart_type="line")
+        qualitative.plot_and_insight(df_daily, 'day', "Day of Month", chart_type="line",
+                                     summary_df=summary.summary_table(df, 'day', 'discounted'))
 
 # ...
 # --- Multivariate Analysis ---
 elif analysis_type == "Multivariate Analysis":
+    import multivariate
 
     multivariate_plot_labels = {
         "Plot 1": "1. Top 20 Discounted Transactions by Location",
@@ -276,6 +296,8 @@ elif analysis_type == "Multivariate Analysis":
     multivariate.plot_and_insight(df, selected_mv_plot_key, selected_mv_plot_name)
 
 elif analysis_type == "Time Series Analysis":
+    import timeseries
+
     plot_options = [
         "1.Daily Average idisc",
         "2.Daily Trend of obdisc and ghsdisc",
@@ -296,6 +318,12 @@ elif analysis_type == "Time Series Analysis":
     timeseries.plot_and_insight(df, plot_mapping[selected_plot], "Time Series")
 
 elif analysis_type == "Facts and Figures":
+    import fandf
+    import ai_prefetch
+
+    # No AI panel here; stop a recommendation still prefetching for the last plot
+    ai_prefetch.cancel_current()
+
     fandf.show_facts_and_figures(df)
 
 
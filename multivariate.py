@@ -1,6 +1,14 @@
 # multivariate.py
 import streamlit as st
 import pandas as pd
+import numpy as np
+import figcache
+import correlation
+import grouptop
+import customers
+import topn
+import bitmap
+from derived import DERIVED_COLUMNS
 import matplotlib.pyplot as plt
 import seaborn as sns
 import matplotlib.ticker as mtick
@@ -72,43 +80,50 @@ predefined_insights = {
 
 # Dropdown-style plotting function
 def plot_and_insight(df, plot_key, plot_label):
-    df.columns = df.columns.str.strip().str.lower()
     with st.container():
         if plot_key == "Plot 1":
-            df['docdate'] = pd.to_datetime(df['docdate'], errors='coerce')
-            df = df.dropna(subset=['discount', 'value', 'docdate', 'loccode'])
-            df['label'] = df['docdate'].dt.strftime('%Y-%m-%d') + ' | ' + df['loccode'].astype(str)
-
-            top20 = df.sort_values(by='discount', ascending=False).head(20)
+            brand_options = list(df['brand'].cat.categories)
+            region_options = list(df['region'].cat.categories)
+            selected_brands = st.multiselect("Select Brand(s):", brand_options, default=brand_options, key="mv_top20_brands")
+            selected_regions = st.multiselect("Select Region(s):", region_options, default=region_options, key="mv_top20_regions")
+            date_range = st.date_input("Date Range", value=(df['docdate'].min(), df['docdate'].max()), key="mv_top20_dates")
+            start, end = date_range if len(date_range) == 2 else (date_range[0], date_range[0])
+
+            # Read from the top-N engine's per-partition lists instead of sorting every row;
+            # a full selection is passed as None so rows without a brand/region still count
+            top20 = topn.top_n(
+                df, 'discount', 20,
+                brands=None if len(selected_brands) == len(brand_options) else selected_brands,
+                regions=None if len(selected_regions) == len(region_options) else selected_regions,
+                start=start, end=end,
+                require=('value', 'docdate', 'loccode'),
+            ).copy()
+            top20['label'] = top20['docdate'].dt.strftime('%Y-%m-%d') + ' | ' + top20['loccode'].astype(str)
             top20 = top20.sort_values(by='discount', ascending=True)
 
             max_discount = top20['discount'].max()
             xlim_buffer = max_discount * 0.15  # 15% buffer to the right
 
-            plt.figure(figsize=(14, 7))
-            plt.hlines(y=top20['label'], xmin=0, xmax=top20['discount'], color='skyblue', linewidth=5)
-            plt.plot(top20['discount'], top20['label'], "o", color='steelblue')
+            def draw():
+                plt.figure(figsize=(14, 7))
+                plt.hlines(y=top20['label'], xmin=0, xmax=top20['discount'], color='skyblue', linewidth=5)
+                plt.plot(top20['discount'], top20['label'], "o", color='steelblue')
 
-            for x, y in zip(top20['discount'], top20['label']):
-                plt.text(x - (max_discount * 0.02), y, f"{x:,.0f}", va='center', ha='right', fontsize=9)
+                for x, y in zip(top20['discount'], top20['label']):
+                    plt.text(x - (max_discount * 0.02), y, f"{x:,.0f}", va='center', ha='right', fontsize=9)
 
-            plt.title("Top 20 Discounts By Location")
-            plt.xlabel("Discount")
-            plt.xlim(0, max_discount + xlim_buffer)  # Extend x-axis limit
-            plt.grid(True)
-            plt.tight_layout()
-            fig = plt.gcf()
-            st.pyplot(fig)
-            plt.clf()
+                plt.title("Top 20 Discounts By Location")
+                plt.xlabel("Discount")
+                plt.xlim(0, max_discount + xlim_buffer)  # Extend x-axis limit
+                plt.grid(True)
+                plt.tight_layout()
+                return plt.gcf()
+            figcache.pyplot(draw, df, "multivariate", plot_key,
+                            (tuple(selected_brands), tuple(selected_regions), str(start), str(end)))
 
         elif plot_key == "Plot 2":
-            df['returned'] = (df['qty'] < 0) | (df['value'] < 0)
-            df['got_discount'] = df['discount'] > 0
-
-            customer_flags = df.groupby('customerno').agg({
-                'got_discount': 'any',
-                'returned': 'any'
-            }).reset_index()
+            # Per-customer flags come from the customer feature store
+            customer_flags = customers.customer_store(df).features[['got_discount', 'returned']].reset_index()
 
             customer_flags['discount_group'] = customer_flags['got_discount'].map({True: 'With Discount', False: 'Without Discount'})
             customer_flags['returned'] = customer_flags['returned'].astype(int)
@@ -116,118 +131,108 @@ def plot_and_insight(df, plot_key, plot_label):
             summary = customer_flags.groupby('discount_group')['returned'].mean().reset_index()
             summary['returned'] *= 100
 
-            plt.figure(figsize=(6, 5))
-            ax = sns.barplot(data=summary, x='discount_group', y='returned', palette='Set2')
+            def draw():
+                plt.figure(figsize=(6, 5))
+                sns.barplot(data=summary, x='discount_group', y='returned', palette='Set2')
 
-            for index, row in summary.iterrows():
-                plt.text(index, row['returned'] * 0.5, f"{row['returned']:.1f}%", 
-                        ha='center', va='center', fontsize=12, color='white', fontweight='bold')
+                for index, row in summary.iterrows():
+                    plt.text(index, row['returned'] * 0.5, f"{row['returned']:.1f}%", 
+                            ha='center', va='center', fontsize=12, color='white', fontweight='bold')
 
-            plt.title("Return Rate: With vs Without Discount")
-            plt.ylabel("Return Rate (%)")
-            plt.xlabel("Customer Group")
-            plt.grid(True)
-            plt.tight_layout()
-            fig = plt.gcf()
-            st.pyplot(fig)
-            plt.clf()
+                plt.title("Return Rate: With vs Without Discount")
+                plt.ylabel("Return Rate (%)")
+                plt.xlabel("Customer Group")
+                plt.grid(True)
+                plt.tight_layout()
+                return plt.gcf()
+            figcache.pyplot(draw, df, "multivariate", plot_key)
 
         elif plot_key == "Plot 3":
-            # Step 1: Calculate Discount % per bill safely
-            df['discount_pct'] = df.apply(
-                lambda row: round((row['discount'] / row['value']) * 100, 2) if row['value'] > 0 else 0,
-                axis=1
-            )
-
-            # Step 2: Classify customers into Buyer Type
-            txn_counts = df.groupby('customerno').size().reset_index(name='transaction_count')
-            txn_counts['Buyer Type'] = txn_counts['transaction_count'].apply(
-                lambda x: 'One-Time Buyer' if x == 1 else 'Multiple-Time Buyer'
-            )
-            df = df.merge(txn_counts[['customerno', 'Buyer Type']], on='customerno', how='left')
-
-            # Step 3: Compute average discount % by buyer type
-            avg_discount_summary = df.groupby('Buyer Type').agg(
-                Customer_Count=('customerno', 'nunique'),
-                Avg_Discount_Percent=('discount_pct', lambda x: round(x.mean(), 2))
-            ).reset_index()
+            # Discount % per bill and Buyer Type come precomputed from derived.py;
+            # customers per Buyer Type are read from the customer feature store
+            repeat_buyer = customers.customer_store(df).features['transactions'] > 1
+            buyer_counts = repeat_buyer.map({False: 'One-Time Buyer', True: 'Multiple-Time Buyer'}).value_counts()
+            avg_discount_summary = df.groupby('buyer_type', observed=True).agg(
+                Avg_Discount_Percent=('bill_discount_pct', 'mean')
+            ).round(2)
+            avg_discount_summary.insert(0, 'Customer_Count', buyer_counts.reindex(avg_discount_summary.index.astype(str)).to_numpy())
+            avg_discount_summary = avg_discount_summary.reset_index().rename(columns={'buyer_type': 'Buyer Type'})
+            avg_discount_summary['Buyer Type'] = avg_discount_summary['Buyer Type'].astype(str)
 
             # Step 4: Plot
-            plt.figure(figsize=(6, 5))
-            ax = sns.barplot(data=avg_discount_summary, x='Buyer Type', y='Avg_Discount_Percent', palette='Set2')
-
-            for index, row in avg_discount_summary.iterrows():
-                plt.text(index, row['Avg_Discount_Percent'] + 0.5, f"{row['Avg_Discount_Percent']:.2f}%", 
-                        ha='center', va='bottom', fontsize=12, color='black', fontweight='bold')
-
-            plt.title("Average Discount % by Buyer Type", fontsize=14)
-            plt.ylabel("Avg Discount (%)", fontsize=12)
-            plt.xlabel("Buyer Type", fontsize=12)
-            plt.ylim(0, avg_discount_summary['Avg_Discount_Percent'].max() + 5)
-            plt.grid(axis='y', linestyle='--', alpha=0.7)
-            plt.tight_layout()
-            st.pyplot(plt.gcf())
-            plt.clf()
+            def draw():
+                plt.figure(figsize=(6, 5))
+                sns.barplot(data=avg_discount_summary, x='Buyer Type', y='Avg_Discount_Percent', palette='Set2')
+
+                for index, row in avg_discount_summary.iterrows():
+                    plt.text(index, row['Avg_Discount_Percent'] + 0.5, f"{row['Avg_Discount_Percent']:.2f}%", 
+                            ha='center', va='bottom', fontsize=12, color='black', fontweight='bold')
+
+                plt.title("Average Discount % by Buyer Type", fontsize=14)
+                plt.ylabel("Avg Discount (%)", fontsize=12)
+                plt.xlabel("Buyer Type", fontsize=12)
+                plt.ylim(0, avg_discount_summary['Avg_Discount_Percent'].max() + 5)
+                plt.grid(axis='y', linestyle='--', alpha=0.7)
+                plt.tight_layout()
+                return plt.gcf()
+            figcache.pyplot(draw, df, "multivariate", plot_key)
 
 
 
         elif plot_key == "Plot 4":
-            df['docdate'] = pd.to_datetime(df['docdate'])
-            df['day'] = df['docdate'].dt.day
-
-            # Calculate discount percentage per row
-            df['discount_percent'] = (df['discount'] / df['value']) * 100  # assuming 'value' is bill amount
-
             # Remove negative discount percentages
-            df = df[df['discount_percent'] >= 0]
+            df = df[df['discount_pct'] >= 0]
 
             # Group by day and compute mean
             daily_df = df.groupby('day').agg({
-                'discount_percent': 'mean',
+                'discount_pct': 'mean',
                 'goldprice': 'mean'
             }).reset_index()
 
-            fig, ax1 = plt.subplots(figsize=(12, 6))
-            line1, = ax1.plot(daily_df['day'], daily_df['discount_percent'], color='blue', marker='o', label='Avg Discount (%)')
-            ax1.set_xlabel('Day of Month')
-            ax1.set_ylabel('Average Discount (%)', color='blue')
-            ax1.set_xticks(range(1, 32))
-            ax1.grid(True)
+            def draw():
+                fig, ax1 = plt.subplots(figsize=(12, 6))
+                line1, = ax1.plot(daily_df['day'], daily_df['discount_pct'], color='blue', marker='o', label='Avg Discount (%)')
+                ax1.set_xlabel('Day of Month')
+                ax1.set_ylabel('Average Discount (%)', color='blue')
+                ax1.set_xticks(range(1, 32))
+                ax1.grid(True)
 
-            ax2 = ax1.twinx()
-            line2, = ax2.plot(daily_df['day'], daily_df['goldprice'], color='orange', marker='s', label='Gold Price')
-            ax2.set_ylabel('Gold Price', color='orange')
+                ax2 = ax1.twinx()
+                line2, = ax2.plot(daily_df['day'], daily_df['goldprice'], color='orange', marker='s', label='Gold Price')
+                ax2.set_ylabel('Gold Price', color='orange')
 
-            ax1.legend([line1, line2], ['Avg Discount (%)', 'Gold Price'], loc='upper right')
-            plt.title("Average Discount (%) vs Day and Gold Price")
-            st.pyplot(fig)
-            plt.clf()
+                ax1.legend([line1, line2], ['Avg Discount (%)', 'Gold Price'], loc='upper right')
+                plt.title("Average Discount (%) vs Day and Gold Price")
+                return fig
+            figcache.pyplot(draw, df, "multivariate", plot_key)
 
         elif plot_key == "Plot 5":
             discount_columns = ['discount', 'idisc', 'obdisc', 'ghsdisc']
             base_exclude_cols = ['year', 'yearmonth', 'customerno', 'brand', 'totcategory']
+            corr_method = st.selectbox("Correlation Method", options=correlation.METHODS,
+                                       format_func=str.capitalize, key="mv_corr_method")
+            # Raw measures only: the derived ratios would correlate with their own discount
+            numeric_columns = [col for col in df.select_dtypes(include='number').columns
+                               if col not in base_exclude_cols and col not in DERIVED_COLUMNS]
+            # One matrix over every numeric column serves all four discount types
+            corr_matrix = correlation.correlation_matrix(df, numeric_columns, corr_method)
             for disc_col in discount_columns:
-                exclude_cols = [col for col in discount_columns if col != disc_col] + base_exclude_cols
-                eligible_columns = [col for col in df.select_dtypes(include='number').columns if col not in exclude_cols]
-                corr_matrix = df[eligible_columns].corr()
-                corr_target = corr_matrix[[disc_col]].drop(index=disc_col)
+                eligible_columns = [col for col in numeric_columns if col == disc_col or col not in discount_columns]
+                corr_target = corr_matrix.loc[eligible_columns, [disc_col]].drop(index=disc_col)
                 corr_target_sorted = corr_target.sort_values(by=disc_col, ascending=False)
-                plt.figure(figsize=(8, 6))
-                sns.heatmap(corr_target_sorted, annot=True, cmap='Reds', vmin=0, vmax=1, linewidths=0.5)
-                plt.title(f'Correlation with {disc_col}')
-                fig = plt.gcf()
-                st.pyplot(fig)
-                plt.clf()
+                def draw():
+                    plt.figure(figsize=(8, 6))
+                    sns.heatmap(corr_target_sorted, annot=True, cmap='Reds', vmin=0, vmax=1, linewidths=0.5)
+                    plt.title(f'Correlation with {disc_col}')
+                    return plt.gcf()
+                figcache.pyplot(draw, df, "multivariate", plot_key, (disc_col, corr_method))
 
         elif plot_key == "Plot 6":
-            df_clean = df.dropna(subset=['customerno', 'discount'])
-            df_clean = df_clean[df_clean['discount'] > 0]
-            
-            # Compute average discount per customer
-            customer_avg = df_clean.groupby('customerno')['discount'].mean().reset_index()
-            
-            # Sort and get top 50 customers
-            top_50_customers = customer_avg.sort_values(by='discount', ascending=False).head(50)
+            # Top 50 customers by average discount over their discounted transactions
+            top_50_customers = (
+                customers.customer_store(df).top(50, 'avg_discount_when_discounted')['avg_discount_when_discounted']
+                .rename('discount').reset_index()
+            )
             
             # Convert 'customerno' to a categorical type to preserve order in plot
             top_50_customers['customerno'] = top_50_customers['customerno'].astype(str)
@@ -238,58 +243,56 @@ def plot_and_insight(df, plot_key, plot_label):
             )
             
             # Plot
-            plt.figure(figsize=(14, 6))
-            sns.barplot(data=top_50_customers, x='customerno', y='discount', palette='tab20')
-            plt.title("Top 50 Customers by Avg Discount")
-            plt.xticks(rotation=90)
-            plt.grid(True)
-            fig = plt.gcf()
-            st.pyplot(fig)
-            plt.clf()
+            def draw():
+                plt.figure(figsize=(14, 6))
+                sns.barplot(data=top_50_customers, x='customerno', y='discount', palette='tab20')
+                plt.title("Top 50 Customers by Avg Discount")
+                plt.xticks(rotation=90)
+                plt.grid(True)
+                return plt.gcf()
+            figcache.pyplot(draw, df, "multivariate", plot_key)
 
         elif plot_key == "Plot 8":
-        # Calculate discount percent for each transaction
-                df['discount_percent'] = (df['discount'] / df['value']) * 100
-            
                 # Aggregate by brand and level
-                summary_df = df.groupby(['brand', 'level'], as_index=False).agg({
+                summary_df = df.groupby(['brand', 'level'], as_index=False, observed=True).agg({
                     'value': 'sum',
                     'discount': 'count',              # Number of transactions
-                    'discount_percent': 'mean',       # Average discount percent
+                    'discount_pct': 'mean',           # Average discount percent
                 })
                 summary_df.columns = [
                     'Brand', 'Level', 'Total Value', 'Number of Transactions', 'Avg Discount (%)'
                 ]
                 # Optional: Order brands by total value for easier interpretation in the chart
-                brand_order = summary_df.groupby('Brand')['Total Value'].sum().sort_values(ascending=False).index
+                brand_order = summary_df.groupby('Brand', observed=True)['Total Value'].sum().sort_values(ascending=False).index
                 summary_df['Brand'] = pd.Categorical(summary_df['Brand'], categories=brand_order, ordered=True)
             
                 # Removed summary table display here
             
-                plt.figure(figsize=(18, 10))
-                sns.set_theme(style="whitegrid")
+                def draw():
+                    plt.figure(figsize=(18, 10))
+                    sns.set_theme(style="whitegrid")
             
-                ax = sns.barplot(
-                    data=summary_df,
-                    x='Avg Discount (%)',
-                    y='Brand',
-                    hue='Level',
-                    palette='Set2'
-                )
+                    ax = sns.barplot(
+                        data=summary_df,
+                        x='Avg Discount (%)',
+                        y='Brand',
+                        hue='Level',
+                        palette='Set2'
+                    )
             
-                for container in ax.containers:
-                    ax.bar_label(container, fmt='%.2f%%', padding=3, fontsize=12)
+                    for container in ax.containers:
+                        ax.bar_label(container, fmt='%.2f%%', padding=3, fontsize=12)
             
-                plt.title("Average Discount (%) by Brand and Level", fontsize=18, weight='bold')
-                plt.xlabel("Average Discount (%)", fontsize=14)
-                plt.ylabel("Brand", fontsize=14)
-                plt.xticks(fontsize=12)
-                plt.yticks(fontsize=12)
-                plt.legend(title="Level", title_fontsize=13, fontsize=12, loc='center left', bbox_to_anchor=(1, 0.5))
+                    plt.title("Average Discount (%) by Brand and Level", fontsize=18, weight='bold')
+                    plt.xlabel("Average Discount (%)", fontsize=14)
+                    plt.ylabel("Brand", fontsize=14)
+                    plt.xticks(fontsize=12)
+                    plt.yticks(fontsize=12)
+                    plt.legend(title="Level", title_fontsize=13, fontsize=12, loc='center left', bbox_to_anchor=(1, 0.5))
             
-                plt.tight_layout()
-                st.pyplot(plt)
-                plt.clf()
+                    plt.tight_layout()
+                    return plt.gcf()
+                figcache.pyplot(draw, df, "multivariate", plot_key)
 
 
         elif plot_key == "Plot 9":
@@ -297,131 +300,123 @@ def plot_and_insight(df, plot_key, plot_label):
 
             # Clean and preprocess
             df_plot = df_plot.dropna(subset=['region', 'brand', 'discount', 'value', 'customerno'])
-            df_plot = df_plot[
-                (df_plot['discount'] > 0) &
-                (df_plot['value'] > 0) &
-                (~df_plot['region'].astype(str).str.upper().isin(['NULL', '[NULL]', 'NAN'])) &
-                (~df_plot['brand'].astype(str).str.upper().isin(['NULL', '[NULL]', 'NAN']))
-            ]
-
-            # Standardize text
-            df_plot['region'] = df_plot['region'].astype(str).str.strip().str.upper()
-            df_plot['brand'] = df_plot['brand'].astype(str).str.strip().str.upper()
-
-            # Compute discount %
-            df_plot['discount_percent'] = (df_plot['discount'] / df_plot['value']) * 100
+            df_plot = df_plot[(df_plot['discount'] > 0) & (df_plot['value'] > 0)]
 
             # Get top 6 regions by total discount (not excluding ECOM)
-            region_discounts = df_plot.groupby('region')['discount'].sum().sort_values(ascending=False)
+            region_discounts = df_plot.groupby('region', observed=True)['discount'].sum().sort_values(ascending=False)
             top_regions = region_discounts.head(6).index.tolist()
             remaining_regions = region_discounts.iloc[6:].index.tolist()
 
             # Exclude ECOM when choosing top brands
             valid_brands = df_plot[~df_plot['brand'].isin(['ECOM'])]
-            top_brands = valid_brands.groupby('brand')['discount'].sum().nlargest(5).index.tolist()
+            top_brands = valid_brands.groupby('brand', observed=True)['discount'].sum().nlargest(5).index.tolist()
 
             # Function: Avg discount % per customer, grouped by region and brand
             def get_avg_discount_percent(df_sub):
-                return (
-                    df_sub.groupby(['region', 'brand', 'customerno'])['discount_percent']
+                grouped = (
+                    df_sub.groupby(['region', 'brand', 'customerno'], observed=True)['discount_pct']
                     .mean()
                     .reset_index()
-                    .groupby(['region', 'brand'])['discount_percent']
+                    .groupby(['region', 'brand'], observed=True)['discount_pct']
                     .mean()
                     .reset_index()
                 )
+                grouped['brand'] = grouped['brand'].cat.remove_unused_categories()
+                return grouped
 
             # -------- Plot 1: Top 6 Regions × Top 5 Brands (including ECOM if present) --------
             top_df = df_plot[df_plot['region'].isin(top_regions) & df_plot['brand'].isin(top_brands + ['ECOM'])]
             grouped_top = get_avg_discount_percent(top_df)
-            region_order_top = grouped_top.groupby('region')['discount_percent'].mean().sort_values(ascending=False).index.tolist()
+            region_order_top = grouped_top.groupby('region', observed=True)['discount_pct'].mean().sort_values(ascending=False).index.tolist()
             grouped_top['region'] = pd.Categorical(grouped_top['region'], categories=region_order_top, ordered=True)
 
-            fig1, ax1 = plt.subplots(figsize=(14, 8))
-            sns.set_theme(style="whitegrid")
-            sns.barplot(
-                data=grouped_top,
-                x='region',
-                y='discount_percent',
-                hue='brand',
-                palette='Set2',
-                width=0.7,
-                ax=ax1
-            )
+            def draw():
+                fig1, ax1 = plt.subplots(figsize=(14, 8))
+                sns.set_theme(style="whitegrid")
+                sns.barplot(
+                    data=grouped_top,
+                    x='region',
+                    y='discount_pct',
+                    hue='brand',
+                    palette='Set2',
+                    width=0.7,
+                    ax=ax1
+                )
 
-            for container in ax1.containers:
-                for bar in container:
-                    height = bar.get_height()
-                    if height > 0:
-                        ax1.text(
-                            bar.get_x() + bar.get_width() / 2,
-                            height + 0.4,
-                            f"{height:.1f}%",
-                            ha='center',
-                            va='bottom',
-                            fontsize=10,
-                            weight='semibold',
-                            color='black'
-                        )
-
-            ax1.set_title("Avg discount % per transaction to first 6 regions", fontsize=16, weight='bold')
-            ax1.set_xlabel("Region", fontsize=13)
-            ax1.set_ylabel("Avg Discount per Transaction (%)", fontsize=13)
-            ax1.tick_params(axis='x', labelsize=11)
-            ax1.tick_params(axis='y', labelsize=11)
-            ax1.legend(title="Brand", title_fontsize=12, fontsize=11, loc='center left', bbox_to_anchor=(1, 0.5))
-            plt.tight_layout()
-            st.pyplot(fig1)
-            plt.clf()
+                for container in ax1.containers:
+                    for bar in container:
+                        height = bar.get_height()
+                        if height > 0:
+                            ax1.text(
+                                bar.get_x() + bar.get_width() / 2,
+                                height + 0.4,
+                                f"{height:.1f}%",
+                                ha='center',
+                                va='bottom',
+                                fontsize=10,
+                                weight='semibold',
+                                color='black'
+                            )
+
+                ax1.set_title("Avg discount % per transaction to first 6 regions", fontsize=16, weight='bold')
+                ax1.set_xlabel("Region", fontsize=13)
+                ax1.set_ylabel("Avg Discount per Transaction (%)", fontsize=13)
+                ax1.tick_params(axis='x', labelsize=11)
+                ax1.tick_params(axis='y', labelsize=11)
+                ax1.legend(title="Brand", title_fontsize=12, fontsize=11, loc='center left', bbox_to_anchor=(1, 0.5))
+                plt.tight_layout()
+                return fig1
+            figcache.pyplot(draw, df, "multivariate", plot_key, ("top regions",))
 
             # -------- Plot 2: Remaining Regions × Top 5 Brands (including ECOM if present) --------
             remaining_df = df_plot[df_plot['region'].isin(remaining_regions) & df_plot['brand'].isin(top_brands + ['ECOM'])]
             grouped_remain = get_avg_discount_percent(remaining_df)
-            region_order_remain = grouped_remain.groupby('region')['discount_percent'].mean().sort_values(ascending=False).index.tolist()
+            region_order_remain = grouped_remain.groupby('region', observed=True)['discount_pct'].mean().sort_values(ascending=False).index.tolist()
             grouped_remain['region'] = pd.Categorical(grouped_remain['region'], categories=region_order_remain, ordered=True)
 
-            fig2, ax2 = plt.subplots(figsize=(14, 8))
-            sns.barplot(
-                data=grouped_remain,
-                x='region',
-                y='discount_percent',
-                hue='brand',
-                palette='Set2',
-                width=0.7,
-                ax=ax2
-            )
+            def draw():
+                fig2, ax2 = plt.subplots(figsize=(14, 8))
+                sns.barplot(
+                    data=grouped_remain,
+                    x='region',
+                    y='discount_pct',
+                    hue='brand',
+                    palette='Set2',
+                    width=0.7,
+                    ax=ax2
+                )
 
-            for container in ax2.containers:
-                for bar in container:
-                    height = bar.get_height()
-                    if height > 0:
-                        ax2.text(
-                            bar.get_x() + bar.get_width() / 2,
-                            height + 0.4,
-                            f"{height:.1f}%",
-                            ha='center',
-                            va='bottom',
-                            fontsize=10,
-                            weight='semibold',
-                            color='black'
-                        )
-
-            ax2.set_title("Avg discount % per transaction to rest of the regions", fontsize=16, weight='bold')
-            ax2.set_xlabel("Region", fontsize=13)
-            ax2.set_ylabel("Avg Discount per Transaction (%)", fontsize=13)
-            ax2.tick_params(axis='x', labelsize=11, rotation=30)
-            ax2.tick_params(axis='y', labelsize=11)
-            ax2.legend(title="Brand", title_fontsize=12, fontsize=11, loc='center left', bbox_to_anchor=(1, 0.5))
-            plt.tight_layout()
-            st.pyplot(fig2)
-            plt.clf()
+                for container in ax2.containers:
+                    for bar in container:
+                        height = bar.get_height()
+                        if height > 0:
+                            ax2.text(
+                                bar.get_x() + bar.get_width() / 2,
+                                height + 0.4,
+                                f"{height:.1f}%",
+                                ha='center',
+                                va='bottom',
+                                fontsize=10,
+                                weight='semibold',
+                                color='black'
+                            )
+
+                ax2.set_title("Avg discount % per transaction to rest of the regions", fontsize=16, weight='bold')
+                ax2.set_xlabel("Region", fontsize=13)
+                ax2.set_ylabel("Avg Discount per Transaction (%)", fontsize=13)
+                ax2.tick_params(axis='x', labelsize=11, rotation=30)
+                ax2.tick_params(axis='y', labelsize=11)
+                ax2.legend(title="Brand", title_fontsize=12, fontsize=11, loc='center left', bbox_to_anchor=(1, 0.5))
+                plt.tight_layout()
+                return fig2
+            figcache.pyplot(draw, df, "multivariate", plot_key, ("remaining regions",))
 
     # === Summary Table Generation Per Plot ===
     summary_df = None
 
     if plot_key == "Plot 1":
         summary_df = top20.copy()
-        summary_df['docdate'] = pd.to_datetime(summary_df['docdate']).dt.strftime('%Y-%m-%d')
+        summary_df['docdate'] = summary_df['docdate'].dt.strftime('%Y-%m-%d')
         summary_df = summary_df.rename(columns={
             'docdate': 'Date',
             'loccode': 'Location',
@@ -432,12 +427,7 @@ def plot_and_insight(df, plot_key, plot_label):
         st.dataframe(summary_df)
 
     elif plot_key == "Plot 2":
-        df['returned'] = (df['qty'] < 0) | (df['value'] < 0)
-        df['got_discount'] = df['discount'] > 0
-        customer_flags = df.groupby('customerno').agg({
-            'got_discount': 'any',
-            'returned': 'any'
-        }).reset_index()
+        customer_flags = customers.customer_store(df).features[['got_discount', 'returned']].reset_index()
         customer_flags['Discount Group'] = customer_flags['got_discount'].map({
             True: 'With Discount',
             False: 'Without Discount'
@@ -456,31 +446,31 @@ def plot_and_insight(df, plot_key, plot_label):
         st.dataframe(summary_df)
 
     elif plot_key == "Plot 3":
-        df['Buyer Type'] = df.groupby('customerno')['customerno'].transform('count').apply(lambda x: 'One-Time Buyer' if x == 1 else 'Multiple-Time Buyer')
-        selected_buyer_types = st.multiselect("Select Buyer Type(s):", df['Buyer Type'].unique(), default=df['Buyer Type'].unique())
-        selected_brands = st.multiselect("Select Brand(s):", df['brand'].unique(), default=df['brand'].unique())
+        df = df.rename(columns={'buyer_type': 'Buyer Type'})
+        buyer_type_options = df['Buyer Type'].dropna().unique().tolist()
+        selected_buyer_types = st.multiselect("Select Buyer Type(s):", buyer_type_options, default=buyer_type_options)
+        brand_options = df['brand'].dropna().unique().tolist()
+        selected_brands = st.multiselect("Select Brand(s):", brand_options, default=brand_options)
         filtered_df = df[df['Buyer Type'].isin(selected_buyer_types) & df['brand'].isin(selected_brands)]
-        summary_df = filtered_df.groupby(['Buyer Type', 'brand']).agg(
+        summary_df = filtered_df.groupby(['Buyer Type', 'brand'], observed=True).agg(
             Total_Customers=('customerno', 'nunique'),
             Total_Transactions=('customerno', 'count'),
             Total_Discount=('discount', 'sum'),
             Total_Value=('value', 'sum')
         ).reset_index()
-        summary_df['Avg Discount (%)'] = summary_df.apply(
-            lambda row: round((row['Total_Discount'] / row['Total_Value']) * 100, 2) if row['Total_Value'] > 0 else 0,
-            axis=1
+        summary_df['Avg Discount (%)'] = np.where(
+            summary_df['Total_Value'] > 0,
+            (summary_df['Total_Discount'] / summary_df['Total_Value'] * 100).round(2),
+            0
         )
         summary_df = summary_df[['Buyer Type', 'brand', 'Total_Customers', 'Total_Transactions', 'Avg Discount (%)']]
         st.markdown("### Buyer Type × Brand vs Discount Summary")
         st.dataframe(summary_df)
 
     elif plot_key == "Plot 4":
-        df['docdate'] = pd.to_datetime(df['docdate'])
-        df['day'] = df['docdate'].dt.day
-        df['discount_percent'] = (df['discount'] / df['value']) * 100
-        df = df[(df['value'] > 0) & (df['discount_percent'] >= 0)]
+        df = df[(df['value'] > 0) & (df['discount_pct'] >= 0)]
         summary_df = df.groupby('day').agg({
-            'discount_percent': 'mean',
+            'discount_pct': 'mean',
             'goldprice': 'mean'
         }).reset_index()
         summary_df.columns = ['Day of Month', 'Avg Discount (%)', 'Avg Gold Price (₹)']
@@ -489,28 +479,45 @@ def plot_and_insight(df, plot_key, plot_label):
         st.dataframe(summary_df)
 
     elif plot_key == "Plot 5":
+        segment_col = st.selectbox("Key Drivers Per", options=['All', 'brand', 'region'], key="mv_corr_segment")
+        feature_columns = [col for col in numeric_columns if col not in discount_columns]
+        if segment_col == 'All':
+            segments = {None: corr_matrix}
+        else:
+            by_segment = correlation.segment_correlations(df, segment_col, numeric_columns, corr_method)
+            segments = {key: by_segment.loc[key] for key in by_segment.index.unique(level=0)}
         rows = []
-        for disc_col in discount_columns:
-            eligible_columns = [col for col in df.select_dtypes(include='number').columns if col not in discount_columns + base_exclude_cols]
-            corr_series = df[eligible_columns + [disc_col]].corr()[disc_col].drop(disc_col)
-            top_feature = corr_series.idxmax()
-            rows.append({
-                "Discount Type": disc_col.upper(),
-                "Top Correlated Feature": top_feature,
-                "Correlation Value": round(corr_series[top_feature], 3)
-            })
+        for segment, matrix in segments.items():
+            for disc_col in discount_columns:
+                corr_series = matrix.loc[feature_columns, disc_col].dropna()
+                if corr_series.empty:
+                    continue
+                top_feature = corr_series.idxmax()
+                row = {} if segment is None else {segment_col.capitalize(): segment}
+                row.update({
+                    "Discount Type": disc_col.upper(),
+                    "Top Correlated Feature": top_feature,
+                    "Correlation Value": round(corr_series[top_feature], 3)
+                })
+                rows.append(row)
         summary_df = pd.DataFrame(rows)
         st.markdown("###  Key Drivers of Each Discount Type")
         st.dataframe(summary_df)
 
     elif plot_key == "Plot 6":
-        valid_df = df_clean[(df_clean['discount'] >= 0) & (df_clean['qty'] > 0) & (~df_clean['totcategory'].isin(["NULL", "[NULL]", "None", "", None])) & (df_clean['totcategory'].notna())]
-        selected_brands = st.multiselect("Select Brand(s):", sorted(valid_df['brand'].dropna().unique()), default=sorted(valid_df['brand'].dropna().unique()))
-        selected_categories = st.multiselect("Select Category(ies):", sorted(valid_df['totcategory'].unique()), default=sorted(valid_df['totcategory'].unique()))
-        filtered_df = valid_df[(valid_df['brand'].isin(selected_brands)) & (valid_df['totcategory'].isin(selected_categories))]
+        # Brand/category selections resolve on the bitmap index instead of isin() masks
+        index = bitmap.filter_index(df)
+        index.add_base("Plot 6", lambda: df['customerno'].notna() & (df['discount'] > 0) & (df['qty'] > 0) & df['totcategory'].notna())
+        brands = index.values('brand', base="Plot 6")
+        categories = index.values('totcategory', base="Plot 6")
+        selected_brands = st.multiselect("Select Brand(s):", brands, default=brands)
+        selected_categories = st.multiselect("Select Category(ies):", categories, default=categories)
+        filtered_df = df[index.select("Plot 6", brand=selected_brands, totcategory=selected_categories)]
         if not filtered_df.empty:
-            brand_mode = filtered_df.groupby('customerno')['brand'].agg(lambda x: x.mode().iloc[0] if not x.mode().empty else None)
-            category_mode = filtered_df.groupby('customerno')['totcategory'].agg(lambda x: x.mode().iloc[0] if not x.mode().empty else None)
+            # Per-customer modes for this brand/category selection, without a per-customer mode() call
+            selection = ("Plot 6", tuple(selected_brands), tuple(selected_categories))
+            brand_mode = grouptop.cached_group_mode(filtered_df, selection, 'customerno', 'brand')
+            category_mode = grouptop.cached_group_mode(filtered_df, selection, 'customerno', 'totcategory')
             summary_df = filtered_df.groupby('customerno').agg(
                 Max_Discount=('discount', 'max'),
                 Transaction_Count=('discount', 'count'),
@@ -523,18 +530,20 @@ def plot_and_insight(df, plot_key, plot_label):
             st.dataframe(summary_df[['customerno', 'Most Frequent Brand', 'Top Category Purchased', 'Max_Discount', 'Transaction_Count', 'Total_Spend']])
 
     elif plot_key == "Plot 7":
-        df_clean['region'] = df_clean['region'].astype(str).str.strip().str.upper()
-        df_clean['brand'] = df_clean['brand'].astype(str).str.strip().str.upper()
-        valid_df = df_clean[(df_clean['discount'] >= 0) & (df_clean['qty'] > 0) & (df_clean['value'] > 0) & (~df_clean['region'].isin(["NULL", "[NULL]", "NONE", "", None])) & (df_clean['region'].notna()) & (df_clean['brand'].notna())]
-        valid_df = valid_df[valid_df['brand'] != 'ECOM']
-        valid_df['discount_percent'] = (valid_df['discount'] / valid_df['value']) * 100
-        selected_regions = st.multiselect("Select Region(s):", sorted(valid_df['region'].dropna().unique()), default=sorted(valid_df['region'].dropna().unique()))
-        selected_brands = st.multiselect("Select Brand(s):", sorted(valid_df['brand'].dropna().unique()), default=sorted(valid_df['brand'].dropna().unique()))
-        filtered_df = valid_df[(valid_df['region'].isin(selected_regions)) & (valid_df['brand'].isin(selected_brands))]
+        index = bitmap.filter_index(df)
+        index.add_base("Plot 7", lambda: (
+            df['customerno'].notna() & (df['discount'] > 0) & (df['qty'] > 0) & (df['value'] > 0)
+            & df['region'].notna() & df['brand'].notna() & (df['brand'] != 'ECOM')
+        ))
+        regions = index.values('region', base="Plot 7")
+        brands = index.values('brand', base="Plot 7")
+        selected_regions = st.multiselect("Select Region(s):", regions, default=regions)
+        selected_brands = st.multiselect("Select Brand(s):", brands, default=brands)
+        filtered_df = df[index.select("Plot 7", region=selected_regions, brand=selected_brands)]
         if not filtered_df.empty:
-            summary_df = filtered_df.groupby(['region', 'brand']).agg(
-                Avg_Discount_Percent=('discount_percent', 'mean'),
-                Txn_Count=('discount_percent', 'count'),
+            summary_df = filtered_df.groupby(['region', 'brand'], observed=True).agg(
+                Avg_Discount_Percent=('discount_pct', 'mean'),
+                Txn_Count=('discount_pct', 'count'),
                 Total_Value=('value', 'sum')
             ).reset_index().round(2).sort_values(by='Avg_Discount_Percent', ascending=False)
             summary_df.rename(columns={
@@ -548,34 +557,33 @@ def plot_and_insight(df, plot_key, plot_label):
             st.dataframe(summary_df)
 
     elif plot_key == "Plot 8":
-        df['discount_percent'] = (df['discount'] / df['value']) * 100
-        summary_df = df.groupby(['brand', 'level'], as_index=False).agg({
+        summary_df = df.groupby(['brand', 'level'], as_index=False, observed=True).agg({
             'value': 'sum',
             'discount': 'count',
-            'discount_percent': 'mean',
+            'discount_pct': 'mean',
         })
         summary_df.columns = ['Brand', 'Level', 'Total Value', 'Number of Transactions', 'Avg Discount (%)']
         st.markdown("### Brand, Level Value, No of Transactions & Avg Discount % Summary")
         st.dataframe(summary_df)
 
     elif plot_key == "Plot 9":
-        valid_df = df[(df['discount'] > 0) & (df['value'] > 0) & (~df['region'].astype(str).str.upper().isin(["NULL", "[NULL]", "NONE", "", "NAN"])) & (df['region'].notna()) & (df['brand'].notna())].copy()
-        valid_df['region'] = valid_df['region'].astype(str).str.strip().str.upper()
-        valid_df['brand'] = valid_df['brand'].astype(str).str.strip().str.upper()
-        valid_df['discount_percent'] = (valid_df['discount'] / valid_df['value']) * 100
-        selected_regions = st.multiselect("Select Region(s):", sorted(valid_df['region'].unique()), default=sorted(valid_df['region'].unique()))
-        selected_brands = st.multiselect("Select Brand(s):", sorted(valid_df['brand'].unique()), default=sorted(valid_df['brand'].unique()))
-        filtered_df = valid_df[(valid_df['region'].isin(selected_regions)) & (valid_df['brand'].isin(selected_brands))]
+        index = bitmap.filter_index(df)
+        index.add_base("Plot 9", lambda: (df['discount'] > 0) & (df['value'] > 0) & df['region'].notna() & df['brand'].notna())
+        regions = index.values('region', base="Plot 9")
+        brands = index.values('brand', base="Plot 9")
+        selected_regions = st.multiselect("Select Region(s):", regions, default=regions)
+        selected_brands = st.multiselect("Select Brand(s):", brands, default=brands)
+        filtered_df = df[index.select("Plot 9", region=selected_regions, brand=selected_brands)]
         if not filtered_df.empty:
             summary_df = (
                 filtered_df
-                .groupby(['region', 'brand', 'customerno'])['discount_percent']
+                .groupby(['region', 'brand', 'customerno'], observed=True)['discount_pct']
                 .mean()
                 .reset_index()
-                .groupby(['region', 'brand'])['discount_percent']
+                .groupby(['region', 'brand'], observed=True)['discount_pct']
                 .mean()
                 .reset_index()
-                .rename(columns={'discount_percent': 'Avg Discount (%)'})
+                .rename(columns={'discount_pct': 'Avg Discount (%)'})
                 .round(2)
             )
             st.markdown("###  Brand-wise Avg Discount (%) by Region")
@@ -0,0 +1,134 @@
+import pandas as pd
+import streamlit as st
+
+from data_sources import dataset_version
+
+# === Calendar Time-Series Engine ===
+# The rows behind a time-series plot are pre-aggregated once per dataset
+# version into one partition per calendar day (optionally per brand or
+# another dimension): the sum and non-null count of each measure plus the
+# row count. Daily / weekly / monthly series, rolling windows, period-over-
+# period comparisons and the old day-of-month fold are re-aggregations of
+# those partitions, so changing a view never rescans the transactions.
+# Means are pooled (sum of sums / sum of counts), i.e. the mean of the
+# underlying rows, not a mean of daily means.
+
+FREQUENCIES = {"Daily": "D", "Weekly": "W", "Monthly": "M"}
+
+MEASURES = ["discount", "value", "discount_pct", "idisc_pct", "obdisc_pct", "ghsdisc_pct"]
+
+# Row filters the time-series plots apply before aggregating (NaN fails every
+# comparison, so these also drop the rows the plots used to dropna)
+FILTERS = {
+    "all": None,
+    "idisc": lambda df: (df['idisc'] > 0) & (df['value'] > 0),
+    "obdisc_ghsdisc": lambda df: (df['value'] > 0) & (df['obdisc_pct'] >= 0) & (df['ghsdisc_pct'] >= 0),
+    "discounted_capped": lambda df: (df['discount'] > 0) & (df['value'] > 0) & (df['discount_pct'] <= 100),
+    "returned": lambda df: df['returned'],
+}
+
+
+@st.cache_data(show_spinner=False)
+def _partitions(_df, dataset_version, row_filter, by):
+    row_filter = FILTERS[row_filter]
+    rows = _df if row_filter is None else _df[row_filter(_df)]
+    keys = [rows['docdate'].dt.normalize().rename('date')] + ([rows[by]] if by else [])
+    measures = rows[[m for m in MEASURES if m in rows.columns]].astype("float64")
+    measures['rows'] = 1.0
+    grouped = measures.groupby(keys, observed=True)
+    return pd.concat({"sum": grouped.sum(), "count": grouped.count()}, axis=1).swaplevel(axis=1)
+
+
+def partitions(df, row_filter="all", by=None):
+    """Per-day (and per ``by`` value) ``(measure, sum|count)`` partitions of ``df``.
+
+    The ``rows`` measure counts transactions. Built once per
+    (dataset version, ``row_filter``, ``by``).
+    """
+    return _partitions(df, dataset_version(df), row_filter, by)
+
+
+def _value(sums, counts, stat):
+    if stat == "sum":
+        return sums
+    if stat == "count":
+        return counts
+    return sums / counts.where(counts > 0)
+
+
+def _wide(parts, metric, key):
+    # Per-key sums and counts, one column per ``by`` value (or just the metric)
+    stats = parts[metric]
+    keys = [key] + list(parts.index.names[1:])
+    sums, counts = (stats[stat].groupby(keys, observed=True).sum() for stat in ("sum", "count"))
+    if len(keys) > 1:
+        return sums.unstack(fill_value=0), counts.unstack(fill_value=0)
+    return sums.to_frame(metric), counts.to_frame(metric)
+
+
+def _long(wide, index_name, by):
+    # Back to one Series, indexed by (index_name[, by]), for plotting
+    wide = wide.rename_axis(index_name)
+    if by is None:
+        return wide.iloc[:, 0]
+    return wide.rename_axis(columns=by).stack(future_stack=True)
+
+
+@st.cache_data(show_spinner=False)
+def _series(_df, dataset_version, metric, freq, row_filter, by, stat, window):
+    parts = _partitions(_df, dataset_version, row_filter, by)
+    if parts.empty:
+        return pd.Series(dtype="float64", name=metric)
+    periods = parts.index.get_level_values('date').to_period(FREQUENCIES[freq])
+    sums, counts = _wide(parts, metric, periods)
+    # Every period between the first and last, so gaps and rolling windows follow the calendar
+    calendar = pd.period_range(periods.min(), periods.max(), freq=FREQUENCIES[freq])
+    sums, counts = sums.reindex(calendar, fill_value=0), counts.reindex(calendar, fill_value=0)
+    if window > 1:
+        sums, counts = sums.rolling(window).sum(), counts.rolling(window).sum()
+    values = _value(sums, counts, stat)
+    values.index = calendar.to_timestamp()
+    return _long(values, 'date', by).rename(metric)
+
+
+def series(df, metric, freq="Daily", row_filter="all", by=None, stat="mean", window=1):
+    """``metric`` per calendar period, on a DatetimeIndex of period starts.
+
+    ``freq`` is a FREQUENCIES label; ``stat`` is ``mean``, ``sum`` or
+    ``count``; ``window > 1`` pools that many trailing periods (a rolling
+    mean/sum, NaN until the window is full). With ``by`` the index gains
+    that level. Cached per (dataset version, metric, frequency, filter).
+    """
+    return _series(df, dataset_version(df), metric, freq, row_filter, by, stat, window)
+
+
+def period_over_period(df, metric, freq="Monthly", row_filter="all", by=None, stat="mean"):
+    """Each period of ``series`` next to the one before it, with the change."""
+    current = series(df, metric, freq, row_filter, by, stat)
+    previous = current.groupby(level=by).shift(1) if by else current.shift(1)
+    table = pd.DataFrame({"Current": current, "Previous": previous})
+    table["Change"] = table["Current"] - table["Previous"]
+    table["Change (%)"] = table["Change"] / table["Previous"].abs() * 100
+    return table
+
+
+@st.cache_data(show_spinner=False)
+def _fold(_df, dataset_version, metric, row_filter, by, stat):
+    parts = _partitions(_df, dataset_version, row_filter, by)
+    days = parts.index.get_level_values('date').day.rename('day')
+    sums, counts = _wide(parts, metric, days)
+    return _long(_value(sums, counts, stat), 'day', by).rename(metric)
+
+
+def fold_by_day(df, metric, row_filter="all", by=None, stat="mean"):
+    """``metric`` per day of month (1-31), every month folded together."""
+    return _fold(df, dataset_version(df), metric, row_filter, by, stat)
+
+
+def months_spanned(df):
+    """How many calendar months ``docdate`` covers."""
+    dates = df['docdate'].dropna()
+    if dates.empty:
+        return 0
+    first, last = dates.min(), dates.max()
+    return (last.year - first.year) * 12 + last.month - first.month + 1
@@ -0,0 +1,83 @@
+import numpy as np
+import pandas as pd
+
+# === Canonical Cleaning ===
+# Runs once right after loading. Every analysis module can then assume:
+#   - lower-case column names and a parsed ``docdate``
+#   - placeholder spellings (NULL, NIL, [NULL], NA, ...) are real NA
+#   - the dimension columns below are upper-case, stripped ``Categorical``s
+#   - integer-valued measures use the smallest integer dtype that fits
+
+PLACEHOLDERS = ["NULL", "NIL", "[NULL]", "NA", "[NA]", "NONE", "NAN", ""]
+
+CATEGORICAL_COLUMNS = [
+    "brand", "region", "level", "rcluster", "totcategory",
+    "priceband", "totalecband", "clusterecband", "amcb",
+]
+
+# Band labels start with a letter (A(0-25K), B(25-50K), ...), so sorting the
+# labels gives band order.
+ORDERED_COLUMNS = ["priceband", "totalecband", "clusterecband", "amcb"]
+
+NUMERIC_COLUMNS = [
+    "qty", "value", "wt", "discount", "idisc", "obdisc", "ghsdisc",
+    "mc", "goldprice", "stonevalue", "year", "month", "yearmonth",
+]
+
+
+def _labels(series):
+    # Work on the distinct values only, then map codes back; this keeps the
+    # string work proportional to the number of labels, not rows.
+    codes, uniques = pd.factorize(series)
+    labels = pd.Index(uniques.astype(str)).str.strip().str.upper()
+    return codes, labels
+
+
+def to_categorical(series, ordered=False):
+    codes, labels = _labels(series)
+    labels = labels.where(~labels.isin(PLACEHOLDERS))
+    categories = pd.Index(sorted(labels.dropna().unique()))
+    remap = categories.get_indexer(labels)
+    # Index only real codes: an all-blank column has no labels for -1 to wrap to
+    new_codes = np.full(len(codes), -1, dtype=remap.dtype)
+    valid = codes >= 0
+    new_codes[valid] = remap[codes[valid]]
+    return pd.Categorical.from_codes(new_codes, categories=categories, ordered=ordered)
+
+
+def blank_placeholders(series):
+    codes, labels = _labels(series)
+    is_placeholder = np.asarray(labels.isin(PLACEHOLDERS))
+    if not is_placeholder.any():
+        return series
+    return series.mask((codes >= 0) & is_placeholder[codes])
+
+
+def downcast_numeric(series):
+    if pd.api.types.is_integer_dtype(series):
+        return pd.to_numeric(series, downcast="integer")
+    if pd.api.types.is_float_dtype(series):
+        # Monetary floats stay float64: float32 keeps only ~7 significant
+        # digits, which visibly shifts totals in crores. Whole-number floats
+        # without gaps (counts read via Excel) become integers.
+        if series.notna().all() and (series % 1 == 0).all():
+            return pd.to_numeric(series.astype("int64"), downcast="integer")
+    return series
+
+
+def clean(df):
+    """Return the canonical, typed copy of a freshly loaded frame."""
+    df = df.copy()
+    df.columns = df.columns.str.strip().str.lower()
+
+    if "docdate" in df.columns:
+        df["docdate"] = pd.to_datetime(df["docdate"], errors="coerce")
+
+    for col in df.columns:
+        if col in CATEGORICAL_COLUMNS:
+            df[col] = to_categorical(df[col], ordered=col in ORDERED_COLUMNS)
+        elif df[col].dtype == object or pd.api.types.is_string_dtype(df[col]):
+            df[col] = blank_placeholders(df[col])
+        elif col in NUMERIC_COLUMNS:
+            df[col] = downcast_numeric(df[col])
+    return df
@@ -0,0 +1,97 @@
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+from customers import FILTERS
+from data_sources import dataset_version
+from preprocess import PLACEHOLDERS
+
+# === Data-Quality Profile ===
+# One factorize per column gives the missing and placeholder counts,
+# the distinct count and the top value with its frequency; min/max come
+# from the same column where it has an order. The Facts page reads every
+# per-column number from this table instead of re-scanning the data for
+# each section. Columns can be profiled on a thread pool
+# (DASHBOARD_PROFILE_WORKERS); the result is memoized per dataset version.
+
+WORKERS = int(os.environ.get("DASHBOARD_PROFILE_WORKERS", "1"))
+
+FIELDS = ["dtype", "rows", "missing", "placeholders", "distinct", "top", "freq", "min", "max"]
+
+
+def _has_order(series):
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        return series.dtype.ordered
+    return (pd.api.types.is_numeric_dtype(series) and not pd.api.types.is_bool_dtype(series)) \
+        or pd.api.types.is_datetime64_any_dtype(series)
+
+
+def profile_column(series):
+    """The profile row for one column."""
+    codes, uniques = pd.factorize(series)
+    # factorize + bincount is the cheapest exact count for high-cardinality floats
+    uniques = pd.Index(uniques)
+    counts = np.bincount(codes[codes >= 0], minlength=len(uniques))
+
+    # preprocess.clean already blanks placeholders; this catches any it did not see
+    placeholders = 0
+    if series.dtype == object or pd.api.types.is_string_dtype(series):
+        is_placeholder = np.asarray(uniques.astype(str).str.strip().str.upper().isin(PLACEHOLDERS))
+        placeholders = int(counts[is_placeholder].sum())
+        uniques, counts = uniques[~is_placeholder], counts[~is_placeholder]
+
+    top, freq = "N/A", 0
+    if len(counts):
+        freq = int(counts.max())
+        ties = uniques[counts == freq]
+        # Ties go to the smallest value, as Series.mode() would pick
+        try:
+            top = ties.sort_values()[0]
+        except TypeError:
+            top = ties[0]
+
+    low = high = None
+    if _has_order(series):
+        low, high = series.min(), series.max()
+
+    return {
+        "dtype": str(series.dtype),
+        "rows": len(series),
+        "missing": len(series) - int(counts.sum()),
+        "placeholders": placeholders,
+        "distinct": len(counts),
+        "top": top,
+        "freq": freq,
+        "min": low,
+        "max": high,
+    }
+
+
+@st.cache_data(show_spinner=False)
+def _profile(_df, dataset_version, columns, row_filter, _workers):
+    mask = FILTERS[row_filter]
+    df = _df if mask is None else _df[mask(_df)]
+    series = [df[col] for col in columns]
+    if _workers > 1 and len(series) > 1:
+        with ThreadPoolExecutor(max_workers=_workers, thread_name_prefix="profile") as pool:
+            rows = list(pool.map(profile_column, series))
+    else:
+        rows = [profile_column(s) for s in series]
+    return pd.DataFrame(rows, index=pd.Index(columns), columns=FIELDS)
+
+
+def profile(df, row_filter="all", workers=None, columns=None):
+    """One row per column of ``df`` (after ``row_filter``) with the fields in ``FIELDS``.
+
+    ``columns`` limits the profile to those columns; the filter still sees all of ``df``.
+
+    ``missing`` counts NA and placeholder values; ``distinct``, ``top`` and
+    ``freq`` ignore both. ``min``/``max`` are None for unordered columns and NA
+    when an ordered column has no values.
+    """
+    workers = WORKERS if workers is None else workers
+    columns = tuple(df.columns if columns is None else columns)
+    return _profile(df, dataset_version(df), columns, row_filter, workers)
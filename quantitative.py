@@ -84,186 +84,108 @@ import streamlit as st
 import matplotlib.pyplot as plt
 import seaborn as sns
 import pandas as pd
+import numpy as np
+import os
+from matplotlib.colors import LogNorm
+import figcache
+
+# === Large-N regplot ===
+# Past a few hundred thousand rows a scatter of every transaction plus
+# seaborn's 1000-resample bootstrap CI is slow and unreadable. Above
+# LARGE_N_ROWS the regplot is drawn as a 2-D count grid with the
+# closed-form OLS line and its analytic 95% confidence band instead.
+LARGE_N_ROWS = int(os.environ.get("DASHBOARD_LARGE_N_ROWS", "50000"))
+DENSITY_BINS = 80
+
+
+def _edges(values, bins):
+    lo, hi = float(values.min()), float(values.max())
+    if lo == hi:
+        lo, hi = lo - 0.5, hi + 0.5
+    return np.linspace(lo, hi, bins + 1)
+
+
+def density_grid(x, y, bins=DENSITY_BINS):
+    """Counts of (x, y) on a bins x bins grid, with one bincount pass."""
+    x_edges, y_edges = _edges(x, bins), _edges(y, bins)
+    ix = np.clip(((x - x_edges[0]) / (x_edges[1] - x_edges[0])).astype(np.int64), 0, bins - 1)
+    iy = np.clip(((y - y_edges[0]) / (y_edges[1] - y_edges[0])).astype(np.int64), 0, bins - 1)
+    counts = np.bincount(ix * bins + iy, minlength=bins * bins).reshape(bins, bins)
+    return counts, x_edges, y_edges
+
+
+def ols_band(x, y, grid, z=1.96):
+    """OLS fit of y on x over ``grid`` with its 95% confidence band, from sums only."""
+    n = len(x)
+    x_mean, y_mean = x.mean(), y.mean()
+    dx, dy = x - x_mean, y - y_mean
+    sxx, sxy, syy = np.dot(dx, dx), np.dot(dx, dy), np.dot(dy, dy)
+    slope = sxy / sxx if sxx else 0.0
+    fit = y_mean + slope * (grid - x_mean)
+    residual_var = max(syy - slope * sxy, 0.0) / max(n - 2, 1)
+    half_width = z * np.sqrt(residual_var * (1 / n + (grid - x_mean) ** 2 / (sxx or 1.0)))
+    return fit, fit - half_width, fit + half_width
+
+
+def density_regplot(x, y, ax):
+    """Large-N stand-in for ``sns.regplot``: count grid plus analytic regression band."""
+    x = x.to_numpy(dtype="float64", na_value=np.nan)
+    y = y.to_numpy(dtype="float64", na_value=np.nan)
+    keep = np.isfinite(x) & np.isfinite(y)
+    x, y = x[keep], y[keep]
+    counts, x_edges, y_edges = density_grid(x, y)
+    mesh = ax.pcolormesh(x_edges, y_edges, np.ma.masked_equal(counts.T, 0),
+                         cmap='Blues', norm=LogNorm())
+    ax.figure.colorbar(mesh, ax=ax, label="Transactions")
+    grid = np.linspace(x_edges[0], x_edges[-1], 100)
+    fit, lower, upper = ols_band(x, y, grid)
+    ax.plot(grid, fit, color='#e74c3c')
+    ax.fill_between(grid, lower, upper, color='#e74c3c', alpha=0.15)
+
+def plot_and_insight(df_plot, x_col, x_label, summary_df=None):
+    # Start the AI action plan while the chart renders (DASHBOARD_AI_PREFETCH=1)
+    from ai_agent import prefetch_recommendation
+    prefetch_recommendation(x_col, predefined_insights.get(x_col, [f"No insights available for {x_col}."]), summary_df)
 
-def plot_and_insight(df_plot, x_col, x_label):
     corr = df_plot['discount'].corr(df_plot[x_col]) if pd.api.types.is_numeric_dtype(df_plot[x_col]) else None
 
     with st.container():
         # Plotting first
         if x_col != 'discount' and corr is not None:
-            fig, ax = plt.subplots(figsize=(7, 4))
-            sns.regplot(
-                data=df_plot, x=x_col, y='discount',
-                scatter_kws={'alpha': 0.6, 'color': '#3498db'},
-                line_kws={'color': '#e74c3c'}, ax=ax
-            )
-            ax.set(title=f"{x_label} vs Discount", xlabel=x_label, ylabel="Discount")
-            ax.text(0.95, 0.05, f"r = {corr:.2f}", transform=ax.transAxes, ha='right',
-                    bbox=dict(boxstyle="round", fc="lightyellow"))
-            st.pyplot(fig)
+            large_n = len(df_plot) > LARGE_N_ROWS
+
+            def draw():
+                fig, ax = plt.subplots(figsize=(7, 4))
+                if large_n:
+                    density_regplot(df_plot[x_col], df_plot['discount'], ax)
+                else:
+                    sns.regplot(
+                        data=df_plot, x=x_col, y='discount',
+                        scatter_kws={'alpha': 0.6, 'color': '#3498db'},
+                        line_kws={'color': '#e74c3c'}, ax=ax
+                    )
+                ax.set(title=f"{x_label} vs Discount", xlabel=x_label, ylabel="Discount")
+                ax.text(0.95, 0.05, f"r = {corr:.2f}", transform=ax.transAxes, ha='right',
+                        bbox=dict(boxstyle="round", fc="lightyellow"))
+                return fig
+            figcache.pyplot(draw, df_plot, "quantitative", x_col, (x_label, large_n))
 
         elif x_col != 'discount':
-            fig, ax = plt.subplots(figsize=(10, 6))
-            sns.boxplot(data=df_plot, x=x_col, y='discount', palette='Set2', ax=ax)
-            ax.set(title=f"Discount by {x_label}", xlabel=x_label, ylabel="Discount")
-            plt.xticks(rotation=45)
-            st.pyplot(fig)
-
-        # -------------------- Static Summary Table --------------------
+            def draw():
+                fig, ax = plt.subplots(figsize=(10, 6))
+                sns.boxplot(data=df_plot, x=x_col, y='discount', palette='Set2', ax=ax)
+                ax.set(title=f"Discount by {x_label}", xlabel=x_label, ylabel="Discount")
+                plt.xticks(rotation=45)
+                return fig
+            figcache.pyplot(draw, df_plot, "quantitative", x_col, (x_label,))
+
+        # -------------------- Summary Table --------------------
         st.markdown("### Summary Table")
 
-        if x_col == "qty":
-            summary_data = [
-                ["Valid Records", "10,000"],
-                ["Correlation Coefficient", "0.07 (Very Weak Positive)"],
-                ["Most Common Qty Range", "1–2"],
-                ["High Discount Given When Qty Between", "1–2"],
-                ["Avg Discount (Low Qty: 1–2)", "₹4,929.15"],
-                ["Avg Discount (High Qty: >5)", "₹5,296.42"],
-                ["Max Discount Given", "₹42,327.08"],
-                ["Min Discount Given", "₹0.03"],
-                ["Trend", "18.24% of records show increase in both qty & discount"],
-                ["Top Brands in Bulk Purchases", "MIA, ZOYA"]
-            ]
-
-
-        elif x_col == "value":
-            summary_data = [
-                ["Valid Records", "10,000"],
-                ["Correlation Coefficient", "0.81 (Very Strong Positive)"],
-                ["Avg Discount (High-Value Items)", "₹17,155.44"],
-                ["Avg Discount (Low-Value Items)", "₹59.38"],
-                ["Trend", "79.8% of records move in same direction"],
-                ["Top Brands in High-Value Sales", "TANISHQ, ZOYA"],
-                ["Top Category", "DIA (Diamond)"],
-                ["Highest Discount Given", "₹919,871.16"],
-                ["Highest Value Item", "₹3,762,273.04"]
-            ]
-
-        elif x_col == "wt":
-            summary_data = [
-                ["Valid Records", "10,000"],
-                ["Correlation Coefficient", "0.43 (Moderate Positive)"],
-                ["Avg Discount (High-Weight Items)", "₹15,845.21"],
-                ["Avg Discount (Low-Weight Items)", "₹1,372.50"],
-                ["Trend Alignment", "67.4% of records move in same direction"],
-                ["Heaviest Item", "215.75g"],
-                ["Highest Discount Given", "₹87,648.19"],
-                ["Top Weight Items with Positive Trend", "3 out of 5"]
-]
-
-
-        elif x_col == "mc":
-            summary_data = [
-                ["Total Valid Records", 10000],
-                ["Max Making Charges", 635241.00],
-                ["Min Making Charges", 153.21],
-                ["Max Discount", 919871.16],
-                ["Min Discount", 0.10],
-                ["Correlation Coefficient (r)", 0.74],
-                ["Records with Discount > ₹50,000", 371],
-                ["Records with MC > ₹50,000", 835],
-                ["Records with Discount > ₹1,00,000", 142]
-            ]
-
-        elif x_col == "goldprice":
-            summary_data = [
-                ["Band", "Gold Price Range", "Number_of_Transactions", "Total_Discount", "Avg_Discount_Per_Transaction"],
-                ["ALL", "ALL", "9416", "₹90,188,826.16", "₹9,573.13"],
-                ["Band 1", "(6.139, 4705.239]", "942", "₹701,544.67", "₹744.74"],
-                ["Band 2", "(4705.239, 8126.192]", "942", "₹1,171,522.55", "₹1,243.65"],
-                ["Band 3", "(8126.192, 11159.796]", "942", "₹2,142,385.99", "₹2,274.30"],
-                ["Band 4", "(11159.796, 14483.656]", "941", "₹3,860,619.45", "₹4,102.68"],
-                ["Band 5", "(14483.656, 18702.65]", "942", "₹4,444,834.58", "₹4,718.51"],
-                ["Band 6", "(18702.65, 25346.76]", "942", "₹5,165,705.94", "₹5,483.76"],
-                ["Band 7", "(25346.76, 34897.071]", "941", "₹5,781,272.14", "₹6,143.75"],
-                ["Band 8", "(34897.071, 57156.118]", "942", "₹7,986,517.43", "₹8,478.26"],
-                ["Band 9", "(57156.118, 128545.746]", "942", "₹18,144,826.18", "₹19,262.02"],
-                ["Band 10", "(128545.746, 1560704.77]", "942", "₹40,644,518.03", "₹43,147.05"]
-            ]
-
-        elif x_col == "stonevalue":
-            summary_data = [
-                ["Category", "Number of Transactions", "Avg Stone Value"],
-                ["SSC", 11, "₹613,822.77"],
-                ["SSB", 27, "₹328,603.27"],
-                ["SSA", 179, "₹120,240.95"],
-                ["DIA", 4132, "₹49,483.55"],
-                ["GIS", 2149, "₹25,830.06"],
-                ["SCS", 429, "₹10,229.55"],
-                ["HCG", 805, "₹6,475.09"],
-                ["MCG", 1512, "₹95.06"],
-                ["LCG", 365, "₹1.65"],
-                ["COI", 213, "₹0.00"],
-                ["PUC", 1, "₹0.00"],
-                ["SIL", 166, "₹0.00"]
-            ]
-
-        elif x_col == "discount":
-            summary_data = [
-                ["Component", "Amount (₹)", "Share (%)"],
-                ["Total Discount", "86,074,077.24", "100.00"],
-                ["IDISC", "85,092,184.79", "98.86"],
-                ["obdisc", "567,065.36", "0.66"],
-                ["GHSDISC", "414,827.09", "0.48"]
-            ]
-
-        elif x_col == "priceband":
-            summary_data = [
-                ["priceband", "Total_Discount", "Number_of_Transactions", "Avg_Discount_Per_Transaction"],
-                ["A(0-25K)", 1694990.12, 2678, 632.931337],
-                ["B(25-50K)", 4600711.79, 2501, 1839.548896],
-                ["C(50-100K)", 9638369.97, 2099, 4591.886598],
-                ["D(1-2L)", 13500152.65, 1154, 11698.572487],
-                ["E(2-3L)", 10494410.92, 465, 22568.625634],
-                ["F(3-4L)", 10444765.99, 263, 39713.939125],
-                ["G(4-5L)", 8390952.71, 174, 48223.866149],
-                ["H(5-6L)", 5463252.09, 101, 54091.604851],
-                ["I(6-7L)", 3879915.31, 62, 62579.279194],
-                ["J(7-8L)", 3715776.46, 42, 88470.868095],
-                ["K(8-10L)", 6078479.92, 45, 135077.331556],
-                ["L(10-12L)", 1581408.54, 15, 105427.236000],
-                ["M(12-15L)", 4367709.06, 18, 242650.503333],
-                ["N(15-20L)", 3140671.90, 9, 348963.544444],
-                ["O(20L+)", 3182963.33, 6, 530493.888333]
-            ]
-
-
-        elif x_col == "totalecband":
-            summary_data = [
-                ["totalecband", "Total_Discount", "Number_of_Transactions", "Avg_Discount_Per_Transaction"],
-                ["A(0-50K)", 3493566.36, 3290, 1061.874274],
-                ["B(50-100K)", 4532868.42, 1856, 2442.278244],
-                ["C(1-2L)", 11417084.56, 1784, 6399.711076],
-                ["D(2-3L)", 6222261.75, 650, 9572.710385],
-                ["E(3-5L)", 13127500.52, 749, 17526.702964],
-                ["F(5-8L)", 10135586.65, 481, 21071.905717],
-                ["G(8-10L)", 9425683.34, 231, 40803.823983],
-                ["H(10L+)", 31446704.26, 501, 62767.872774]
-            ]
-
-
-        elif x_col == "clusterecband":
-            summary_data = [
-                ["clusterecband", "Total_Discount", "Number_of_Transactions", "Avg_Discount_Per_Transaction"],
-                ["A(0-50K)", 3769940.30, 3502, 1076.510651],
-                ["B(50-100K)", 4833260.37, 1788, 2703.165755],
-                ["C(1-2L)", 11774402.33, 1582, 7442.732193],
-                ["D(2-3L)", 6083833.29, 548, 11101.885566],
-                ["E(3-5L)", 13527912.27, 685, 19748.777036],
-                ["F(5-8L)", 9809897.01, 392, 25025.247474],
-                ["G(8-10L)", 9294238.54, 221, 42055.378009],
-                ["H(10L+)", 30524351.13, 409, 74631.665355]
-    ]
-
+        if summary_df is not None:
+            st.dataframe(summary_df, use_container_width=True)
         else:
-            summary_data = [["No data available", "—"]]
-
-        # ✅ Flexible header + dataframe rendering
-        columns = summary_data[0]                   # First row is header
-        data_rows = summary_data[1:]                # Rest are data
-        summary_table = pd.DataFrame(data_rows, columns=columns)
-        st.dataframe(summary_table, use_container_width=True)
+            st.markdown("No data available")
 
 #Ai Agent Logic
 
@@ -272,14 +194,6 @@ def plot_and_insight(df_plot, x_col, x_label):
     # Safely fetch insights
     col_insights = predefined_insights.get(x_col, [f"No insights available for {x_col}."])
 
-    # Handle summary conversion if it's a list
-    if isinstance(summary_data, list) and len(summary_data) > 1:
-        summary_df = pd.DataFrame(summary_data[1:], columns=summary_data[0])
-    elif isinstance(summary_data, pd.DataFrame):
-        summary_df = summary_data
-    else:
-        summary_df = None
-
     # Call AI insight panel
     display_insight_panel(
         x_col=x_col,
@@ -0,0 +1,146 @@
+import argparse
+import os
+from pathlib import Path
+
+import pandas as pd
+
+from ingest import file_hash
+
+# === Snapshot Location ===
+# Parsed workbooks are stored as Parquet files named after the SHA-256 of the
+# downloaded bytes, so a changed workbook can never be served from a stale file.
+SNAPSHOT_DIR = Path(os.environ.get("DASHBOARD_SNAPSHOT_DIR", ".snapshots"))
+SNAPSHOT_SUFFIX = ".parquet"
+
+
+def snapshot_path(digest):
+    return SNAPSHOT_DIR / f"{digest}{SNAPSHOT_SUFFIX}"
+
+
+def parse_excel(path):
+    from ingest import read_xlsx_batched
+
+    return read_xlsx_batched(path)
+
+
+# === Arrow Compatibility ===
+def _arrow_safe(df):
+    # Excel columns often mix numbers and text (e.g. "NULL" next to integers).
+    # Arrow needs one type per column, so such columns are stored as strings.
+    # Columns are fixed in place: ``df`` is always a freshly parsed frame.
+    import pyarrow as pa
+
+    for col in df.select_dtypes(include="object").columns:
+        try:
+            pa.array(df[col], from_pandas=True)
+        except (pa.ArrowInvalid, pa.ArrowTypeError):
+            df[col] = df[col].where(df[col].isna(), df[col].astype(str))
+    return df
+
+
+# === Read / Write ===
+def load_snapshot(digest):
+    path = snapshot_path(digest)
+    if not path.exists():
+        return None
+    try:
+        df = pd.read_parquet(path)
+    except Exception:
+        # A truncated or unreadable snapshot is treated as a miss and rebuilt.
+        path.unlink(missing_ok=True)
+        return None
+    df.attrs["dataset_version"] = digest
+    return df
+
+
+def _write_parquet(df, path, slice_rows=1_000_000):
+    # Convert and write in row slices so the Arrow copy of the frame never
+    # exists in full next to the pandas one.
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    schema = pa.Schema.from_pandas(df, preserve_index=False)
+    with pq.ParquetWriter(path, schema) as writer:
+        for start in range(0, max(len(df), 1), slice_rows):
+            part = df.iloc[start:start + slice_rows]
+            writer.write_table(pa.Table.from_pandas(part, schema=schema, preserve_index=False))
+
+
+def save_snapshot(df, digest):
+    # ``df`` must already be Arrow-safe; see ``load_or_parse``.
+    SNAPSHOT_DIR.mkdir(parents=True, exist_ok=True)
+    path = snapshot_path(digest)
+    tmp_path = path.with_suffix(path.suffix + ".tmp")
+    _write_parquet(df, tmp_path)
+    os.replace(tmp_path, path)  # atomic, so readers never see a partial file
+    return path
+
+
+def load_or_parse(digest, parse):
+    """Return the snapshot for ``digest``, calling ``parse()`` only on a miss."""
+    df = load_snapshot(digest)
+    if df is not None:
+        return df
+
+    # Normalise before saving so a fresh parse and a snapshot load look identical.
+    df = _arrow_safe(parse())
+    save_snapshot(df, digest)
+    df.attrs["dataset_version"] = digest
+    return df
+
+
+def invalidate(digest=None):
+    """Delete one snapshot, or every snapshot when ``digest`` is None."""
+    if not SNAPSHOT_DIR.exists():
+        return 0
+    if digest is not None:
+        paths = [snapshot_path(digest)]
+    else:
+        paths = list(SNAPSHOT_DIR.glob(f"*{SNAPSHOT_SUFFIX}"))
+    removed = 0
+    for path in paths:
+        if path.exists():
+            path.unlink()
+            removed += 1
+    return removed
+
+
+def list_snapshots():
+    if not SNAPSHOT_DIR.exists():
+        return []
+    return sorted(SNAPSHOT_DIR.glob(f"*{SNAPSHOT_SUFFIX}"))
+
+
+# === CLI ===
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Manage parsed-dataset snapshots.")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    rebuild = sub.add_parser("rebuild", help="Re-parse a workbook and overwrite its snapshot.")
+    rebuild.add_argument("source", help="Path or URL of the workbook (.xlsx, .csv or .parquet)")
+
+    drop = sub.add_parser("invalidate", help="Delete snapshots.")
+    drop.add_argument("digest", nargs="?", help="Snapshot hash to delete (default: all)")
+
+    sub.add_parser("list", help="List stored snapshots.")
+
+    args = parser.parse_args(argv)
+
+    if args.command == "rebuild":
+        from data_sources import source_from_spec
+
+        source = source_from_spec(args.source)
+        with source.local_copy() as path:
+            digest = file_hash(path)
+            invalidate(digest)
+            df = load_or_parse(digest, lambda: source.parse(path))
+        print(f"Rebuilt {snapshot_path(digest)}: {df.shape[0]} rows, {df.shape[1]} columns")
+    elif args.command == "invalidate":
+        print(f"Removed {invalidate(args.digest)} snapshot(s)")
+    elif args.command == "list":
+        for path in list_snapshots():
+            print(f"{path.stem}  {path.stat().st_size / 1e6:.1f} MB")
+
+
+if __name__ == "__main__":
+    main()
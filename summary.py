@@ -0,0 +1,355 @@
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+import approx
+from data_sources import dataset_version
+
+# === Summary Engine ===
+# The summary tables under the quantitative and qualitative plots, computed
+# from the live frame instead of hard-coded literals. Each table is built
+# with one vectorized pass and memoized per (dataset version, x_col,
+# filter), so a rerun costs a cache lookup. New tables are declared with
+# ``@summary("x_col")``.
+
+# Row filters, matching the ones main.py applies before each plot
+FILTERS = {
+    "all": None,
+    "discounted": lambda df, x_col: df["discount"] > 0,
+    "positive": lambda df, x_col: (df[x_col] > 0) & (df["discount"] > 0),
+    "components": lambda df, x_col: (df["discount"] > 0) & (
+        (df["idisc"] > 0) | (df["ghsdisc"] > 0) | (df["obdisc"] > 0)
+    ),
+}
+
+SUMMARIES = {}
+
+# Variants built from approx sketches, used instead when approx.use_approx says so.
+# They are called as ``func(df, base_df, row_filter)`` so their sketches can be
+# merged from the monthly partitions of the unfiltered frame.
+APPROXIMATE_SUMMARIES = {}
+
+
+def summary(x_col, approximate=False):
+    def register(func):
+        (APPROXIMATE_SUMMARIES if approximate else SUMMARIES)[x_col] = func
+        return func
+    return register
+
+
+# === Formatting helpers ===
+
+def _rupees(value):
+    return f"₹{value:,.2f}"
+
+
+def _correlation_label(r):
+    if pd.isna(r):
+        return "n/a"
+    strength = abs(r)
+    if strength < 0.2:
+        label = "Very Weak"
+    elif strength < 0.4:
+        label = "Weak"
+    elif strength < 0.6:
+        label = "Moderate"
+    elif strength < 0.8:
+        label = "Strong"
+    else:
+        label = "Very Strong"
+    return f"{r:.2f} ({label} {'Positive' if r >= 0 else 'Negative'})"
+
+
+def _same_direction_pct(x, y):
+    # Share of rows on the same side of the mean for both columns
+    x = x.to_numpy(dtype="float64")
+    y = y.to_numpy(dtype="float64")
+    if len(x) == 0:
+        return 0.0
+    return float(np.mean(np.sign(x - x.mean()) == np.sign(y - y.mean())) * 100)
+
+
+def _top_values(series, n=2):
+    top = series.value_counts().head(n).index
+    return ", ".join(map(str, top)) if len(top) else "—"
+
+
+def _high_low_split(df, x_col):
+    """Mean discount above and at/below the median of ``x_col``."""
+    high = df[x_col] > df[x_col].median()
+    return df.loc[high, "discount"].mean(), df.loc[~high, "discount"].mean(), high
+
+
+def _band_totals(df, x_col):
+    grouped = df.groupby(x_col, observed=True)["discount"].agg(["sum", "count"])
+    table = pd.DataFrame({
+        x_col: grouped.index.astype(str),
+        "Total_Discount": grouped["sum"].round(2).to_numpy(),
+        "Number_of_Transactions": grouped["count"].to_numpy(),
+        "Avg_Discount_Per_Transaction": (grouped["sum"] / grouped["count"]).round(2).to_numpy(),
+    })
+    return table
+
+
+def _group_totals(df, x_col):
+    # One groupby for every per-group column the qualitative tables show
+    grouped = df.groupby(x_col, observed=True).agg(
+        qty=("qty", "sum"),
+        value=("value", "sum"),
+        discount=("discount", "sum"),
+        idisc=("idisc", "sum"),
+        obdisc=("obdisc", "sum"),
+        ghsdisc=("ghsdisc", "sum"),
+        transactions=("discount", "size"),
+        returns=("returned", "sum"),
+        customers=("customerno", "nunique"),
+    )
+    grouped["avg_discount"] = grouped["discount"] / grouped["transactions"]
+    grouped["avg_bill"] = grouped["value"] / grouped["transactions"]
+    grouped.index = grouped.index.astype(str)
+    return grouped.round(2)
+
+
+# === Quantitative tables ===
+
+@summary("qty")
+def _qty(df):
+    high_discount = df["discount"] >= df["discount"].quantile(0.9)
+    low_qty = df["qty"] <= 2
+    bulk = df["qty"] > 5
+    return pd.DataFrame([
+        ["Valid Records", f"{len(df):,}"],
+        ["Correlation Coefficient", _correlation_label(df["qty"].corr(df["discount"]))],
+        ["Most Common Qty", _top_values(df["qty"], 1)],
+        ["Most Common Qty Among Top 10% Discounts", _top_values(df.loc[high_discount, "qty"], 1)],
+        ["Avg Discount (Low Qty: 1–2)", _rupees(df.loc[low_qty, "discount"].mean())],
+        ["Avg Discount (High Qty: >5)", _rupees(df.loc[bulk, "discount"].mean())],
+        ["Max Discount Given", _rupees(df["discount"].max())],
+        ["Min Discount Given", _rupees(df["discount"].min())],
+        ["Trend", f"{_same_direction_pct(df['qty'], df['discount']):.1f}% of records move in same direction"],
+        ["Top Brands in Bulk Purchases", _top_values(df.loc[bulk, "brand"])],
+    ], columns=["Metric", "Value"])
+
+
+@summary("value")
+def _value(df):
+    high_avg, low_avg, high = _high_low_split(df, "value")
+    top_items = df.nlargest(5, "value")
+    return pd.DataFrame([
+        ["Valid Records", f"{len(df):,}"],
+        ["Correlation Coefficient", _correlation_label(df["value"].corr(df["discount"]))],
+        [f"Avg Discount (High-Value Items > {_rupees(df['value'].median())})", _rupees(high_avg)],
+        ["Avg Discount (Low-Value Items)", _rupees(low_avg)],
+        ["Trend", f"{_same_direction_pct(df['value'], df['discount']):.1f}% of records move in same direction"],
+        ["Top Brands in High-Value Sales", _top_values(df.loc[high, "brand"])],
+        ["Top Category (Top 5 Values)", _top_values(top_items["totcategory"], 1)],
+        ["Highest Discount Given", _rupees(df["discount"].max())],
+        ["Highest Value Item", _rupees(df["value"].max())],
+    ], columns=["Metric", "Value"])
+
+
+@summary("wt")
+def _wt(df):
+    high_avg, low_avg, _ = _high_low_split(df, "wt")
+    heaviest = df.nlargest(5, "wt")
+    positive = int((heaviest["discount"] > df["discount"].median()).sum())
+    return pd.DataFrame([
+        ["Valid Records", f"{len(df):,}"],
+        ["Correlation Coefficient", _correlation_label(df["wt"].corr(df["discount"]))],
+        ["Avg Discount (High-Weight Items)", _rupees(high_avg)],
+        ["Avg Discount (Low-Weight Items)", _rupees(low_avg)],
+        ["Trend Alignment", f"{_same_direction_pct(df['wt'], df['discount']):.1f}% of records move in same direction"],
+        ["Heaviest Item", f"{df['wt'].max():.2f}g"],
+        ["Highest Discount Given", _rupees(df["discount"].max())],
+        ["Top Weight Items with Above-Median Discount", f"{positive} out of {len(heaviest)}"],
+    ], columns=["Metric", "Value"])
+
+
+@summary("mc")
+def _mc(df):
+    return pd.DataFrame([
+        ["Total Valid Records", len(df)],
+        ["Max Making Charges", round(df["mc"].max(), 2)],
+        ["Min Making Charges", round(df["mc"].min(), 2)],
+        ["Max Discount", round(df["discount"].max(), 2)],
+        ["Min Discount", round(df["discount"].min(), 2)],
+        ["Correlation Coefficient (r)", round(df["mc"].corr(df["discount"]), 2)],
+        ["Records with Discount > ₹50,000", int((df["discount"] > 50_000).sum())],
+        ["Records with MC > ₹50,000", int((df["mc"] > 50_000).sum())],
+        ["Records with Discount > ₹1,00,000", int((df["discount"] > 100_000).sum())],
+    ], columns=["Metric", "Value"])
+
+
+@summary("goldprice")
+def _goldprice(df):
+    bands = pd.qcut(df["goldprice"], 10, duplicates="drop")
+    grouped = df.groupby(bands, observed=True)["discount"].agg(["sum", "count"])
+    rows = [["ALL", "ALL", f"{len(df)}", _rupees(df["discount"].sum()),
+             _rupees(df["discount"].mean() if len(df) else 0)]]
+    for i, (interval, band) in enumerate(grouped.iterrows(), start=1):
+        rows.append([f"Band {i}", f"({interval.left:.3f}, {interval.right:.3f}]", f"{int(band['count'])}",
+                     _rupees(band["sum"]), _rupees(band["sum"] / band["count"])])
+    return pd.DataFrame(rows, columns=["Band", "Gold Price Range", "Number_of_Transactions",
+                                       "Total_Discount", "Avg_Discount_Per_Transaction"])
+
+
+@summary("goldprice", approximate=True)
+def _goldprice_approx(df, base_df, row_filter):
+    # Decile edges from the merged monthly KLL sketches instead of qcut's full sort
+    mask = FILTERS[row_filter]
+    sketch = approx.sketches(base_df, f"goldprice-{row_filter}", quantiles=["goldprice"],
+                             mask=None if mask is None else lambda d: mask(d, "goldprice"))["goldprice"]
+    edges = np.unique(sketch.quantiles(np.linspace(0, 1, 11)))
+    bands = pd.cut(df["goldprice"], edges, include_lowest=True) if len(edges) > 1 else df["goldprice"]
+    grouped = df.groupby(bands, observed=True)["discount"].agg(["sum", "count"])
+    edge_error = f"±{sketch.rank_error:.1%}"
+    rows = [["ALL", "ALL", f"{len(df)}", _rupees(df["discount"].sum()),
+             _rupees(df["discount"].mean() if len(df) else 0), edge_error]]
+    for i, (interval, band) in enumerate(grouped.iterrows(), start=1):
+        rows.append([f"Band {i}", f"≈({interval.left:.3f}, {interval.right:.3f}]", f"{int(band['count'])}",
+                     _rupees(band["sum"]), _rupees(band["sum"] / band["count"]), edge_error])
+    return pd.DataFrame(rows, columns=["Band", "Gold Price Range", "Number_of_Transactions",
+                                       "Total_Discount", "Avg_Discount_Per_Transaction", "Edge Rank Error"])
+
+
+@summary("stonevalue")
+def _stonevalue(df):
+    grouped = df.groupby("totcategory", observed=True)["stonevalue"].agg(["count", "mean"])
+    grouped = grouped.sort_values("mean", ascending=False)
+    return pd.DataFrame({
+        "Category": grouped.index.astype(str),
+        "Number of Transactions": grouped["count"].to_numpy(),
+        "Avg Stone Value": [_rupees(v) for v in grouped["mean"]],
+    })
+
+
+@summary("discount")
+def _discount(df):
+    total = df["discount"].sum()
+    rows = [["Total Discount", f"{total:,.2f}", "100.00"]]
+    for col, label in [("idisc", "IDISC"), ("obdisc", "obdisc"), ("ghsdisc", "GHSDISC")]:
+        amount = df[col].sum()
+        rows.append([label, f"{amount:,.2f}", f"{amount / total * 100:.2f}" if total else "0.00"])
+    return pd.DataFrame(rows, columns=["Component", "Amount (₹)", "Share (%)"])
+
+
+@summary("priceband")
+def _priceband(df):
+    return _band_totals(df, "priceband")
+
+
+@summary("totalecband")
+def _totalecband(df):
+    return _band_totals(df, "totalecband")
+
+
+@summary("clusterecband")
+def _clusterecband(df):
+    return _band_totals(df, "clusterecband")
+
+
+# === Qualitative tables ===
+
+@summary("brand")
+def _brand(df):
+    grouped = _group_totals(df, "brand").sort_values("avg_discount", ascending=False)
+    return pd.DataFrame({
+        "Brand": grouped.index,
+        "Total Purchase Value": [f"₹{v:,.0f}" for v in grouped["value"]],
+        "Average Discount": [_rupees(v) for v in grouped["avg_discount"]],
+        "Number Of Transactions": grouped["transactions"].to_numpy(),
+        "Number Of Returns": grouped["returns"].astype(int).to_numpy(),
+    })
+
+
+@summary("region")
+def _region(df):
+    grouped = _group_totals(df, "region").sort_index()
+    return pd.DataFrame({
+        "Region": grouped.index,
+        "Total Quantity": grouped["qty"].to_numpy(),
+        "Total Value": grouped["value"].to_numpy(),
+        "Total Discount": grouped["discount"].to_numpy(),
+        "Item Level Discount": grouped["idisc"].to_numpy(),
+        "Other Bill Level Discount": grouped["obdisc"].to_numpy(),
+        "GHS Discount": grouped["ghsdisc"].to_numpy(),
+        "Transaction Count": grouped["transactions"].to_numpy(),
+        "Avg Discount per Transaction": grouped["avg_discount"].to_numpy(),
+    })
+
+
+@summary("level")
+def _level(df):
+    grouped = _group_totals(df, "level").sort_index()
+    return pd.DataFrame({
+        "Channel Level": grouped.index,
+        "Number Of Transactions": grouped["transactions"].to_numpy(),
+        "Total Discount": grouped["discount"].to_numpy(),
+        "Item Level Discount": grouped["idisc"].to_numpy(),
+        "Other Bill Discount": grouped["obdisc"].to_numpy(),
+        "GHS Discount": grouped["ghsdisc"].to_numpy(),
+        "Total Value": grouped["value"].to_numpy(),
+        "Total Quantity": grouped["qty"].to_numpy(),
+        "Unique Customers": grouped["customers"].to_numpy(),
+        "Avg Discount per Transaction": grouped["avg_discount"].to_numpy(),
+        "Avg Bill Value": grouped["avg_bill"].to_numpy(),
+    })
+
+
+@summary("rcluster")
+def _rcluster(df):
+    grouped = _group_totals(df, "rcluster").sort_index()
+    return pd.DataFrame({
+        "Rcluster": grouped.index,
+        "Total Discount": grouped["discount"].to_numpy(),
+        "Item Level Discount": grouped["idisc"].to_numpy(),
+        "Other Bill Discount": grouped["obdisc"].to_numpy(),
+        "GHS Discount": grouped["ghsdisc"].to_numpy(),
+        "Total Value": grouped["value"].to_numpy(),
+        "Total Quantity": grouped["qty"].to_numpy(),
+        "Unique Customers": grouped["customers"].to_numpy(),
+        "Transactions": grouped["transactions"].to_numpy(),
+        "Avg Discount per Transaction": grouped["avg_discount"].to_numpy(),
+        "Avg Bill Value": grouped["avg_bill"].to_numpy(),
+    })
+
+
+@summary("totcategory")
+def _totcategory(df):
+    grouped = _group_totals(df, "totcategory").sort_values("discount", ascending=False)
+    return pd.DataFrame({
+        "Totcategory": grouped.index,
+        "Number of Transactions": grouped["transactions"].to_numpy(),
+        "Total Value": grouped["value"].to_numpy(),
+        "Total Discount": grouped["discount"].to_numpy(),
+        "Avg Discount per Transaction": grouped["avg_discount"].to_numpy(),
+    })
+
+
+@summary("amcb")
+def _amcb(df):
+    return _band_totals(df, "amcb")
+
+
+@summary("day")
+def _day(df):
+    return _band_totals(df, "day")
+
+
+# === Engine ===
+
+@st.cache_data(show_spinner=False)
+def _build(_df, dataset_version, x_col, row_filter, approximate):
+    mask = FILTERS[row_filter]
+    df = _df if mask is None else _df[mask(_df, x_col)]
+    if approximate:
+        return APPROXIMATE_SUMMARIES[x_col](df, _df, row_filter)
+    return SUMMARIES[x_col](df)
+
+
+def summary_table(df, x_col, row_filter="all"):
+    """The summary table for ``x_col`` over ``df`` filtered by ``row_filter``, or None."""
+    if x_col not in SUMMARIES:
+        return None
+    approximate = x_col in APPROXIMATE_SUMMARIES and approx.use_approx(df)
+    return _build(df, dataset_version(df), x_col, row_filter, approximate)
@@ -6,6 +6,9 @@ import seaborn as sns
 import matplotlib.ticker as ticker
 from matplotlib.ticker import MaxNLocator
 from ai_agent import display_insight_panel  # Groq AI integration
+from derived import DAY_ORDER
+import figcache
+import periods
 
 # === Predefined insights by plot ===
 predefined_insights = {
@@ -56,43 +59,89 @@ def format_summary(summary_data):
         return "Invalid summary format."
     return "\n".join([f"• {' — '.join(map(str, row))}" for row in summary_data])
 
+# === Calendar / day-of-month views ===
+VIEWS = ["Day of Month", "Calendar"]
+
+
+def fold_label(df):
+    """Subtitle for the day-of-month view, which folds every month onto days 1-31."""
+    months = periods.months_spanned(df)
+    return "1-Month View" if months <= 1 else f"{months} Months Folded by Day"
+
+
+def select_view(df, plot_key):
+    # Multi-month data opens on the calendar view
+    default = 1 if periods.months_spanned(df) > 1 else 0
+    return st.radio("View", VIEWS, index=default, horizontal=True, key=f"ts_view_{plot_key}")
+
+
+def calendar_view(df, plot_key, title, ylabel, metrics, row_filter, by=None, stat="mean"):
+    """Plot ``metrics`` on the calendar and show the period-over-period table."""
+    col1, col2 = st.columns(2)
+    freq = col1.selectbox("Frequency", list(periods.FREQUENCIES), key=f"ts_freq_{plot_key}")
+    window = col2.number_input("Rolling Window (periods)", min_value=1, max_value=31, value=1,
+                               key=f"ts_window_{plot_key}")
+    lines = pd.concat({metric: periods.series(df, metric, freq, row_filter, by, stat, window)
+                       for metric in metrics}, names=['metric']).rename('value').reset_index()
+    hue = by if by else ('metric' if len(metrics) > 1 else None)
+    rolling = f", {window}-period rolling" if window > 1 else ""
+    def draw():
+        plt.figure(figsize=(14, 6))
+        sns.lineplot(data=lines, x='date', y='value', hue=hue, marker='o')
+        plt.title(f"{title} ({freq}{rolling})")
+        plt.xlabel("Date")
+        plt.ylabel(ylabel)
+        plt.grid(True)
+        plt.tight_layout()
+        return plt.gcf()
+    figcache.pyplot(draw, df, "timeseries", plot_key, ("calendar", freq, window))
+
+    changes = pd.concat({metric: periods.period_over_period(df, metric, freq, row_filter, by, stat)
+                         for metric in metrics}, names=['metric']).reset_index()
+    changes['date'] = changes['date'].dt.strftime('%Y-%m-%d')
+    if len(metrics) == 1:
+        changes = changes.drop(columns='metric')
+    st.markdown(f"**{freq} Period-over-Period Change**")
+    st.dataframe(changes.rename(columns={'date': 'Period Start', 'metric': 'Metric', by: str(by).capitalize()}).round(2), use_container_width=True)
+
+
 # === Main function for plotting and insights ===
 def plot_and_insight(df, plot_key, plot_label=""):
-    df.columns = df.columns.str.strip().str.lower()
-    df['docdate'] = pd.to_datetime(df['docdate'], errors='coerce')
     df = df.dropna(subset=['docdate'])
-    df['day'] = df['docdate'].dt.day
 
     summary_df = None  # Initialize summary_df for AI panel
 
     # ---------------- PLOT 1: Daily Avg idisc % ----------------
     if plot_key == "Plot 1":
-        st.subheader("Daily Average idisc % (1-Month View)")
+        view = select_view(df, plot_key)
         df_idisc = df.dropna(subset=['idisc', 'value'])
         df_idisc = df_idisc[(df_idisc['idisc'] > 0) & (df_idisc['value'] > 0)]
-        df_idisc['idisc_pct'] = (df_idisc['idisc'] / df_idisc['value']) * 100
-        daily_avg = df_idisc.groupby('day')['idisc_pct'].mean().reset_index()
-        plt.figure(figsize=(12, 5))
-        sns.lineplot(data=daily_avg, x='day', y='idisc_pct', marker='o', color='teal')
-        plt.title("Daily Average idisc % (1-Month View)")
-        plt.xlabel("Day of the Month")
-        plt.ylabel("Average idisc (%)")
-        plt.xticks(range(1, 32))
-        plt.grid(True)
-        plt.tight_layout()
-        st.pyplot(plt.gcf())
-        plt.clf()
+        daily_avg = periods.fold_by_day(df, 'idisc_pct', 'idisc')
+        if view == "Calendar":
+            st.subheader("Average idisc % (Calendar View)")
+            calendar_view(df, plot_key, "Average idisc %", "Average idisc (%)", ['idisc_pct'], 'idisc')
+        else:
+            label = fold_label(df)
+            st.subheader(f"Daily Average idisc % ({label})")
+            def draw():
+                plt.figure(figsize=(12, 5))
+                sns.lineplot(data=daily_avg.reset_index(), x='day', y='idisc_pct', marker='o', color='teal')
+                plt.title(f"Daily Average idisc % ({label})")
+                plt.xlabel("Day of the Month")
+                plt.ylabel("Average idisc (%)")
+                plt.xticks(range(1, 32))
+                plt.grid(True)
+                plt.tight_layout()
+                return plt.gcf()
+            figcache.pyplot(draw, df, "timeseries", plot_key)
 
         # Summary table
-        df_idisc['brand'] = df_idisc['brand'].str.upper()
-        df_idisc['region'] = df_idisc['region'].str.upper()
-        daily_avg = df_idisc.groupby('day')['idisc_pct'].mean()
         top_discount_day = daily_avg.idxmax()
         peak_discount_value = daily_avg.max()
-        brand_avg = df_idisc.groupby('brand')['idisc_pct'].mean()
+        brand_avg = df_idisc.groupby('brand', observed=True)['idisc_pct'].mean()
         most_discounted_brand = brand_avg.idxmax()
         brand_discount_value = brand_avg.max()
-        region_avg = df_idisc.groupby('region')['idisc_pct'].mean()
+        region_avg = df_idisc.groupby('region', observed=True)['idisc_pct'].mean()
         underperforming_region = region_avg.idxmin()
         underperforming_region_val = region_avg.min()
         high_discount_days = df_idisc[df_idisc['idisc_pct'] > 10]['day'].value_counts()
@@ -127,26 +176,26 @@ def plot_and_insight(df, plot_key, plot_label=""):
 
     # ---------------- PLOT 2: OBDISC & GHSDISC ----------------
     elif plot_key == "Plot 2":
+        view = select_view(df, plot_key)
         st.subheader("Daily Trend of OBDISC and GHSDISC (as % of Bill Value)")
-        idisc_cols = ['obdisc', 'ghsdisc']
-        df2 = df.dropna(subset=idisc_cols + ['value'])
-        df2 = df2[df2['value'] > 0]
-        df2['obdisc_pct'] = (df2['obdisc'] / df2['value']) * 100
-        df2['ghsdisc_pct'] = (df2['ghsdisc'] / df2['value']) * 100
-        df2 = df2[(df2['obdisc_pct'] >= 0) & (df2['ghsdisc_pct'] >= 0)]
-        df2['day'] = df2['docdate'].dt.day
-        daily_avg2 = df2.groupby('day')[['obdisc_pct', 'ghsdisc_pct']].mean().reset_index()
-        df_melted = daily_avg2.melt(id_vars='day', var_name='idisc_type', value_name='average_discount_pct')
-        plt.figure(figsize=(14, 6))
-        sns.lineplot(data=df_melted, x='day', y='average_discount_pct', hue='idisc_type', marker='o', palette='Dark2')
-        plt.title("Daily Trend of OBDISC and GHSDISC (%)")
-        plt.xlabel("Day of Month")
-        plt.ylabel("Average Discount (%)")
-        plt.xticks(range(1, 32))
-        plt.grid(True)
-        plt.tight_layout()
-        st.pyplot(plt.gcf())
-        plt.clf()
+        daily_avg2 = pd.concat([periods.fold_by_day(df, col, 'obdisc_ghsdisc')
+                                for col in ['obdisc_pct', 'ghsdisc_pct']], axis=1).reset_index()
+        if view == "Calendar":
+            calendar_view(df, plot_key, "Trend of OBDISC and GHSDISC (%)", "Average Discount (%)",
+                          ['obdisc_pct', 'ghsdisc_pct'], 'obdisc_ghsdisc')
+        else:
+            df_melted = daily_avg2.melt(id_vars='day', var_name='idisc_type', value_name='average_discount_pct')
+            def draw():
+                plt.figure(figsize=(14, 6))
+                sns.lineplot(data=df_melted, x='day', y='average_discount_pct', hue='idisc_type', marker='o', palette='Dark2')
+                plt.title(f"Daily Trend of OBDISC and GHSDISC (%) ({fold_label(df)})")
+                plt.xlabel("Day of Month")
+                plt.ylabel("Average Discount (%)")
+                plt.xticks(range(1, 32))
+                plt.grid(True)
+                plt.tight_layout()
+                return plt.gcf()
+            figcache.pyplot(draw, df, "timeseries", plot_key)
 
         # Summary table
         summary_data = {
@@ -174,27 +223,25 @@ def plot_and_insight(df, plot_key, plot_label=""):
         st.subheader("Average Discount % by Day of Week")
         df3 = df.dropna(subset=['value', 'discount'])
         df3 = df3[(df3['value'] > 0) & (df3['discount'] >= 0)]
-        df3['discount_pct'] = df3['discount'] / df3['value']
-        df3['day_of_week'] = df3['docdate'].dt.day_name()
-        day_order = ['Monday','Tuesday','Wednesday','Thursday','Friday','Saturday','Sunday']
-        df3['day_of_week'] = pd.Categorical(df3['day_of_week'], categories=day_order, ordered=True)
-        avg_by_day = df3.groupby('day_of_week')['discount_pct'].mean().reindex(day_order)
-        plt.figure(figsize=(10,5))
-        ax = sns.barplot(x=avg_by_day.index, y=avg_by_day.values, palette='Set3')
-        plt.title("Average Discount % by Day of Week")
-        plt.ylabel("Average Discount %")
-        plt.xlabel("")
-        plt.gca().yaxis.set_major_formatter(ticker.PercentFormatter(1.0))
-        plt.xticks(rotation=30)
-        plt.grid(axis='y', linestyle='--', alpha=0.4)
-        for idx, val in enumerate(avg_by_day.values):
-            ax.text(idx, val/2, f"{val:.1%}", ha='center', va='center', fontsize=10, color='black')
-        plt.tight_layout()
-        st.pyplot(plt.gcf())
-        plt.clf()
+        day_order = DAY_ORDER
+        avg_by_day = df3.groupby('day_of_week', observed=False)['discount_pct'].mean().reindex(day_order)
+        def draw():
+            plt.figure(figsize=(10,5))
+            ax = sns.barplot(x=avg_by_day.index, y=avg_by_day.values, palette='Set3')
+            plt.title("Average Discount % by Day of Week")
+            plt.ylabel("Average Discount %")
+            plt.xlabel("")
+            plt.gca().yaxis.set_major_formatter(ticker.PercentFormatter(100))
+            plt.xticks(rotation=30)
+            plt.grid(axis='y', linestyle='--', alpha=0.4)
+            for idx, val in enumerate(avg_by_day.values):
+                ax.text(idx, val/2, f"{val:.1f}%", ha='center', va='center', fontsize=10, color='black')
+            plt.tight_layout()
+            return plt.gcf()
+        figcache.pyplot(draw, df, "timeseries", plot_key)
 
         # Summary table
-        summary_df = df3.groupby('day_of_week')['discount_pct'].agg(
+        summary_df = df3.groupby('day_of_week', observed=False)['discount_pct'].agg(
             Avg_Discount_Percentage='mean',
             Transaction_Count='count'
         ).reindex(day_order).reset_index()
@@ -207,62 +254,63 @@ def plot_and_insight(df, plot_key, plot_label=""):
 
     # -----------------OLOT 4-------------
     elif plot_key == "Plot 4":
+        view = select_view(df, plot_key)
         st.subheader("Daily Discount Trend (%): Tanishq vs Mia, Zoya & Ecom")
 
-        df['docdate'] = pd.to_datetime(df['docdate'], errors='coerce')
-        df['brand'] = df['brand'].str.upper()
-        df['day'] = df['docdate'].dt.day
-
-        df_valid = df[(df['discount'] > 0) & (df['value'] > 0)].copy()
+        df_valid = df[(df['discount'] > 0) & (df['value'] > 0)]
         if df_valid.empty:
             st.warning("No valid discount data available for plotting.")
         else:
-            df_valid['discount_pct'] = (df_valid['discount'] / df_valid['value']) * 100
             df_valid = df_valid[df_valid['discount_pct'] <= 100]
 
-            df_tanishq = df_valid[df_valid['brand'] == 'TANISHQ']
-            df_other = df_valid[df_valid['brand'] != 'TANISHQ']
-
-            fig, axs = plt.subplots(2, 1, figsize=(12, 10), sharex=True)
-
-            if not df_tanishq.empty:
-                daily_discount_tanishq = df_tanishq.groupby('day')['discount_pct'].mean().reset_index()
-                sns.lineplot(
-                    data=daily_discount_tanishq,
-                    x='day',
-                    y='discount_pct',
-                    marker='o',
-                    color='goldenrod',
-                    ax=axs[0]
-                )
-            axs[0].set_title("Tanishq - Daily Avg Discount (%)")
-            axs[0].set_ylabel("Avg Discount (%)")
-            axs[0].grid(True)
-
-            if not df_other.empty:
-                daily_discount_other = df_other.groupby(['day', 'brand'])['discount_pct'].mean().reset_index()
-                sns.lineplot(
-                    data=daily_discount_other,
-                    x='day',
-                    y='discount_pct',
-                    hue='brand',
-                    marker='o',
-                    palette='tab10',
-                    ax=axs[1]
-                )
-            axs[1].set_title("Mia, Zoya & Ecom - Daily Avg Discount (%)")
-            axs[1].set_xlabel("Day of Month")
-            axs[1].set_ylabel("Avg Discount (%)")
-            axs[1].grid(True)
-            axs[1].set_xticks(range(1, 32))
+            if view == "Calendar":
+                calendar_view(df, plot_key, "Discount Trend (%) by Brand", "Avg Discount (%)",
+                              ['discount_pct'], 'discounted_capped', by='brand')
+            else:
+                daily_discount = periods.fold_by_day(df, 'discount_pct', 'discounted_capped', by='brand').dropna().reset_index()
+                daily_discount['brand'] = daily_discount['brand'].astype(str)
+                daily_discount_tanishq = daily_discount[daily_discount['brand'] == 'TANISHQ']
+                daily_discount_other = daily_discount[daily_discount['brand'] != 'TANISHQ']
 
-            plt.tight_layout()
-            st.pyplot(fig)
-            plt.clf()
+                def draw():
+                    fig, axs = plt.subplots(2, 1, figsize=(12, 10), sharex=True)
+
+                    if not daily_discount_tanishq.empty:
+                        sns.lineplot(
+                            data=daily_discount_tanishq,
+                            x='day',
+                            y='discount_pct',
+                            marker='o',
+                            color='goldenrod',
+                            ax=axs[0]
+                        )
+                    axs[0].set_title("Tanishq - Daily Avg Discount (%)")
+                    axs[0].set_ylabel("Avg Discount (%)")
+                    axs[0].grid(True)
+
+                    if not daily_discount_other.empty:
+                        sns.lineplot(
+                            data=daily_discount_other,
+                            x='day',
+                            y='discount_pct',
+                            hue='brand',
+                            marker='o',
+                            palette='tab10',
+                            ax=axs[1]
+                        )
+                    axs[1].set_title("Mia, Zoya & Ecom - Daily Avg Discount (%)")
+                    axs[1].set_xlabel(f"Day of Month ({fold_label(df)})")
+                    axs[1].set_ylabel("Avg Discount (%)")
+                    axs[1].grid(True)
+                    axs[1].set_xticks(range(1, 32))
+
+                    plt.tight_layout()
+                    return fig
+                figcache.pyplot(draw, df, "timeseries", plot_key)
 
             # Summary Table
             summary_data = []
-            for brand, group in df_valid.groupby('brand'):
+            for brand, group in df_valid.groupby('brand', observed=True):
                 avg_disc = round(group['discount_pct'].mean(), 2)
                 total_txn = len(group)
                 summary_data.append({
@@ -278,25 +326,29 @@ def plot_and_insight(df, plot_key, plot_label=""):
 
     # ---------------- PLOT 5: Returns ----------------
     elif plot_key == "Plot 5":
-        st.subheader("Daily Returned Transactions (Day 1–31)")
-        df_return = df.copy()
-        df_return['is_returned'] = (df_return['qty']<0) | (df_return['value']<0)
-        returned_df = df_return[df_return['is_returned']].copy()
-        returned_df['day'] = returned_df['docdate'].dt.day
-        daily_returns = returned_df.groupby('day').size().reset_index(name='Return Count')
-        all_days = pd.DataFrame({'day':range(1,32)})
-        daily_returns = all_days.merge(daily_returns,on='day',how='left').fillna(0)
-        plt.figure(figsize=(12,5))
-        sns.lineplot(data=daily_returns, x='day', y='Return Count', marker='o', linewidth=2, color='crimson')
-        plt.title("Returned Transactions per Day (1–31)")
-        plt.xlabel("Day of Month")
-        plt.ylabel("Return Count")
-        plt.xticks(range(1,32))
-        plt.gca().yaxis.set_major_locator(MaxNLocator(integer=True))
-        plt.grid(True, linestyle='--', alpha=0.5)
-        plt.tight_layout()
-        st.pyplot(plt.gcf())
-        plt.clf()
+        view = select_view(df, plot_key)
+        returned_df = df[df['returned']]
+        if view == "Calendar":
+            st.subheader("Returned Transactions (Calendar View)")
+            calendar_view(df, plot_key, "Returned Transactions", "Return Count", ['rows'], 'returned', stat="sum")
+        else:
+            st.subheader("Daily Returned Transactions (Day 1–31)")
+            daily_returns = (
+                periods.fold_by_day(df, 'rows', 'returned', stat="sum")
+                .reindex(range(1, 32), fill_value=0).rename_axis('day').reset_index(name='Return Count')
+            )
+            def draw():
+                plt.figure(figsize=(12,5))
+                sns.lineplot(data=daily_returns, x='day', y='Return Count', marker='o', linewidth=2, color='crimson')
+                plt.title(f"Returned Transactions per Day (1–31, {fold_label(df)})")
+                plt.xlabel("Day of Month")
+                plt.ylabel("Return Count")
+                plt.xticks(range(1,32))
+                plt.gca().yaxis.set_major_locator(MaxNLocator(integer=True))
+                plt.grid(True, linestyle='--', alpha=0.5)
+                plt.tight_layout()
+                return plt.gcf()
+            figcache.pyplot(draw, df, "timeseries", plot_key)
 
         # Summary table
         summary_data = {
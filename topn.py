@@ -0,0 +1,80 @@
+import os
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+from data_sources import dataset_version
+
+# === Top-N Engine ===
+# For each (brand, region, day) partition the K rows with the largest
+# metric are kept, in one list sorted by the metric. Any brand / region /
+# date-range filter is a union of whole partitions, so its top N (N <= K)
+# is exactly the first N list entries that pass the filter; a query reads
+# the short list instead of sorting the frame. Lists are built once per
+# dataset version with a partial selection (argpartition) per partition.
+
+LIST_SIZE = int(os.environ.get("DASHBOARD_TOPN_K", "50"))
+
+PARTITIONS = ["brand", "region"]
+
+
+def _partition_keys(df):
+    keys = {col: df[col] for col in PARTITIONS if col in df.columns}
+    keys["docday"] = df["docdate"].dt.normalize()
+    return pd.DataFrame(keys, index=df.index)
+
+
+@st.cache_data(show_spinner=False)
+def _lists(_df, dataset_version, metric, require, k):
+    df = _df.dropna(subset=[metric, *require])
+    lists = _partition_keys(df)
+    groups = np.zeros(len(df), dtype=np.int64)
+    for col in lists.columns:
+        codes, uniques = pd.factorize(lists[col], use_na_sentinel=False)
+        groups = groups * (len(uniques) + 1) + codes
+
+    # Partial selection (argpartition) of the k largest in each partition
+    by_group = np.argsort(groups)
+    sorted_groups = groups[by_group]
+    starts = np.r_[0, np.flatnonzero(np.diff(sorted_groups)) + 1]
+    ends = np.r_[starts[1:], len(by_group)]
+    negated = -df[metric].to_numpy(dtype="float64")[by_group]
+    kept = [by_group[s:e] if e - s <= k else by_group[s + np.argpartition(negated[s:e], k - 1)[:k]]
+            for s, e in zip(starts, ends)]
+    kept = np.sort(np.concatenate(kept)) if kept else np.empty(0, dtype=np.intp)
+
+    lists = lists.iloc[kept]
+    lists[metric] = df[metric].to_numpy(dtype="float64")[kept]
+    # Ties keep row order
+    return lists.iloc[np.argsort(-lists[metric].to_numpy(), kind="stable")]
+
+
+def top_n(df, metric, n, brands=None, regions=None, start=None, end=None, require=()):
+    """The ``n`` rows of ``df`` with the largest ``metric``, largest first.
+
+    ``brands`` / ``regions`` restrict to those values; ``start`` / ``end``
+    bound ``docdate`` (inclusive days). Rows missing ``metric`` or any
+    ``require`` column are skipped. Exact for ``n`` up to DASHBOARD_TOPN_K;
+    larger ``n`` falls back to ``nlargest`` over the filtered frame.
+    """
+    if n > LIST_SIZE:
+        rows = df.dropna(subset=[metric, *require])
+        rows = rows[_mask(_partition_keys(rows), brands, regions, start, end)]
+        return rows.nlargest(n, metric, keep="first")
+    lists = _lists(df, dataset_version(df), metric, tuple(require), LIST_SIZE)
+    picked = lists[_mask(lists, brands, regions, start, end)].head(n)
+    return df.loc[picked.index]
+
+
+def _mask(keys, brands, regions, start, end):
+    mask = np.ones(len(keys), dtype=bool)
+    if brands is not None:
+        mask &= keys["brand"].isin(brands).to_numpy()
+    if regions is not None:
+        mask &= keys["region"].isin(regions).to_numpy()
+    if start is not None:
+        mask &= (keys["docday"] >= pd.Timestamp(start)).to_numpy()
+    if end is not None:
+        mask &= (keys["docday"] <= pd.Timestamp(end)).to_numpy()
+    return mask